@@ -38,17 +38,24 @@ else:
     print("⚠️ Модуль statistics.py не найден, статистика отключена")
     STATISTICS_AVAILABLE = False
 
+sys.path.insert(0, str(Path(__file__).parent))
+import deepseek_client
+import state_db
+
 # ============= КОНФИГУРАЦИЯ =============
 
 TELEGRAM_BOT_TOKEN = os.getenv('TELEGRAM_BOT_TOKEN')
 TELEGRAM_CHAT_ID = os.getenv('TELEGRAM_CHAT_ID')
 DEEPSEEK_API_KEY = os.getenv('DEEPSEEK_API_KEY')
 
-# Файл для хранения последнего обработанного update_id
-STATE_FILE = Path('.auto_reply_state.json')
-
-# Файл для хранения уже отвеченных message_id (защита от дублирования)
-ANSWERED_MESSAGES_FILE = Path('.answered_messages.json')
+# Последний обработанный update_id и отвеченные message_id (защита от дублирования)
+# хранятся в state_db и выгружаются в .auto_reply_state.json / .answered_messages.json.
+# В Cloud Function база лежит в /tmp и живёт, пока экземпляр «тёплый»; после холодного
+# старта она пустая. Это безопасно: getUpdates с offset подтверждает обновления, и
+# Telegram больше не отдаёт подтверждённые, поэтому старые комментарии не приходят
+# повторно и ответы на них не дублируются.
+STATE_FILE = state_db.AUTO_REPLY_STATE_FILE
+ANSWERED_MESSAGES_FILE = state_db.ANSWERED_MESSAGES_FILE
 
 # Файл для хранения отзывов о таймере/сайте
 FEEDBACK_FILE = Path('feedback_timer.md')
@@ -486,59 +493,36 @@ SPORTWIKI_ССЫЛКИ = {
 
 def загрузить_состояние():
     """Загружает последний обработанный update_id"""
-    if STATE_FILE.exists():
-        try:
-            with open(STATE_FILE, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-                return data.get('last_update_id', 0)
-        except Exception as e:
-            print(f"⚠️ Ошибка загрузки состояния: {e}")
+    try:
+        return state_db.get_meta('auto_reply_last_update_id', 0)
+    except Exception as e:
+        print(f"⚠️ Ошибка загрузки состояния: {e}")
     return 0
 
 
 def сохранить_состояние(update_id):
     """Сохраняет последний обработанный update_id"""
     try:
-        with open(STATE_FILE, 'w', encoding='utf-8') as f:
-            json.dump({'last_update_id': update_id}, f, ensure_ascii=False, indent=2)
+        state_db.set_meta('auto_reply_last_update_id', update_id)
     except Exception as e:
         print(f"⚠️ Ошибка сохранения состояния: {e}")
 
 
 def загрузить_отвеченные_сообщения():
     """Загружает список уже отвеченных message_id"""
-    if ANSWERED_MESSAGES_FILE.exists():
-        try:
-            with open(ANSWERED_MESSAGES_FILE, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-                # Возвращаем set для быстрой проверки
-                answered = set(data.get('answered_message_ids', []))
-                # Очищаем старые записи (старше 7 дней) для экономии места
-                # Но пока просто возвращаем все
-                return answered
-        except Exception as e:
-            print(f"⚠️ Ошибка загрузки отвеченных сообщений: {e}")
+    try:
+        # Возвращаем set для быстрой проверки
+        return set(state_db.answered_message_ids())
+    except Exception as e:
+        print(f"⚠️ Ошибка загрузки отвеченных сообщений: {e}")
     return set()
 
 
 def сохранить_отвеченное_сообщение(message_id):
     """Сохраняет message_id как отвеченный"""
     try:
-        # Загружаем существующие
-        answered = загрузить_отвеченные_сообщения()
-        # Добавляем новый
-        answered.add(str(message_id))
-        
-        # Ограничиваем размер (храним последние 10000 сообщений)
-        if len(answered) > 10000:
-            # Преобразуем в список, отсортируем и возьмём последние 10000
-            answered_list = sorted([int(mid) for mid in answered if mid.isdigit()])
-            answered = set(str(mid) for mid in answered_list[-10000:])
-        
-        # Сохраняем
-        with open(ANSWERED_MESSAGES_FILE, 'w', encoding='utf-8') as f:
-            json.dump({'answered_message_ids': list(answered)}, f, ensure_ascii=False, indent=2)
-        
+        # Одна вставка строки; храним последние 10000 сообщений
+        state_db.add_answered_message(str(message_id), max_items=10000)
         return True
     except Exception as e:
         print(f"⚠️ Ошибка сохранения отвеченного сообщения: {e}")
@@ -547,8 +531,11 @@ def сохранить_отвеченное_сообщение(message_id):
 
 def уже_отвечено(message_id):
     """Проверяет, был ли уже отправлен ответ на это сообщение"""
-    answered = загрузить_отвеченные_сообщения()
-    return str(message_id) in answered
+    try:
+        return state_db.is_message_answered(str(message_id))
+    except Exception as e:
+        print(f"⚠️ Ошибка проверки отвеченного сообщения: {e}")
+        return False
 
 
 def получить_новые_комментарии(last_update_id):
@@ -1174,32 +1161,21 @@ def проанализировать_отзыв_и_предложить_реше
     промпт = f"""Отзыв о tabatatimer.ru: "{отзыв}". Проанализируй и предложи решение."""
 
     try:
-        response = requests.post(
-            "https://api.deepseek.com/v1/chat/completions",
-            headers={
-                "Authorization": f"Bearer {DEEPSEEK_API_KEY}",
-                "Content-Type": "application/json"
-            },
-            json={
-                "model": "deepseek-chat",
-                "messages": [
-                    {"role": "system", "content": системное_сообщение},
-                    {"role": "user", "content": промпт}
-                ],
-                "temperature": 0.7,
-                "max_tokens": 350  # Оптимизировано для экономии токенов
-            },
-            timeout=30
-        )
-        
-        if response.status_code == 200:
-            data = response.json()
-            анализ = data['choices'][0]['message']['content'].strip()
-            return анализ
-        else:
-            print(f"❌ Ошибка DeepSeek API при анализе: {response.status_code}")
-            return None
+        анализ = deepseek_client.chat_text(
+            [
+                {"role": "system", "content": системное_сообщение},
+                {"role": "user", "content": промпт}
+            ],
+            temperature=0.7,
+            max_tokens=350,  # Оптимизировано для экономии токенов
+            timeout=30,
+            purpose='feedback_analysis'
+        ).strip()
+        return анализ
             
+    except requests.HTTPError as e:
+        print(f"❌ Ошибка DeepSeek API при анализе: {e.response.status_code}")
+        return None
     except Exception as e:
         print(f"❌ Исключение при анализе отзыва: {e}")
         return None
@@ -1268,35 +1244,24 @@ def сгенерировать_ответ_на_отзыв(отзыв):
 Сформируй дружелюбный ответ, что отзыв принят к сведению и будет рассмотрен."""
 
     try:
-        response = requests.post(
-            "https://api.deepseek.com/v1/chat/completions",
-            headers={
-                "Authorization": f"Bearer {DEEPSEEK_API_KEY}",
-                "Content-Type": "application/json"
-            },
-            json={
-                "model": "deepseek-chat",
-                "messages": [
-                    {"role": "system", "content": системное_сообщение},
-                    {"role": "user", "content": промпт}
-                ],
-                "temperature": 0.9,  # Высокая для естественности
-                "max_tokens": 250,  # Увеличено для более естественных ответов
-                "top_p": 0.9,
-                "frequency_penalty": 0.2,
-                "presence_penalty": 0.1
-            },
-            timeout=20
-        )
-        
-        if response.status_code == 200:
-            data = response.json()
-            ответ = data['choices'][0]['message']['content'].strip()
-            return ответ
-        else:
-            # Фолбэк ответ
-            return "Спасибо за отзыв! Принято к сведению, будем работать над улучшениями 💪"
+        ответ = deepseek_client.chat_text(
+            [
+                {"role": "system", "content": системное_сообщение},
+                {"role": "user", "content": промпт}
+            ],
+            temperature=0.9,  # Высокая для естественности
+            max_tokens=250,  # Увеличено для более естественных ответов
+            timeout=20,
+            purpose='feedback_reply',
+            top_p=0.9,
+            frequency_penalty=0.2,
+            presence_penalty=0.1
+        ).strip()
+        return ответ
             
+    except requests.HTTPError:
+        # Фолбэк ответ
+        return "Спасибо за отзыв! Принято к сведению, будем работать над улучшениями 💪"
     except Exception as e:
         print(f"❌ Ошибка генерации ответа на отзыв: {e}")
         return "Спасибо за обратную связь! Принято к сведению, будем дорабатывать 🔧"
@@ -1442,41 +1407,30 @@ def сгенерировать_ответ(вопрос):
 ПОМНИ: Ты НЕ бот, ты РЕАЛЬНЫЙ ЧЕЛОВЕК! Пиши так, как бы ты написал другу в личке - живо, естественно, с эмоциями, но по делу."""
 
     try:
-        response = requests.post(
-            "https://api.deepseek.com/v1/chat/completions",
-            headers={
-                "Authorization": f"Bearer {DEEPSEEK_API_KEY}",
-                "Content-Type": "application/json"
-            },
-            json={
-                "model": "deepseek-chat",
-                "messages": [
-                    {"role": "system", "content": системное_сообщение},
-                    {"role": "user", "content": промпт}
-                ],
-                "temperature": 0.95,  # Очень высокая для максимальной естественности и разнообразия
-                "max_tokens": 400,  # Увеличено для более развёрнутых и естественных ответов
-                "top_p": 0.9,  # Для более разнообразных ответов
-                "frequency_penalty": 0.3,  # Штрафуем повторения для большей вариативности
-                "presence_penalty": 0.2  # Поощряем новые темы и идеи
-            },
-            timeout=20
-        )
+        ответ = deepseek_client.chat_text(
+            [
+                {"role": "system", "content": системное_сообщение},
+                {"role": "user", "content": промпт}
+            ],
+            temperature=0.95,  # Очень высокая для максимальной естественности и разнообразия
+            max_tokens=400,  # Увеличено для более развёрнутых и естественных ответов
+            timeout=20,
+            purpose='comment_reply',
+            top_p=0.9,  # Для более разнообразных ответов
+            frequency_penalty=0.3,  # Штрафуем повторения для большей вариативности
+            presence_penalty=0.2  # Поощряем новые темы и идеи
+        ).strip()
         
-        if response.status_code == 200:
-            data = response.json()
-            ответ = data['choices'][0]['message']['content'].strip()
-            
-            # Ограничиваем длину ответа (Telegram лимит для одного сообщения ~4096 символов)
-            # Но для комментариев лучше короче - до 600 символов (с учётом эмодзи и форматирования)
-            if len(ответ) > 600:
-                ответ = ответ[:597] + "..."
-            
-            return ответ
-        else:
-            print(f"❌ Ошибка DeepSeek API: {response.status_code}")
-            return None
+        # Ограничиваем длину ответа (Telegram лимит для одного сообщения ~4096 символов)
+        # Но для комментариев лучше короче - до 600 символов (с учётом эмодзи и форматирования)
+        if len(ответ) > 600:
+            ответ = ответ[:597] + "..."
+        
+        return ответ
             
+    except requests.HTTPError as e:
+        print(f"❌ Ошибка DeepSeek API: {e.response.status_code}")
+        return None
     except Exception as e:
         print(f"❌ Исключение при генерации ответа: {e}")
         return None
@@ -1777,5 +1731,6 @@ def главная():
 
 if __name__ == "__main__":
     успех = главная()
+    deepseek_client.напечатать_метрики()
     exit(0 if успех else 1)
 
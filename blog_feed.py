@@ -0,0 +1,242 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+    Компактный индекс и шарды ленты блога
+
+    blog-posts.json содержит полные тексты и галереи всех постов, поэтому
+    его целиком загружают и парсеры, и генератор, и браузер. Генератор
+    страниц дополнительно выпускает рядом с ним:
+
+    - blog-index.json — только поля для списков (id, slug, заголовок, теги,
+      главное изображение, дата и источник);
+    - blog-feed/page-N.json — полные посты постранично (для ленты на сайте);
+    - blog-feed/posts/<slug>.json — отдельный файл на каждый пост.
+
+    Файлы перезаписываются, только если изменилось содержимое. В индексе
+    хранится SHA-256 исходного blog-posts.json: BlogFeed читает индекс,
+    только пока он соответствует текущему blog-posts.json, иначе строит
+    индекс из полного файла. Полные посты читаются только по запросу.
+
+    Автор: VR-Lounge
+"""
+
+import hashlib
+import json
+import os
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+
+INDEX_FILE_NAME = 'blog-index.json'
+FEED_DIR_NAME = 'blog-feed'
+BLOG_FEED_PAGE_SIZE = int(os.getenv('BLOG_FEED_PAGE_SIZE', '20'))
+
+# Поля поста в индексе: всё, что нужно спискам и проверкам источников, без text/images
+INDEX_FIELDS = ('id', 'title', 'tags', 'image', 'date', 'timestamp', 'source', 'url', 'source_url', 'rss_feed_url')
+
+
+def slug_из_url(url: str) -> Optional[str]:
+    """Slug страницы из URL вида .../blog/<slug>.html"""
+    if not url or '/blog/' not in url:
+        return None
+    slug = url.split('/blog/')[-1].replace('.html', '').strip()
+    return slug or None
+
+
+def запись_индекса(пост: Dict, slug: Optional[str] = None) -> Dict:
+    """Компактная запись поста для blog-index.json"""
+    запись = {поле: пост[поле] for поле in INDEX_FIELDS if пост.get(поле) is not None}
+    запись['slug'] = slug or slug_из_url(пост.get('url'))
+    return запись
+
+
+def _sha256(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _записать_если_изменился(path: Path, данные) -> bool:
+    """Пишет компактный JSON атомарно; False, если содержимое не изменилось."""
+    содержимое = json.dumps(данные, ensure_ascii=False, separators=(',', ':'))
+    if path.exists():
+        try:
+            if path.read_text(encoding='utf-8') == содержимое:
+                return False
+        except OSError:
+            pass
+    path.parent.mkdir(parents=True, exist_ok=True)
+    временный = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    временный.write_text(содержимое, encoding='utf-8')
+    os.replace(временный, path)
+    return True
+
+
+def записать_ленту(posts_file: Path, посты: List[Dict], slugs: Dict[str, str] = None,
+                   page_size: int = None) -> Dict[str, int]:
+    """
+    Выпускает blog-index.json и шарды blog-feed/ рядом с blog-posts.json.
+
+    Вызывать после того, как blog-posts.json записан: индекс привязывается
+    к его SHA-256.
+
+    Args:
+        posts_file: путь к blog-posts.json
+        посты: посты в порядке blog-posts.json (новые первыми)
+        slugs: post_id -> slug сгенерированной страницы
+        page_size: постов на страницу ленты (по умолчанию BLOG_FEED_PAGE_SIZE)
+
+    Returns:
+        {'written': N, 'removed': N, 'pages': N}
+    """
+    posts_file = Path(posts_file)
+    slugs = slugs or {}
+    page_size = max(1, page_size or BLOG_FEED_PAGE_SIZE)
+    feed_dir = posts_file.with_name(FEED_DIR_NAME)
+    posts_dir = feed_dir / 'posts'
+    записано = 0
+    удалено = 0
+
+    записи = [запись_индекса(пост, slugs.get(пост.get('id'))) for пост in посты]
+    страниц = (len(посты) + page_size - 1) // page_size
+
+    # Отдельный файл на пост
+    нужные_посты = set()
+    for пост, запись in zip(посты, записи):
+        if not запись['slug'] or запись['slug'] in нужные_посты:
+            continue
+        нужные_посты.add(запись['slug'])
+        записано += _записать_если_изменился(posts_dir / f"{запись['slug']}.json", dict(пост, slug=запись['slug']))
+
+    # Полные посты постранично
+    for номер in range(1, страниц + 1):
+        срез = slice((номер - 1) * page_size, номер * page_size)
+        записано += _записать_если_изменился(feed_dir / f"page-{номер}.json", {
+            'page': номер,
+            'pages': страниц,
+            'page_size': page_size,
+            'total': len(посты),
+            'posts': [dict(пост, slug=запись['slug']) for пост, запись in zip(посты[срез], записи[срез])]
+        })
+
+    # Шарды удалённых постов и лишние страницы
+    if posts_dir.exists():
+        for файл in posts_dir.glob('*.json'):
+            if файл.stem not in нужные_посты:
+                файл.unlink()
+                удалено += 1
+    if feed_dir.exists():
+        for файл in feed_dir.glob('page-*.json'):
+            номер = файл.stem.split('-', 1)[1]
+            if not номер.isdigit() or int(номер) > страниц:
+                файл.unlink()
+                удалено += 1
+
+    # Индекс пишем последним: он ссылается на уже записанные шарды
+    индекс = {
+        'version': 1,
+        'source': {'size': posts_file.stat().st_size, 'sha256': _sha256(posts_file)} if posts_file.exists() else None,
+        'total': len(посты),
+        'page_size': page_size,
+        'pages': страниц,
+        'posts': записи
+    }
+    index_file = posts_file.with_name(INDEX_FILE_NAME)
+    старый = None
+    if index_file.exists():
+        try:
+            with open(index_file, 'r', encoding='utf-8') as f:
+                старый = json.load(f)
+        except Exception:
+            старый = None
+    if not старый or {k: v for k, v in старый.items() if k != 'updated_at'} != индекс:
+        индекс['updated_at'] = datetime.now().isoformat()
+        записано += _записать_если_изменился(index_file, индекс)
+
+    return {'written': записано, 'removed': удалено, 'pages': страниц}
+
+
+class BlogFeed:
+    """Ленивый доступ к постам блога: индекс без текстов, полные посты — по запросу."""
+
+    def __init__(self, posts_file: Path):
+        self.posts_file = Path(posts_file)
+        self.index_file = self.posts_file.with_name(INDEX_FILE_NAME)
+        self.feed_dir = self.posts_file.with_name(FEED_DIR_NAME)
+        self._index: Optional[List[Dict]] = None
+        self._index_key = None
+        self._index_valid = False
+        self._lock = threading.RLock()
+
+    def _stat_key(self):
+        try:
+            stat = self.posts_file.stat()
+        except FileNotFoundError:
+            return None
+        return stat.st_size, stat.st_mtime_ns
+
+    def _load_index(self, size: int) -> Optional[List[Dict]]:
+        """Записи blog-index.json, если он построен по текущему blog-posts.json."""
+        if not self.index_file.exists():
+            return None
+        try:
+            with open(self.index_file, 'r', encoding='utf-8') as f:
+                индекс = json.load(f)
+            источник = индекс.get('source') or {}
+            if источник.get('size') != size or источник.get('sha256') != _sha256(self.posts_file):
+                return None
+            return индекс.get('posts', [])
+        except Exception as e:
+            print(f"⚠️ Ошибка чтения {self.index_file.name}: {e}")
+            return None
+
+    def index(self) -> List[Dict]:
+        """Компактные записи всех постов (новые первыми); blog-posts.json читается, только если индекс устарел."""
+        with self._lock:
+            key = self._stat_key()
+            if key is None:
+                return []
+            if self._index is not None and self._index_key == key:
+                return self._index
+            записи = self._load_index(key[0])
+            self._index_valid = записи is not None
+            if записи is None:
+                записи = [запись_индекса(пост) for пост in self.posts()]
+            self._index, self._index_key = записи, key
+            return записи
+
+    def recent(self, n: int) -> List[Dict]:
+        """Последние n постов из индекса."""
+        return self.index()[:n]
+
+    def posts(self) -> List[Dict]:
+        """Полные посты из blog-posts.json (каждый вызов читает файл заново)."""
+        if not self.posts_file.exists():
+            return []
+        try:
+            with open(self.posts_file, 'r', encoding='utf-8') as f:
+                return json.load(f).get('posts', [])
+        except Exception as e:
+            print(f"⚠️ Ошибка чтения {self.posts_file.name}: {e}")
+            return []
+
+    def post(self, post_id: str) -> Optional[Dict]:
+        """Полный пост по id: из шарда blog-feed/posts/, если индекс актуален, иначе из blog-posts.json."""
+        with self._lock:
+            записи = self.index()
+            индекс_актуален = self._index_valid
+        запись = next((запись for запись in записи if запись.get('id') == post_id), None)
+        if запись is None:
+            return None
+        if индекс_актуален and запись.get('slug'):
+            шард = self.feed_dir / 'posts' / f"{запись['slug']}.json"
+            try:
+                with open(шард, 'r', encoding='utf-8') as f:
+                    return json.load(f)
+            except (OSError, ValueError):
+                pass
+        return next((пост for пост in self.posts() if пост.get('id') == post_id), None)
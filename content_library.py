@@ -5,14 +5,15 @@
 Хранит ссылки на статьи, изображения и краткие описания для повторного использования.
 """
 
-import json
 from datetime import datetime
 from pathlib import Path
 from typing import Dict, List, Optional, Tuple
 from urllib.parse import urlparse
 
+import state_db
 
-LIBRARY_FILE = Path(__file__).parent / "content_library.json"
+
+LIBRARY_FILE = Path(__file__).parent / "content_library.json"  # выгружается state_db.export_json()
 
 
 def _default_library() -> Dict:
@@ -24,22 +25,28 @@ def _default_library() -> Dict:
 
 
 def load_library() -> Dict:
-    if not LIBRARY_FILE.exists():
-        return _default_library()
     try:
-        with open(LIBRARY_FILE, "r", encoding="utf-8") as f:
-            data = json.load(f)
-        if "items" not in data:
-            return _default_library()
-        return data
-    except Exception:
+        items = state_db.library_items()
+    except Exception as e:
+        print(f"⚠️ Ошибка загрузки библиотеки: {e}")
+        return _default_library()
+    if not items:
         return _default_library()
+    return {
+        "version": 1,
+        "updated_at": state_db.get_meta("library_updated_at") or datetime.now().isoformat(),
+        "items": items
+    }
 
 
 def save_library(data: Dict) -> None:
     data["updated_at"] = datetime.now().isoformat()
-    with open(LIBRARY_FILE, "w", encoding="utf-8") as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
+    items = []
+    for item in data.get("items", []):
+        key = normalize_url(item.get("url", ""))
+        if key:
+            items.append((key, item))
+    state_db.replace_library_items(items, data["updated_at"])
 
 
 def normalize_url(url: str) -> str:
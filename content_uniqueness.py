@@ -10,35 +10,262 @@
 """
 
 import hashlib
-import json
 import os
-import requests
+import random
+import re
+import threading
+import numpy as np
 from pathlib import Path
-from typing import Dict, List, Tuple, Optional
+from typing import Dict, Iterable, List, Tuple, Optional
 
-# Файл для хранения хешей использованного контента
-CONTENT_HASHES_FILE = Path('.content_hashes.json')
+import deepseek_client
+import state_db
+from image_phash import ИНДЕКС_ИЗОБРАЖЕНИЙ
+from keyword_matcher import KeywordMatcher
+
+# Хеши использованного контента хранятся в state_db (выгружаются в .content_hashes.json)
+CONTENT_HASHES_FILE = state_db.CONTENT_HASHES_FILE
+CONTENT_HASHES_MAX_ITEMS = 2000
 DEEPSEEK_API_KEY = os.getenv('DEEPSEEK_API_KEY')
 
+# MinHash/LSH: 128 перестановок = 32 полосы по 4 строки (порог LSH ≈ 0.42 по Жаккару)
+MINHASH_NUM_PERM = 128
+MINHASH_BANDS = 32
+MINHASH_SHINGLE_SIZE = 3
+TEXT_SIGNATURES_MAX_ITEMS = 5000
+# Оценка Жаккара, начиная с которой текст считается почти-дубликатом
+NEAR_DUPLICATE_THRESHOLD = float(os.getenv('NEAR_DUPLICATE_THRESHOLD', '0.8'))
+# Ниже этой схожести с последними постами DeepSeek не вызывается (0 — вызывать всегда)
+NEAR_DUPLICATE_REVIEW_THRESHOLD = float(os.getenv('NEAR_DUPLICATE_REVIEW_THRESHOLD', '0.2'))
+
 def загрузить_хеши_контента() -> Dict:
     """Загружает хеши уже использованного контента"""
-    if CONTENT_HASHES_FILE.exists():
-        try:
-            with open(CONTENT_HASHES_FILE, 'r', encoding='utf-8') as f:
-                return json.load(f)
-        except Exception:
-            return {'text_hashes': [], 'image_hashes': [], 'content_pairs': []}
-    return {'text_hashes': [], 'image_hashes': [], 'content_pairs': []}
+    try:
+        return state_db.load_content_hashes()
+    except Exception:
+        return {'text_hashes': [], 'image_hashes': [], 'content_pairs': []}
 
 def сохранить_хеши_контента(data: Dict):
     """Сохраняет хеши использованного контента"""
     # Ограничиваем размер (храним последние 2000 записей)
     for key in ['text_hashes', 'image_hashes', 'content_pairs']:
-        if len(data.get(key, [])) > 2000:
-            data[key] = data[key][-2000:]
+        if len(data.get(key, [])) > CONTENT_HASHES_MAX_ITEMS:
+            data[key] = data[key][-CONTENT_HASHES_MAX_ITEMS:]
+    
+    state_db.replace_content_hashes(data)
+    ИНДЕКС_ХЕШЕЙ.invalidate()
+
+class ContentHashIndex:
+    """
+    Set-индекс хешей контента (text / image / pair) на процесс.
+    
+    Загружается из state_db один раз и перечитывается, только если базу
+    изменило другое соединение (PRAGMA data_version). Новые хеши сразу
+    видны в индексе и пишутся в базу пачкой одной транзакцией (flush).
+    """
+
+    def __init__(self, max_items: int = CONTENT_HASHES_MAX_ITEMS):
+        self.max_items = max_items
+        self._sets: Dict[str, set] = {}
+        self._pending: List[Tuple[str, str]] = []
+        self._version: Optional[int] = None
+        self._lock = threading.RLock()
+
+    def _ensure_loaded(self):
+        try:
+            version = state_db.data_version()
+        except Exception:
+            version = None
+        if self._sets and version == self._version:
+            return
+        try:
+            self._sets = {kind: set(state_db.content_hashes(kind)) for kind in state_db.CONTENT_HASH_KINDS}
+        except Exception as e:
+            print(f"⚠️ Ошибка загрузки хешей контента: {e}")
+            self._sets = {kind: set() for kind in state_db.CONTENT_HASH_KINDS}
+        # Ещё не записанные хеши должны оставаться видимыми после перечитывания
+        for kind, value in self._pending:
+            self._sets[kind].add(value)
+        self._version = version
+
+    def invalidate(self):
+        """Сбрасывает индекс: следующая проверка перечитает хеши из базы."""
+        with self._lock:
+            self._sets = {}
+
+    def contains(self, kind: str, value: str) -> bool:
+        with self._lock:
+            self._ensure_loaded()
+            return value in self._sets[kind]
+
+    def add(self, items: Iterable[Tuple[str, str]]):
+        """Добавляет пары (kind, hash) в индекс и в очередь на запись."""
+        with self._lock:
+            self._ensure_loaded()
+            for kind, value in items:
+                if value not in self._sets[kind]:
+                    self._sets[kind].add(value)
+                    self._pending.append((kind, value))
+
+    def flush(self):
+        """Записывает накопленные хеши в state_db одной транзакцией."""
+        with self._lock:
+            if not self._pending:
+                return
+            state_db.add_content_hashes(self._pending, max_items=self.max_items)
+            self._pending = []
+            # База обрезала старые хеши до max_items — индекс должен совпадать с ней
+            if any(len(values) > self.max_items for values in self._sets.values()):
+                self._sets = {}
+
+ИНДЕКС_ХЕШЕЙ = ContentHashIndex()
+
+_MERSENNE_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+_rng = random.Random(1)  # фиксированное зерно: подписи сопоставимы между запусками
+_MINHASH_PERMUTATIONS = [
+    (_rng.randint(1, _MERSENNE_PRIME - 1), _rng.randint(0, _MERSENNE_PRIME - 1))
+    for _ in range(MINHASH_NUM_PERM)
+]
+_WORD_RE = re.compile(r'\w+')
+
+def шинглы_текста(текст: str, размер: int = MINHASH_SHINGLE_SIZE) -> set:
+    """Множество словесных n-грамм нормализованного текста (32-битные хеши)"""
+    слова = _WORD_RE.findall(текст.lower())
+    if len(слова) < размер:
+        группы = [' '.join(слова)] if слова else []
+    else:
+        группы = [' '.join(слова[i:i + размер]) for i in range(len(слова) - размер + 1)]
+    return {int.from_bytes(hashlib.blake2b(g.encode('utf-8'), digest_size=4).digest(), 'little') for g in группы}
+
+def minhash_подпись(текст: str) -> List[int]:
+    """MinHash подпись текста из MINHASH_NUM_PERM значений"""
+    шинглы = шинглы_текста(текст)
+    if not шинглы:
+        return [_MAX_HASH] * MINHASH_NUM_PERM
+    return [
+        min(((a * x + b) % _MERSENNE_PRIME) & _MAX_HASH for x in шинглы)
+        for a, b in _MINHASH_PERMUTATIONS
+    ]
+
+def оценить_жаккара(подпись1: List[int], подпись2: List[int]) -> float:
+    """Оценка коэффициента Жаккара по доле совпавших значений подписей"""
+    if not подпись1 or len(подпись1) != len(подпись2):
+        return 0.0
+    return sum(1 for x, y in zip(подпись1, подпись2) if x == y) / len(подпись1)
+
+class TextMinHashIndex:
+    """
+    LSH-индекс MinHash подписей опубликованных текстов.
     
-    with open(CONTENT_HASHES_FILE, 'w', encoding='utf-8') as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
+    Подписи хранятся в state_db (выгружаются в .text_signatures.json) и
+    загружаются один раз; поиск почти-дубликата проверяет только тексты,
+    совпавшие с новым хотя бы в одной LSH-полосе.
+    """
+
+    def __init__(self, bands: int = MINHASH_BANDS, max_items: int = TEXT_SIGNATURES_MAX_ITEMS):
+        self.bands = bands
+        self.rows = MINHASH_NUM_PERM // bands
+        self.max_items = max_items
+        self._items: Dict[str, Dict] = {}
+        self._buckets: List[Dict[Tuple, List[str]]] = []
+        self._pending: List[Dict] = []
+        self._loaded = False
+        self._lock = threading.RLock()
+
+    def _band_keys(self, подпись: List[int]):
+        for band in range(self.bands):
+            yield band, tuple(подпись[band * self.rows:(band + 1) * self.rows])
+
+    def _index(self, item: Dict):
+        self._items[item['text_hash']] = item
+        for band, key in self._band_keys(item['signature']):
+            self._buckets[band].setdefault(key, []).append(item['text_hash'])
+
+    def _ensure_loaded(self):
+        if self._loaded:
+            return
+        self._loaded = True
+        self._items = {}
+        self._buckets = [{} for _ in range(self.bands)]
+        try:
+            for item in state_db.text_signatures():
+                if len(item['signature']) == MINHASH_NUM_PERM:
+                    self._index(item)
+        except Exception as e:
+            print(f"⚠️ Ошибка загрузки MinHash подписей: {e}")
+
+    def __len__(self) -> int:
+        with self._lock:
+            self._ensure_loaded()
+            return len(self._items)
+
+    def signature(self, текст: str) -> List[int]:
+        """Подпись текста (из индекса, если текст уже проиндексирован)"""
+        with self._lock:
+            self._ensure_loaded()
+            item = self._items.get(создать_хеш_текста(текст))
+        return item['signature'] if item else minhash_подпись(текст)
+
+    def add(self, текст: str, заголовок: str = '') -> List[int]:
+        """Индексирует текст; запись в базу — при flush()"""
+        хеш_текста = создать_хеш_текста(текст)
+        with self._lock:
+            self._ensure_loaded()
+            if хеш_текста in self._items:
+                return self._items[хеш_текста]['signature']
+            item = {'text_hash': хеш_текста, 'title': (заголовок or '')[:200], 'signature': minhash_подпись(текст)}
+            self._index(item)
+            self._pending.append(item)
+            return item['signature']
+
+    def add_posts(self, посты: List[Dict]):
+        """Индексирует тексты постов блога, которых ещё нет в индексе"""
+        for пост in посты:
+            текст = пост.get('text', '') or ''
+            if текст:
+                self.add(текст, пост.get('title', ''))
+        self.flush()
+
+    def flush(self):
+        """Записывает новые подписи в state_db одной транзакцией"""
+        with self._lock:
+            if not self._pending:
+                return
+            try:
+                state_db.add_text_signatures(self._pending, max_items=self.max_items)
+                self._pending = []
+            except Exception as e:
+                print(f"⚠️ Ошибка сохранения MinHash подписей: {e}")
+                return
+            if len(self._items) > self.max_items:
+                self._loaded = False
+
+    def find_near_duplicate(self, текст: str, порог: float = None, исключить: str = None) -> Optional[Tuple[float, Dict]]:
+        """
+        Ищет самый похожий проиндексированный текст с оценкой Жаккара >= порог
+        
+        Returns:
+            (схожесть, {text_hash, title, signature}) или None
+        """
+        порог = NEAR_DUPLICATE_THRESHOLD if порог is None else порог
+        подпись = minhash_подпись(текст)
+        лучший = None
+        with self._lock:
+            self._ensure_loaded()
+            кандидаты = set()
+            for band, key in self._band_keys(подпись):
+                кандидаты.update(self._buckets[band].get(key, ()))
+            if исключить:
+                кандидаты.discard(исключить)
+            for хеш in кандидаты:
+                item = self._items[хеш]
+                схожесть = оценить_жаккара(подпись, item['signature'])
+                if схожесть >= порог and (лучший is None or схожесть > лучший[0]):
+                    лучший = (схожесть, item)
+        return лучший
+
+ИНДЕКС_ТЕКСТОВ = TextMinHashIndex()
 
 def создать_хеш_текста(текст: str) -> str:
     """Создаёт хеш текста (нормализованный)"""
@@ -68,9 +295,8 @@ def проверить_уникальность_текста(текст: str) ->
         (is_unique, existing_hash) - уникален ли текст и хеш существующего (если есть)
     """
     хеш_текста = создать_хеш_текста(текст)
-    данные = загрузить_хеши_контента()
     
-    if хеш_текста in данные['text_hashes']:
+    if ИНДЕКС_ХЕШЕЙ.contains('text', хеш_текста):
         return False, хеш_текста
     
     return True, None
@@ -83,9 +309,8 @@ def проверить_уникальность_изображения(image_url
         (is_unique, existing_hash) - уникально ли изображение и хеш существующего (если есть)
     """
     хеш_изображения = создать_хеш_изображения(image_url)
-    данные = загрузить_хеши_контента()
     
-    if хеш_изображения in данные['image_hashes']:
+    if ИНДЕКС_ХЕШЕЙ.contains('image', хеш_изображения):
         return False, хеш_изображения
     
     return True, None
@@ -98,9 +323,8 @@ def проверить_уникальность_пары(текст: str, image_
         (is_unique, existing_hash) - уникальна ли пара и хеш существующей (если есть)
     """
     хеш_пары = создать_хеш_пары(текст, image_url)
-    данные = загрузить_хеши_контента()
     
-    if хеш_пары in данные['content_pairs']:
+    if ИНДЕКС_ХЕШЕЙ.contains('pair', хеш_пары):
         return False, хеш_пары
     
     return True, None
@@ -116,13 +340,6 @@ def проверить_семантическую_схожесть_через_de
         return False, 0.0
     
     try:
-        url = "https://api.deepseek.com/v1/chat/completions"
-        
-        headers = {
-            "Content-Type": "application/json",
-            "Authorization": f"Bearer {DEEPSEEK_API_KEY}"
-        }
-        
         # Создаём промпт для проверки схожести
         существующие_тексты_кратко = '\n'.join([f"- {t[:200]}..." for t in существующие_тексты[:5]])
         
@@ -147,32 +364,24 @@ def проверить_семантическую_схожесть_через_de
 
 Определи процент схожести (0-100) и верни JSON."""
         
-        data = {
-            "model": "deepseek-chat",
-            "messages": [
+        ответ = deepseek_client.chat_text(
+            [
                 {"role": "system", "content": system_prompt},
                 {"role": "user", "content": user_prompt}
             ],
-            "temperature": 0.3,  # Низкая температура для более точного анализа
-            "max_tokens": 200
-        }
-        
-        response = requests.post(url, headers=headers, json=data, timeout=30)
-        response.raise_for_status()
+            temperature=0.3,  # Низкая температура для более точного анализа
+            max_tokens=200,
+            timeout=30,
+            json_mode=True,
+            purpose='semantic_similarity'
+        )
         
-        result = response.json()
-        ответ = result['choices'][0]['message']['content']
-        
-        # Парсим JSON из ответа
+        # Парсим JSON из ответа (может быть обёрнут в markdown)
         try:
-            # Извлекаем JSON из ответа (может быть обёрнут в markdown)
-            import re
-            json_match = re.search(r'\{[^}]+\}', ответ)
-            if json_match:
-                parsed = json.loads(json_match.group())
-                similarity_score = parsed.get('similarity_score', 0)
-                is_similar = parsed.get('is_similar', False) or similarity_score > 80
-                return is_similar, similarity_score
+            parsed = deepseek_client.parse_json(ответ)
+            similarity_score = parsed.get('similarity_score', 0)
+            is_similar = parsed.get('is_similar', False) or similarity_score > 80
+            return is_similar, similarity_score
         except Exception as e:
             print(f"⚠️ Ошибка парсинга ответа DeepSeek: {e}")
             print(f"Ответ: {ответ}")
@@ -183,6 +392,11 @@ def проверить_семантическую_схожесть_через_de
         print(f"⚠️ Ошибка проверки семантической схожести через DeepSeek: {e}")
         return False, 0.0
 
+СЛУЖЕБНЫЕ_СЛОВА_ЗАГОЛОВКОВ = {'для', 'что', 'как', 'и', 'или', 'в', 'на', 'с', 'от', 'до', 
+                               'the', 'a', 'an', 'of', 'to', 'in', 'on', 'at', 'for', 'with',
+                               'как', 'что', 'для', 'это', 'этот', 'эта', 'это', 'все', 'всего'}
+TITLE_SIMILARITY_THRESHOLD = 0.75
+
 def проверить_схожесть_заголовков(заголовок1: str, заголовок2: str) -> float:
     """
     Проверяет схожесть двух заголовков по косинусному сходству
@@ -210,11 +424,8 @@ def проверить_схожесть_заголовков(заголовок1
     слова2 = set(заголовок2.split())
     
     # Убираем служебные слова
-    служебные_слова = {'для', 'что', 'как', 'и', 'или', 'в', 'на', 'с', 'от', 'до', 
-                       'the', 'a', 'an', 'of', 'to', 'in', 'on', 'at', 'for', 'with',
-                       'как', 'что', 'для', 'это', 'этот', 'эта', 'это', 'все', 'всего'}
-    слова1 -= служебные_слова
-    слова2 -= служебные_слова
+    слова1 -= СЛУЖЕБНЫЕ_СЛОВА_ЗАГОЛОВКОВ
+    слова2 -= СЛУЖЕБНЫЕ_СЛОВА_ЗАГОЛОВКОВ
     
     if not слова1 or not слова2:
         return 0.0
@@ -236,6 +447,116 @@ def проверить_схожесть_заголовков(заголовок1
     
     return схожесть
 
+class TitleSimilarityIndex:
+    """
+    Матрица «заголовок × слово» всех опубликованных заголовков (NumPy, CSR).
+    
+    Новый заголовок сравнивается со всеми сразу одним произведением
+    разреженной матрицы на вектор: получаем число общих слов с каждым
+    заголовком и по нему — ту же меру, что и проверить_схожесть_заголовков.
+    Новые посты дописываются в конец массивов без перестройки матрицы.
+    """
+
+    def __init__(self):
+        self._vocab: Dict[str, int] = {}
+        self._rows: Dict[str, int] = {}
+        self._titles: List[str] = []
+        self._sizes = np.zeros(0, dtype=np.int32)
+        self._indices = np.zeros(0, dtype=np.int32)
+        self._row_of = np.zeros(0, dtype=np.int32)
+        self._nnz = 0
+        self._lock = threading.RLock()
+
+    @staticmethod
+    def _words(заголовок: str) -> set:
+        return set(заголовок.lower().strip().split()) - СЛУЖЕБНЫЕ_СЛОВА_ЗАГОЛОВКОВ
+
+    @staticmethod
+    def _grow(array: np.ndarray, size: int) -> np.ndarray:
+        if size <= len(array):
+            return array
+        grown = np.zeros(max(size, 2 * len(array), 64), dtype=array.dtype)
+        grown[:len(array)] = array
+        return grown
+
+    def __len__(self) -> int:
+        return len(self._titles)
+
+    def add(self, заголовок: str):
+        """Добавляет заголовок строкой матрицы (повторы игнорируются)"""
+        ключ = (заголовок or '').lower().strip()
+        if not ключ:
+            return
+        with self._lock:
+            if ключ in self._rows:
+                return
+            row = len(self._titles)
+            self._rows[ключ] = row
+            self._titles.append(заголовок)
+            ids = [self._vocab.setdefault(слово, len(self._vocab)) for слово in self._words(ключ)]
+            self._sizes = self._grow(self._sizes, row + 1)
+            self._sizes[row] = len(ids)
+            self._indices = self._grow(self._indices, self._nnz + len(ids))
+            self._row_of = self._grow(self._row_of, self._nnz + len(ids))
+            self._indices[self._nnz:self._nnz + len(ids)] = ids
+            self._row_of[self._nnz:self._nnz + len(ids)] = row
+            self._nnz += len(ids)
+
+    def add_posts(self, посты: List[Dict]):
+        for пост in посты:
+            self.add(пост.get('title', '') or '')
+
+    def scores(self, заголовок: str) -> np.ndarray:
+        """Схожесть заголовка со всеми заголовками индекса (как проверить_схожесть_заголовков)"""
+        with self._lock:
+            n = len(self._titles)
+            result = np.zeros(n, dtype=np.float64)
+            ключ = (заголовок or '').lower().strip()
+            if not ключ or not n:
+                return result
+            слова = [self._vocab[слово] for слово in self._words(ключ) if слово in self._vocab]
+            if слова:
+                вектор = np.zeros(len(self._vocab), dtype=bool)
+                вектор[слова] = True
+                совпало = вектор[self._indices[:self._nnz]]
+                пересечение = np.bincount(self._row_of[:self._nnz][совпало], minlength=n)
+                размер_запроса = len(self._words(ключ))
+                объединение = размер_запроса + self._sizes[:n] - пересечение
+                непустые = (self._sizes[:n] > 0) & (объединение > 0)
+                result[непустые] = пересечение[непустые] / объединение[непустые]
+                усилить = пересечение >= 3
+                result[усилить] = np.minimum(1.0, result[усилить] * 1.3)
+            if ключ in self._rows:
+                result[self._rows[ключ]] = 1.0
+            return result
+
+    def most_similar(self, заголовок: str) -> Optional[Tuple[float, str]]:
+        """(схожесть, заголовок) самого похожего опубликованного заголовка"""
+        scores = self.scores(заголовок)
+        if not len(scores):
+            return None
+        лучший = int(np.argmax(scores))
+        return float(scores[лучший]), self._titles[лучший]
+
+ИНДЕКС_ЗАГОЛОВКОВ = TitleSimilarityIndex()
+
+# Известные персонажи и темы для проверки дубликатов
+ИЗВЕСТНЫЕ_ПЕРСОНАЖИ = {
+    'brandon': ['brandon', 'брендон', 'брэндон', 'willington'],
+    # Можно добавить других персонажей в будущем
+}
+
+# Ключевые фразы, которые указывают на одну и ту же тему
+КЛЮЧЕВЫЕ_ТЕМЫ = {
+    'supercars_systems': ['supercars', 'система', 'системы', 'systems', 'strength'],
+    'система_важнее_мотивации': ['система важнее', 'система против мотивации', 'система > мотивации'],
+    'гибридный_атлет': ['гибридный атлет', 'hybrid athlete', 'гибридн', 'атлет', 'сила', 'выносливость', 'strong', 'conditioned', 'ready'],
+    'питание_до_после_тренировки': ['питание до и после', 'питание до после', 'питание для тренировок', 'что есть до и после', 'питание до тренировки', 'питание после тренировки', 'правильное питание для тренировок'],
+}
+
+# Персонажи и темы ищутся одним автоматом за один проход по тексту
+МАТЧЕР_ТЕМ = KeywordMatcher({**ИЗВЕСТНЫЕ_ПЕРСОНАЖИ, **КЛЮЧЕВЫЕ_ТЕМЫ})
+
 def проверить_полную_уникальность(текст: str, image_url: str, существующие_посты: List[Dict] = None, заголовок: str = None, url_статьи: str = None) -> Tuple[bool, str]:
     """
     Полная проверка уникальности контента (ФОТО+ТЕКСТ+ЗАГОЛОВОК+URL)
@@ -325,64 +646,55 @@ def проверить_полную_уникальность(текст: str, im
         else:
             return False, f"Изображение уже использовалось (хеш: {хеш_изображения[:16]}...)"
     
-    # 4. Проверяем схожесть по заголовку и темам (если передан)
+    # 3.1. То же фото под другим URL (перцептивный хеш, другой размер/CDN/пережатие)
+    if существующие_посты:
+        ИНДЕКС_ИЗОБРАЖЕНИЙ.add_posts(существующие_посты)
+    повтор_фото = ИНДЕКС_ИЗОБРАЖЕНИЙ.find_duplicate_url(image_url)
+    if повтор_фото:
+        расстояние, url_повтора = повтор_фото
+        return False, f"Изображение почти совпадает с опубликованным (расстояние {расстояние}/64: {url_повтора[:80]})"
+    
+    # 4. Почти-дубликат текста (MinHash/LSH по всем опубликованным текстам)
+    if существующие_посты:
+        ИНДЕКС_ТЕКСТОВ.add_posts(существующие_посты)
+    похожий = ИНДЕКС_ТЕКСТОВ.find_near_duplicate(текст)
+    if похожий:
+        схожесть, item = похожий
+        return False, f"Текст почти совпадает с опубликованным (Жаккар ≈ {схожесть:.0%}, заголовок: {item['title'][:50]}...)"
+    
+    # 5. Проверяем схожесть по заголовку и темам (если передан)
     if заголовок and существующие_посты:
         заголовок_нижний = заголовок.lower()
         текст_нижний = текст.lower()
         
-        # Список известных персонажей и тем для проверки дубликатов
-        известные_персонажи = {
-            'brandon': ['brandon', 'брендон', 'брэндон', 'willington'],
-            # Можно добавить других персонажей в будущем
-        }
-        
         # Проверяем, упоминается ли известный персонаж в новом посте
-        упомянутые_персонажи = []
-        for имя_персонажа, варианты_имени in известные_персонажи.items():
-            for вариант in варианты_имени:
-                if вариант in заголовок_нижний or вариант in текст_нижний:
-                    упомянутые_персонажи.append(имя_персонажа)
-                    break
+        найдено = МАТЧЕР_ТЕМ.find(заголовок_нижний, текст_нижний)
+        упомянутые_персонажи = [имя for имя in ИЗВЕСТНЫЕ_ПЕРСОНАЖИ if имя in найдено]
         
-        # Проверяем темы (ключевые фразы, которые указывают на одну и ту же тему)
-        ключевые_темы = {
-            'supercars_systems': ['supercars', 'система', 'системы', 'systems', 'strength'],
-            'система_важнее_мотивации': ['система важнее', 'система против мотивации', 'система > мотивации'],
-            'гибридный_атлет': ['гибридный атлет', 'hybrid athlete', 'гибридн', 'атлет', 'сила', 'выносливость', 'strong', 'conditioned', 'ready'],
-            'питание_до_после_тренировки': ['питание до и после', 'питание до после', 'питание для тренировок', 'что есть до и после', 'питание до тренировки', 'питание после тренировки', 'правильное питание для тренировок'],
-        }
+        # Проверяем темы: минимум 2 ключевых слова темы присутствуют
+        упомянутые_темы = [тема for тема in КЛЮЧЕВЫЕ_ТЕМЫ if len(найдено.get(тема, [])) >= 2]
         
-        упомянутые_темы = []
-        for тема, ключевые_слова_темы in ключевые_темы.items():
-            совпадения = sum(1 for слово in ключевые_слова_темы if слово in заголовок_нижний or слово in текст_нижний)
-            if совпадения >= 2:  # Если минимум 2 ключевых слова темы присутствуют
-                упомянутые_темы.append(тема)
+        # КРИТИЧЕСКАЯ ПРОВЕРКА: Схожесть заголовков — сразу со всеми опубликованными
+        ИНДЕКС_ЗАГОЛОВКОВ.add_posts(существующие_посты)
+        похожий_заголовок = ИНДЕКС_ЗАГОЛОВКОВ.most_similar(заголовок_нижний)
+        if похожий_заголовок and похожий_заголовок[0] > TITLE_SIMILARITY_THRESHOLD:
+            схожесть_заголовков, существующий = похожий_заголовок
+            return False, f"Заголовок слишком похож на существующий (схожесть: {схожесть_заголовков:.1%}, заголовок: {существующий[:50]}...)"
         
         for пост in существующие_посты[:50]:  # Проверяем последние 50 постов
             существующий_заголовок = (пост.get('title', '') or '').lower()
             существующий_текст = (пост.get('text', '') or '').lower()
             
-            # КРИТИЧЕСКАЯ ПРОВЕРКА: Если упоминается тот же персонаж - это дубликат
-            if упомянутые_персонажи:
-                for имя_персонажа, варианты_имени in известные_персонажи.items():
-                    if имя_персонажа in упомянутые_персонажи:
-                        # Проверяем, упоминается ли этот персонаж в существующем посте
-                        for вариант in варианты_имени:
-                            if вариант in существующий_заголовок or вариант in существующий_текст:
-                                return False, f"Статья про того же персонажа уже существует (заголовок: {пост.get('title', '')[:50]}...)"
-            
-            # КРИТИЧЕСКАЯ ПРОВЕРКА: Если та же тема - это дубликат
-            if упомянутые_темы:
-                for тема, ключевые_слова_темы in ключевые_темы.items():
-                    if тема in упомянутые_темы:
-                        совпадения_в_существующем = sum(1 for слово in ключевые_слова_темы if слово in существующий_заголовок or слово in существующий_текст)
-                        if совпадения_в_существующем >= 2:
-                            return False, f"Статья на ту же тему уже существует (заголовок: {пост.get('title', '')[:50]}...)"
-            
-            # КРИТИЧЕСКАЯ ПРОВЕРКА: Схожесть заголовков (косинусное сходство)
-            схожесть_заголовков = проверить_схожесть_заголовков(заголовок_нижний, существующий_заголовок)
-            if схожесть_заголовков > 0.75:  # Порог схожести 75%
-                return False, f"Заголовок слишком похож на существующий (схожесть: {схожесть_заголовков:.1%}, заголовок: {пост.get('title', '')[:50]}...)"
+            if упомянутые_персонажи or упомянутые_темы:
+                найдено_в_существующем = МАТЧЕР_ТЕМ.find(существующий_заголовок, существующий_текст)
+                
+                # КРИТИЧЕСКАЯ ПРОВЕРКА: Если упоминается тот же персонаж - это дубликат
+                if any(имя in найдено_в_существующем for имя in упомянутые_персонажи):
+                    return False, f"Статья про того же персонажа уже существует (заголовок: {пост.get('title', '')[:50]}...)"
+                
+                # КРИТИЧЕСКАЯ ПРОВЕРКА: Если та же тема - это дубликат
+                if any(len(найдено_в_существующем.get(тема, [])) >= 2 for тема in упомянутые_темы):
+                    return False, f"Статья на ту же тему уже существует (заголовок: {пост.get('title', '')[:50]}...)"
             
             # Извлекаем ключевые слова из заголовков
             ключевые_слова_нового = set(заголовок_нижний.split())
@@ -410,7 +722,7 @@ def проверить_полную_уникальность(текст: str, im
                         if минимум_слов > 0 and совпадения_текст / минимум_слов > 0.3:
                             return False, f"Похожая статья уже существует (заголовок: {пост.get('title', '')[:50]}...)"
     
-    # 5. КРИТИЧЕСКАЯ ПРОВЕРКА: Проверяем URL источника статьи (чтобы не использовать один и тот же источник повторно)
+    # 6. КРИТИЧЕСКАЯ ПРОВЕРКА: Проверяем URL источника статьи (чтобы не использовать один и тот же источник повторно)
     # ✅ Для skinnyms.com эта проверка уже выполнена выше, пропускаем
     if url_статьи and 'skinnyms.com' not in url_статьи.lower() and существующие_посты:
         # Нормализуем URL (убираем параметры запроса, trailing slash)
@@ -434,12 +746,20 @@ def проверить_полную_уникальность(текст: str, im
         except Exception as e:
             print(f"⚠️ Ошибка проверки URL источника: {e}")
     
-    # 6. Если есть существующие посты, проверяем семантическую схожесть через DeepSeek
+    # 7. Если есть существующие посты, проверяем семантическую схожесть через DeepSeek
     # ✅ Для skinnyms.com пропускаем семантическую проверку (статьи считаются 100% релевантными)
     if url_статьи and 'skinnyms.com' not in url_статьи.lower() and существующие_посты and DEEPSEEK_API_KEY:
         существующие_тексты = [post.get('text', '') for post in существующие_посты[:20]]  # Проверяем последние 20
         существующие_тексты = [t for t in существующие_тексты if t]  # Убираем пустые
         
+        # DeepSeek нужен только если текст хоть немного пересекается с последними постами
+        if существующие_тексты and NEAR_DUPLICATE_REVIEW_THRESHOLD > 0:
+            подпись = minhash_подпись(текст)
+            макс_схожесть = max(оценить_жаккара(подпись, ИНДЕКС_ТЕКСТОВ.signature(t)) for t in существующие_тексты)
+            if макс_схожесть < NEAR_DUPLICATE_REVIEW_THRESHOLD:
+                print(f"✅ MinHash: схожесть с последними постами {макс_схожесть:.0%}, проверка DeepSeek не нужна")
+                существующие_тексты = []
+        
         if существующие_тексты:
             похож, score = проверить_семантическую_схожесть_через_deepseek(текст, существующие_тексты)
             if похож:
@@ -484,21 +804,19 @@ def сохранить_контент_как_использованный(тек
         print("✅ Источник: skinnyms.com - хеши не сохраняются (изображения могут использоваться повторно)")
         return
     
-    данные = загрузить_хеши_контента()
-    
     # Добавляем хеши
     хеш_текста = создать_хеш_текста(текст)
     хеш_изображения = создать_хеш_изображения(image_url)
     хеш_пары = создать_хеш_пары(текст, image_url)
     
-    if хеш_текста not in данные['text_hashes']:
-        данные['text_hashes'].append(хеш_текста)
-    
-    if хеш_изображения not in данные['image_hashes']:
-        данные['image_hashes'].append(хеш_изображения)
-    
-    if хеш_пары not in данные['content_pairs']:
-        данные['content_pairs'].append(хеш_пары)
-    
-    сохранить_хеши_контента(данные)
+    ИНДЕКС_ХЕШЕЙ.add([
+        ('text', хеш_текста),
+        ('image', хеш_изображения),
+        ('pair', хеш_пары),
+    ])
+    ИНДЕКС_ХЕШЕЙ.flush()
+    ИНДЕКС_ТЕКСТОВ.add(текст)
+    ИНДЕКС_ТЕКСТОВ.flush()
+    ИНДЕКС_ИЗОБРАЖЕНИЙ.add(image_url)
+    ИНДЕКС_ИЗОБРАЖЕНИЙ.flush()
     print(f"✅ Контент сохранён как использованный (хеш пары: {хеш_пары[:16]}...)")
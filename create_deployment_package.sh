@@ -24,6 +24,8 @@ echo "📁 Временная директория: $TEMP_DIR"
 echo "📋 Копирование файлов..."
 cp auto_reply.py "$TEMP_DIR/"
 cp statistics.py "$TEMP_DIR/"
+cp state_db.py "$TEMP_DIR/"
+cp deepseek_client.py "$TEMP_DIR/"
 cp requirements.txt "$TEMP_DIR/"
 
 # Создание ZIP архива
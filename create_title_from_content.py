@@ -5,8 +5,8 @@
 """
 
 import os
-import requests
-import json
+
+import deepseek_client
 
 DEEPSEEK_API_KEY = os.getenv('DEEPSEEK_API_KEY')
 
@@ -21,13 +21,6 @@ def создать_заголовок_на_основе_контента(кон
         return оригинальный_заголовок or 'Статья о фитнесе'
     
     try:
-        url = "https://api.deepseek.com/v1/chat/completions"
-        
-        headers = {
-            "Content-Type": "application/json",
-            "Authorization": f"Bearer {DEEPSEEK_API_KEY}"
-        }
-        
         # Берём первые 2000 символов контента для анализа
         контент_для_анализа = контент[:2000] if len(контент) > 2000 else контент
         
@@ -57,21 +50,17 @@ def создать_заголовок_на_основе_контента(кон
 
 Создай заголовок на русском языке, который точно отражает содержание статьи."""
         
-        data = {
-            "model": "deepseek-chat",
-            "messages": [
+        заголовок = deepseek_client.chat_text(
+            [
                 {"role": "system", "content": system_prompt},
                 {"role": "user", "content": user_prompt}
             ],
-            "temperature": 0.7,
-            "max_tokens": 100
-        }
-        
-        response = requests.post(url, headers=headers, json=data, timeout=30)
-        response.raise_for_status()
-        
-        result = response.json()
-        заголовок = result['choices'][0]['message']['content'].strip()
+            temperature=0.7,
+            max_tokens=100,
+            timeout=30,
+            purpose='title',
+            cache=True  # тот же контент — тот же заголовок, без повторного запроса
+        ).strip()
         
         # Убираем кавычки если есть
         заголовок = заголовок.strip('"\'«»')
@@ -0,0 +1,347 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+    Общий клиент DeepSeek Chat Completions
+
+    Раньше каждый вызов DeepSeek делал отдельный requests.post: новое
+    TLS-соединение на запрос, свой таймаут и свой разбор JSON. Здесь одна
+    requests.Session с пулом keep-alive соединений, семафор на число
+    одновременных запросов и повтор с экспоненциальной задержкой со
+    случайным разбросом (jitter) на 429/5xx и сетевые ошибки (Retry-After
+    учитывается). Ошибки, которые не имеет смысла повторять (400, 401 и т.п.),
+    поднимаются сразу как requests.HTTPError.
+
+    Ответы детерминированных вызовов (temperature <= DEEPSEEK_CACHE_MAX_TEMPERATURE
+    или cache=True) сохраняются в SQLite-кэше на диске по ключу
+    (модель, хеш сообщений, параметры): повторная проверка той же картинки
+    или статьи в следующих запусках не идёт в API. Записи живут
+    DEEPSEEK_CACHE_TTL_DAYS дней, сверх DEEPSEEK_CACHE_MAX_ENTRIES
+    вытесняются давно не использованные (LRU).
+
+    Для каждого вызова учитываются задержка, повторы, попадания в кэш и
+    токены из usage (в том числе prompt_cache_hit/miss) по назначению
+    запроса: metrics() и напечатать_метрики().
+
+    Адрес API переопределяется через DEEPSEEK_API_URL (например, локальный
+    mock-сервер для проверки).
+
+    Автор: VR-Lounge
+"""
+
+import hashlib
+import json
+import os
+import random
+import re
+import sqlite3
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+
+DEEPSEEK_API_KEY = os.getenv('DEEPSEEK_API_KEY')
+DEEPSEEK_API_URL = os.getenv('DEEPSEEK_API_URL', 'https://api.deepseek.com/v1/chat/completions')
+DEEPSEEK_MODEL = os.getenv('DEEPSEEK_MODEL', 'deepseek-chat')
+DEEPSEEK_MAX_CONCURRENCY = int(os.getenv('DEEPSEEK_MAX_CONCURRENCY', '4'))
+DEEPSEEK_MAX_RETRIES = int(os.getenv('DEEPSEEK_MAX_RETRIES', '3'))
+DEEPSEEK_BACKOFF_BASE = float(os.getenv('DEEPSEEK_BACKOFF_BASE', '1.0'))
+DEEPSEEK_BACKOFF_MAX = 30.0
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+# Кэш ответов (пустой DEEPSEEK_CACHE_FILE отключает кэш). В Cloud Function каталог
+# с кодом только для чтения — тогда кэш лежит в /tmp и живёт, пока экземпляр «тёплый»
+DEEPSEEK_CACHE_FILE = os.getenv(
+    'DEEPSEEK_CACHE_FILE',
+    '.deepseek_cache.db' if os.access('.', os.W_OK) else os.path.join(tempfile.gettempdir(), '.deepseek_cache.db')
+)
+DEEPSEEK_CACHE_MAX_TEMPERATURE = float(os.getenv('DEEPSEEK_CACHE_MAX_TEMPERATURE', '0.3'))
+DEEPSEEK_CACHE_TTL_DAYS = float(os.getenv('DEEPSEEK_CACHE_TTL_DAYS', '30'))
+DEEPSEEK_CACHE_MAX_ENTRIES = int(os.getenv('DEEPSEEK_CACHE_MAX_ENTRIES', '5000'))
+
+CACHE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    key TEXT PRIMARY KEY,
+    purpose TEXT,
+    created_at REAL NOT NULL,
+    last_used REAL NOT NULL,
+    result TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_responses_last_used ON responses (last_used);
+"""
+
+# Ответ в JSON-режиме всё равно иногда приходит в markdown-блоке
+JSON_FENCE_RE = re.compile(r'^```(?:json)?\s*|\s*```$', re.IGNORECASE)
+JSON_OBJECT_RE = re.compile(r'\{.*\}', re.DOTALL)
+
+_session: Optional[requests.Session] = None
+_session_lock = threading.Lock()
+_semaphore = threading.BoundedSemaphore(max(1, DEEPSEEK_MAX_CONCURRENCY))
+_metrics_lock = threading.Lock()
+_metrics: Dict[str, Dict] = {}
+_cache_conn: Optional[sqlite3.Connection] = None
+_cache_failed = False
+_cache_lock = threading.Lock()
+
+
+def _get_session() -> requests.Session:
+    """Общая сессия с пулом соединений на DEEPSEEK_MAX_CONCURRENCY."""
+    global _session
+    with _session_lock:
+        if _session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max(1, DEEPSEEK_MAX_CONCURRENCY))
+            session.mount('https://', adapter)
+            session.mount('http://', adapter)
+            _session = session
+        return _session
+
+
+def _cache_db() -> Optional[sqlite3.Connection]:
+    """Соединение с кэшем ответов (None, если кэш отключён или недоступен)."""
+    global _cache_conn, _cache_failed
+    if not DEEPSEEK_CACHE_FILE or _cache_failed:
+        return None
+    if _cache_conn is None:
+        try:
+            conn = sqlite3.connect(str(Path(DEEPSEEK_CACHE_FILE)), check_same_thread=False, timeout=30)
+            # Без WAL: каждая запись сразу в основном файле, который сохраняет шаг cache в Actions
+            conn.executescript(CACHE_SCHEMA)
+            # Просроченные записи удаляем один раз при открытии
+            conn.execute('DELETE FROM responses WHERE created_at < ?', (time.time() - DEEPSEEK_CACHE_TTL_DAYS * 86400,))
+            conn.commit()
+            _cache_conn = conn
+        except sqlite3.Error as e:
+            # Один раз предупреждаем и дальше работаем без кэша
+            _cache_failed = True
+            print(f"⚠️ Кэш ответов DeepSeek недоступен ({DEEPSEEK_CACHE_FILE}), работаю без кэша: {e}")
+            return None
+    return _cache_conn
+
+
+def _cache_key(data: Dict) -> str:
+    """SHA-256 от модели, сообщений и параметров запроса."""
+    return hashlib.sha256(json.dumps(data, ensure_ascii=False, sort_keys=True).encode('utf-8')).hexdigest()
+
+
+def _cache_get(key: str) -> Optional[Dict]:
+    with _cache_lock:
+        conn = _cache_db()
+        if conn is None:
+            return None
+        try:
+            row = conn.execute(
+                'SELECT result FROM responses WHERE key = ? AND created_at >= ?',
+                (key, time.time() - DEEPSEEK_CACHE_TTL_DAYS * 86400)
+            ).fetchone()
+            if row is None:
+                return None
+            conn.execute('UPDATE responses SET last_used = ? WHERE key = ?', (time.time(), key))
+            conn.commit()
+            return json.loads(row[0])
+        except (sqlite3.Error, ValueError) as e:
+            print(f"⚠️ Ошибка чтения кэша DeepSeek: {e}")
+            return None
+
+
+def _cache_put(key: str, purpose: str, result: Dict) -> None:
+    with _cache_lock:
+        conn = _cache_db()
+        if conn is None:
+            return
+        now = time.time()
+        try:
+            conn.execute(
+                'INSERT OR REPLACE INTO responses (key, purpose, created_at, last_used, result) VALUES (?, ?, ?, ?, ?)',
+                (key, purpose, now, now, json.dumps(result, ensure_ascii=False))
+            )
+            # LRU: оставляем DEEPSEEK_CACHE_MAX_ENTRIES последних использованных
+            conn.execute(
+                'DELETE FROM responses WHERE key IN '
+                '(SELECT key FROM responses ORDER BY last_used DESC LIMIT -1 OFFSET ?)',
+                (DEEPSEEK_CACHE_MAX_ENTRIES,)
+            )
+            conn.commit()
+        except sqlite3.Error as e:
+            print(f"⚠️ Ошибка записи кэша DeepSeek: {e}")
+
+
+def _metrics_entry(purpose: str) -> Dict:
+    return _metrics.setdefault(purpose, {
+        'calls': 0, 'errors': 0, 'retries': 0,
+        'cache_hits': 0, 'cache_misses': 0,
+        'latency_total': 0.0, 'latency_max': 0.0,
+        'prompt_tokens': 0, 'completion_tokens': 0,
+        'prompt_cache_hit_tokens': 0, 'prompt_cache_miss_tokens': 0,
+    })
+
+
+def _record_cache(purpose: str, hit: bool) -> None:
+    with _metrics_lock:
+        _metrics_entry(purpose)['cache_hits' if hit else 'cache_misses'] += 1
+
+
+def _record(purpose: str, latency: float, retries: int, usage: Optional[Dict], error: bool) -> None:
+    with _metrics_lock:
+        entry = _metrics_entry(purpose)
+        entry['calls'] += 1
+        entry['errors'] += int(error)
+        entry['retries'] += retries
+        entry['latency_total'] += latency
+        entry['latency_max'] = max(entry['latency_max'], latency)
+        for key in ('prompt_tokens', 'completion_tokens', 'prompt_cache_hit_tokens', 'prompt_cache_miss_tokens'):
+            entry[key] += (usage or {}).get(key) or 0
+
+
+def _retry_delay(attempt: int, response: Optional[requests.Response]) -> float:
+    """Задержка перед повтором: Retry-After или экспонента с полным jitter."""
+    if response is not None:
+        retry_after = response.headers.get('Retry-After', '')
+        if retry_after.isdigit():
+            return min(float(retry_after), DEEPSEEK_BACKOFF_MAX)
+    return random.uniform(0, min(DEEPSEEK_BACKOFF_MAX, DEEPSEEK_BACKOFF_BASE * 2 ** attempt))
+
+
+def chat(
+    messages: List[Dict],
+    *,
+    temperature: float = 0.7,
+    max_tokens: int = 1000,
+    timeout: float = 60,
+    json_mode: bool = False,
+    purpose: str = 'chat',
+    api_key: str = None,
+    cache: Optional[bool] = None,
+    **params
+) -> Dict:
+    """
+    Запрос chat/completions; возвращает разобранный JSON ответа (choices, usage).
+
+    Дополнительные параметры (top_p, frequency_penalty и т.п.) передаются
+    в тело запроса как есть. После исчерпания повторов или на ошибке,
+    которую не повторяют, поднимает исключение requests.
+
+    cache=None кэширует ответ при temperature <= DEEPSEEK_CACHE_MAX_TEMPERATURE;
+    True/False включают или отключают кэш явно. В JSON-режиме в кэш попадает
+    только ответ, который разбирается parse_json.
+    """
+    data = {
+        'model': DEEPSEEK_MODEL,
+        'messages': messages,
+        'temperature': temperature,
+        'max_tokens': max_tokens,
+        **params
+    }
+    if json_mode:
+        data['response_format'] = {'type': 'json_object'}
+    headers = {
+        'Content-Type': 'application/json',
+        'Authorization': f"Bearer {api_key or DEEPSEEK_API_KEY}"
+    }
+
+    if cache is None:
+        cache = temperature <= DEEPSEEK_CACHE_MAX_TEMPERATURE
+    cache_key = _cache_key(data) if cache else None
+    if cache_key:
+        cached = _cache_get(cache_key)
+        if cached is not None and json_mode and not _json_content_ok(cached):
+            # Битый ответ, закэшированный раньше, не отдаём — запрос повторится
+            cached = None
+        _record_cache(purpose, cached is not None)
+        if cached is not None:
+            return cached
+
+    session = _get_session()
+    started = time.monotonic()
+    attempt = 0
+    while True:
+        response = None
+        try:
+            with _semaphore:
+                response = session.post(DEEPSEEK_API_URL, headers=headers, json=data, timeout=timeout)
+            if response.status_code not in RETRY_STATUSES:
+                response.raise_for_status()
+                result = response.json()
+                _record(purpose, time.monotonic() - started, attempt, result.get('usage'), False)
+                if cache_key and (not json_mode or _json_content_ok(result)):
+                    _cache_put(cache_key, purpose, result)
+                return result
+            if attempt >= DEEPSEEK_MAX_RETRIES:
+                response.raise_for_status()
+        except (requests.ConnectionError, requests.Timeout) as e:
+            if attempt >= DEEPSEEK_MAX_RETRIES:
+                _record(purpose, time.monotonic() - started, attempt, None, True)
+                raise
+            print(f"⚠️ DeepSeek ({purpose}): {type(e).__name__}, повтор {attempt + 1}/{DEEPSEEK_MAX_RETRIES}")
+        except Exception:
+            _record(purpose, time.monotonic() - started, attempt, None, True)
+            raise
+        else:
+            print(f"⚠️ DeepSeek ({purpose}): HTTP {response.status_code}, повтор {attempt + 1}/{DEEPSEEK_MAX_RETRIES}")
+        time.sleep(_retry_delay(attempt, response))
+        attempt += 1
+
+
+def chat_text(messages: List[Dict], **kwargs) -> str:
+    """Текст первого варианта ответа (см. chat)."""
+    return chat(messages, **kwargs)['choices'][0]['message']['content']
+
+
+def parse_json(text: str) -> Dict:
+    """
+    Объект JSON из ответа модели: сначала весь ответ (без markdown-блока),
+    затем первый {...} в тексте. ValueError, если JSON не найден.
+    """
+    text = JSON_FENCE_RE.sub('', (text or '').strip())
+    try:
+        return json.loads(text)
+    except ValueError:
+        match = JSON_OBJECT_RE.search(text)
+        if not match:
+            raise ValueError(f"В ответе DeepSeek нет JSON: {text[:100]}")
+        return json.loads(match.group(0))
+
+
+def _json_content_ok(result: Dict) -> bool:
+    """Текст первого варианта ответа разбирается как JSON-объект."""
+    try:
+        return isinstance(parse_json(result['choices'][0]['message']['content']), dict)
+    except (KeyError, IndexError, TypeError, ValueError):
+        return False
+
+
+def chat_json(messages: List[Dict], **kwargs) -> Dict:
+    """Запрос в JSON-режиме и разобранный объект ответа."""
+    return parse_json(chat_text(messages, json_mode=True, **kwargs))
+
+
+def metrics() -> Dict[str, Dict]:
+    """Счётчики по назначению запроса: вызовы, ошибки, повторы, попадания в кэш, задержка, токены."""
+    with _metrics_lock:
+        return {purpose: dict(entry) for purpose, entry in _metrics.items()}
+
+
+def напечатать_метрики() -> None:
+    """Печатает сводку вызовов DeepSeek за запуск (ничего, если вызовов не было)."""
+    данные = metrics()
+    if not данные:
+        return
+    print("📊 DeepSeek за запуск:")
+    for purpose, entry in sorted(данные.items()):
+        средняя = entry['latency_total'] / entry['calls'] if entry['calls'] else 0.0
+        строка = (f"   {purpose}: {entry['calls']} вызовов (ошибок {entry['errors']}, повторов {entry['retries']}), "
+                  f"{средняя:.1f} с в среднем / {entry['latency_max']:.1f} с макс., "
+                  f"токены {entry['prompt_tokens']} + {entry['completion_tokens']} "
+                  f"(prompt cache hit {entry['prompt_cache_hit_tokens']})")
+        обращений = entry['cache_hits'] + entry['cache_misses']
+        if обращений:
+            строка += f", кэш ответов {entry['cache_hits']}/{обращений} ({entry['cache_hits'] / обращений:.0%})"
+        print(строка)
+    попаданий = sum(entry['cache_hits'] for entry in данные.values())
+    обращений = попаданий + sum(entry['cache_misses'] for entry in данные.values())
+    if обращений:
+        print(f"   💾 Кэш ответов: {попаданий}/{обращений} ({попаданий / обращений:.0%}) без запроса к API")
@@ -31,6 +31,8 @@ echo "📦 Создание архива с кодом..."
 zip -r telegram-auto-reply.zip \
     auto_reply.py \
     statistics.py \
+    state_db.py \
+    deepseek_client.py \
     requirements.txt \
     -x "*.pyc" "__pycache__/*" "*.log" ".env" \
     "*.json" "*.md" "*.sh" ".git/*"
@@ -77,7 +79,9 @@ yc serverless function version create \
     SMTP_SERVER="$SMTP_SERVER",\
     SMTP_PORT="$SMTP_PORT",\
     SMTP_USER="$SMTP_USER",\
-    SMTP_PASSWORD="$SMTP_PASSWORD"
+    SMTP_PASSWORD="$SMTP_PASSWORD",\
+    STATE_DB_FILE="/tmp/.autopost_state.db",\
+    DEEPSEEK_CACHE_FILE="/tmp/.deepseek_cache.db"
 
 echo ""
 echo "✅ Функция создана и загружена!"
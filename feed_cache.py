@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+    Кэш RSS фидов для условных запросов (ETag / Last-Modified)
+
+    Для каждого фида хранит валидаторы последнего ответа и уже распарсенный
+    список статей. Следующий запуск отправляет If-None-Match/If-Modified-Since,
+    и на 304 статьи берутся из кэша без скачивания и разбора XML.
+
+    Автор: VR-Lounge
+"""
+
+import json
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+
+FEED_CACHE_FILE = Path('.rss_feed_cache.json')
+
+_lock = threading.Lock()
+_cache: Optional[Dict] = None
+_dirty = False
+
+
+def _load() -> Dict:
+    global _cache
+    if _cache is None:
+        _cache = {}
+        if FEED_CACHE_FILE.exists():
+            try:
+                with open(FEED_CACHE_FILE, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                _cache = data.get('feeds', {})
+            except Exception:
+                _cache = {}
+    return _cache
+
+
+def conditional_headers(rss_url: str) -> Dict[str, str]:
+    """Возвращает заголовки условного запроса для фида (пусто, если кэша нет)."""
+    with _lock:
+        entry = _load().get(rss_url)
+    if not entry:
+        return {}
+    headers = {}
+    if entry.get('etag'):
+        headers['If-None-Match'] = entry['etag']
+    if entry.get('last_modified'):
+        headers['If-Modified-Since'] = entry['last_modified']
+    return headers
+
+
+def cached_articles(rss_url: str) -> List[Dict]:
+    """Возвращает сохранённый список статей фида (для ответа 304)."""
+    with _lock:
+        entry = _load().get(rss_url) or {}
+    return [dict(article) for article in entry.get('articles', [])]
+
+
+def store(rss_url: str, etag: Optional[str], last_modified: Optional[str], articles: List[Dict]) -> None:
+    """Запоминает валидаторы и статьи фида. Без валидаторов кэшировать нечего."""
+    global _dirty
+    if not etag and not last_modified:
+        return
+    with _lock:
+        _load()[rss_url] = {
+            'etag': etag,
+            'last_modified': last_modified,
+            'articles': articles,
+            'checked_at': datetime.now().isoformat()
+        }
+        _dirty = True
+
+
+def save_feed_cache() -> None:
+    """Сохраняет кэш на диск одним файлом (вызывается после сбора всех фидов)."""
+    global _dirty
+    with _lock:
+        if not _dirty or _cache is None:
+            return
+        data = {'version': 1, 'updated_at': datetime.now().isoformat(), 'feeds': _cache}
+        try:
+            with open(FEED_CACHE_FILE, 'w', encoding='utf-8') as f:
+                json.dump(data, f, ensure_ascii=False)
+            _dirty = False
+        except Exception as e:
+            print(f"⚠️ Ошибка сохранения кэша RSS фидов: {e}")
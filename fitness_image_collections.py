@@ -16,6 +16,8 @@ from pathlib import Path
 from typing import List, Dict, Optional, Tuple
 from urllib.parse import urlparse
 
+from image_phash import ИНДЕКС_ИЗОБРАЖЕНИЙ
+
 # Определяем пути
 SCRIPT_DIR = Path(__file__).parent.absolute()
 if (SCRIPT_DIR.parent / 'public_html').exists():
@@ -33,6 +35,8 @@ MAN_MANIFEST = REPO_ROOT / 'public_html' / 'images' / 'Fitness | Man' / 'manifes
 
 # Базовый URL для изображений на Яндекс Cloud
 BASE_IMAGE_URL = "https://www.tabatatimer.ru/images"
+# Сколько случайных кандидатов проверять на повтор по перцептивному хешу
+COLLECTION_PHASH_CHECKS = int(os.getenv('COLLECTION_PHASH_CHECKS', '10'))
 
 def загрузить_manifest(путь_к_manifest: Path) -> Optional[Dict]:
     """
@@ -153,8 +157,20 @@ def получить_уникальное_изображение_из_колле
         # Если все использованы, возвращаем случайное (но это не идеально)
         return random.choice(все_изображения) if все_изображения else None
     
-    # Выбираем случайное изображение из доступных для разнообразия
-    выбранное = random.choice(доступные)
+    # Выбираем случайное изображение из доступных для разнообразия,
+    # пропуская фото, уже опубликованные под другим URL (перцептивный хеш)
+    ИНДЕКС_ИЗОБРАЖЕНИЙ.add_urls(использованные_urls, local_only=True)
+    random.shuffle(доступные)
+    выбранное = None
+    for img in доступные[:COLLECTION_PHASH_CHECKS]:
+        повтор = ИНДЕКС_ИЗОБРАЖЕНИЙ.find_duplicate_url(img['url'])
+        if not повтор:
+            выбранное = img
+            break
+        print(f"⚠️ Фото {img.get('file', '')} уже опубликовано под другим URL (расстояние {повтор[0]}/64)")
+    if выбранное is None:
+        # Непроверенный кандидат лучше заведомого повтора
+        выбранное = доступные[COLLECTION_PHASH_CHECKS] if len(доступные) > COLLECTION_PHASH_CHECKS else доступные[0]
     
     print(f"✅ Выбрано изображение из коллекции {коллекция}: {выбранное.get('file', '')}")
     return выбранное
@@ -9,12 +9,22 @@
     Автор: VR-Lounge
 """
 
+import hashlib
+import inspect
 import json
+import os
 import re
+import sys
 import html
 from pathlib import Path
+from string import Template
 from datetime import datetime
-from urllib.parse import quote, unquote
+from urllib.parse import quote, unquote, urljoin
+from xml.sax.saxutils import escape as xml_escape, unescape as xml_unescape
+from concurrent.futures import ProcessPoolExecutor
+
+import blog_feed
+import image_derivatives
 
 # Импортируем функцию загрузки изображений
 try:
@@ -57,6 +67,23 @@ else:
 BLOG_POSTS_FILE = REPO_ROOT / 'public_html' / 'blog-posts.json'
 BLOG_POSTS_DIR = REPO_ROOT / 'public_html' / 'blog'
 BLOG_POSTS_DIR.mkdir(parents=True, exist_ok=True)
+# Манифест сборки: post_id -> хеш поста и slug страницы (для инкрементальной генерации)
+BUILD_MANIFEST_FILE = REPO_ROOT / 'public_html' / '.blog-build-manifest.json'
+# Кэш выбора главного изображения рецептов: post_id -> хеш images, hero и его оценка
+HERO_CACHE_FILE = REPO_ROOT / 'public_html' / '.hero-image-cache.json'
+# Изображения блога и манифест их WebP-вариантов для srcset
+BLOG_IMAGES_DIR = REPO_ROOT / 'public_html' / 'images' / 'blog'
+IMAGE_DERIVATIVES_FILE = REPO_ROOT / 'public_html' / '.image-derivatives.json'
+HERO_IMAGE_SIZES = '(max-width: 900px) 100vw, 900px'
+GALLERY_THUMB_SIZES = '120px'
+# Число процессов для отрисовки страниц (--jobs N)
+BLOG_RENDER_JOBS = int(os.getenv('BLOG_RENDER_JOBS', '1'))
+# sitemap.xml сайта; при превышении лимитов протокола пишутся части sitemap-N.xml и индекс
+SITEMAP_FILE = REPO_ROOT / 'public_html' / 'sitemap.xml'
+SITEMAP_MAX_URLS = int(os.getenv('SITEMAP_MAX_URLS', '50000'))
+SITEMAP_MAX_BYTES = 50 * 1024 * 1024
+SITEMAP_MAX_IMAGES = 1000  # изображений на один URL (лимит Google)
+SITE_URL = 'https://www.tabatatimer.ru'
 
 # Мотивационные фразы для заголовка галереи (вместо «Иллюстрации из статьи»).
 # Контекст по тегам: Девушкам / Мужчинам / Питание — как на главной (girls-inspiration, men-motivation, nutrition-slider).
@@ -180,6 +207,120 @@ def выбрать_главное_изображение_для_рецепта(
     return best
 
 
+def это_пост_про_еду(пост):
+    """
+    Рецепт: из пайплайна рецептов или с явным тегом «рецепт».
+    
+    Не используем «питание»/«диеты» — иначе статьи WH про режим питания при тренировках
+    ошибочно получают логику «фото блюда» при том, что hero — сток Fitness | Woman.
+    """
+    источник = (пост.get('source') or '').lower()
+    теги_lower = [str(t).strip().lower() for t in (пост.get('tags', []) or [])]
+    return (
+        источник in ('recipes', 'skinnyms_recipes')
+        or any(t in теги_lower for t in ('рецепт', 'рецепты'))
+    )
+
+
+# post_id -> {'images': хеш images после выбора, 'hero': URL, 'score': оценка}
+КЭШ_ГЛАВНЫХ_ИЗОБРАЖЕНИЙ = {}
+
+
+def версия_выбора_hero():
+    """Хеш кода и словарей оценки hero: при их изменении кэш выбора сбрасывается"""
+    части = [repr(FITNESS_IMAGE_KEYWORDS), FOOD_FILENAME_HINTS.pattern]
+    for функция in (url_из_стоковой_фитнес_коллекции, изображение_похоже_на_фитнес,
+                    _score_recipe_image_for_hero, выбрать_главное_изображение_для_рецепта):
+        try:
+            части.append(inspect.getsource(функция))
+        except (OSError, TypeError):
+            части.append(функция.__name__)
+    return hashlib.sha256('\n'.join(части).encode('utf-8')).hexdigest()[:16]
+
+
+def хеш_изображений_поста(пост):
+    """Хеш входа и результата выбора hero: порядок images, url/alt/title/is_main и post.image"""
+    данные = [пост.get('image')] + [
+        [im.get('url'), im.get('alt'), im.get('title'), im.get('is_main')] if isinstance(im, dict) else im
+        for im in пост.get('images') or []
+    ]
+    return hashlib.sha256(json.dumps(данные, ensure_ascii=False).encode('utf-8')).hexdigest()[:16]
+
+
+def загрузить_кэш_главных_изображений():
+    КЭШ_ГЛАВНЫХ_ИЗОБРАЖЕНИЙ.clear()
+    if not HERO_CACHE_FILE.exists():
+        return
+    try:
+        with open(HERO_CACHE_FILE, 'r', encoding='utf-8') as f:
+            данные = json.load(f)
+        if данные.get('scorer') == версия_выбора_hero():
+            КЭШ_ГЛАВНЫХ_ИЗОБРАЖЕНИЙ.update(данные.get('posts', {}))
+    except Exception as e:
+        print(f"⚠️ Не удалось прочитать кэш главных изображений: {e}")
+
+
+def сохранить_кэш_главных_изображений(post_ids):
+    """Сохраняет кэш только для существующих постов; файл не трогаем, если ничего не изменилось"""
+    записи = {pid: КЭШ_ГЛАВНЫХ_ИЗОБРАЖЕНИЙ[pid] for pid in sorted(post_ids) if pid in КЭШ_ГЛАВНЫХ_ИЗОБРАЖЕНИЙ}
+    данные = {'version': 1, 'scorer': версия_выбора_hero(), 'posts': записи}
+    try:
+        if HERO_CACHE_FILE.exists():
+            with open(HERO_CACHE_FILE, 'r', encoding='utf-8') as f:
+                if json.load(f) == данные:
+                    return
+        with open(HERO_CACHE_FILE, 'w', encoding='utf-8') as f:
+            json.dump(данные, f, ensure_ascii=False, indent=2)
+    except Exception as e:
+        print(f"⚠️ Не удалось сохранить кэш главных изображений: {e}")
+
+
+def главное_изображение_рецепта(пост):
+    """
+    Hero рецепта с кэшем решения по (post_id, хеш images, версия оценки).
+    
+    При промахе оценивает изображения и синхронизирует порядок images[], is_main
+    и post.image с выбранным hero (превью + модалка на blog.html). '_blog_json_dirty'
+    ставится, только если решение действительно что-то поменяло в посте.
+    """
+    imgs = пост.get('images')
+    if not imgs or not isinstance(imgs, list):
+        return None
+    post_id = пост.get('id')
+    запись = КЭШ_ГЛАВНЫХ_ИЗОБРАЖЕНИЙ.get(post_id) if post_id else None
+    if запись and запись.get('images') == хеш_изображений_поста(пост):
+        hero = next((im for im in imgs if isinstance(im, dict) and im.get('url') == запись.get('hero')), None)
+        if hero is not None:
+            return hero
+    
+    hero = выбрать_главное_изображение_для_рецепта(imgs)
+    
+    def _norm_u(u):
+        return (u or '').split('?')[0].rstrip('/').lower()
+    
+    было = хеш_изображений_поста(пост)
+    gurl = _norm_u(hero.get('url'))
+    ix = next((i for i, x in enumerate(imgs) if _norm_u(x.get('url')) == gurl), None)
+    if ix is not None and ix > 0:
+        row = imgs.pop(ix)
+        imgs.insert(0, row)
+    for i, im in enumerate(imgs):
+        im['is_main'] = (i == 0)
+    first_u = imgs[0].get('url')
+    if first_u and _norm_u(пост.get('image')) != _norm_u(first_u):
+        пост['image'] = first_u
+    стало = хеш_изображений_поста(пост)
+    if стало != было:
+        пост['_blog_json_dirty'] = True
+    if post_id:
+        КЭШ_ГЛАВНЫХ_ИЗОБРАЖЕНИЙ[post_id] = {
+            'images': стало,
+            'hero': hero.get('url'),
+            'score': list(_score_recipe_image_for_hero(hero))
+        }
+    return hero
+
+
 def _без_упоминания_источника(текст):
     """Убирает из строки упоминания внутреннего источника (не для публичного контента)."""
     if not текст or not isinstance(текст, str):
@@ -349,6 +490,157 @@ def создать_уникальную_ссылку_на_таймер(текс
     
     return текст_ссылки, title_ссылки
 
+# ---------------------------------------------------------------------------
+# Шаблоны страницы: статичный текст разбирается один раз за процесс
+# ---------------------------------------------------------------------------
+
+def скомпилировать_шаблон(шаблон):
+    """
+    Разбирает шаблон в синтаксисе string.Template ($name / ${name} / $$) один раз.
+    
+    Returns:
+        (статичные куски, имена подстановок); кусков на один больше, чем имён
+    """
+    куски, имена = [], []
+    начало = 0
+    текущий = []
+    for match in Template.pattern.finditer(шаблон):
+        текущий.append(шаблон[начало:match.start()])
+        начало = match.end()
+        if match.group('escaped') is not None:
+            текущий.append('$')
+            continue
+        имя = match.group('named') or match.group('braced')
+        if имя is None:
+            raise ValueError(f"Некорректная подстановка в шаблоне на позиции {match.start()}")
+        куски.append(''.join(текущий))
+        имена.append(имя)
+        текущий = []
+    текущий.append(шаблон[начало:])
+    куски.append(''.join(текущий))
+    return tuple(куски), tuple(имена)
+
+def отрисовать_шаблон(шаблон, **значения):
+    """Собирает страницу из скомпилированного шаблона одним join (без повторного разбора)"""
+    куски, имена = шаблон
+    части = [куски[0]]
+    for имя, кусок in zip(имена, куски[1:]):
+        части.append(str(значения[имя]))
+        части.append(кусок)
+    return ''.join(части)
+
+# Галерея: шапка слайдера, миниатюра (повторяется) и скрипт
+GALLERY_HEAD_TEMPLATE = скомпилировать_шаблон('''
+    <div class="blog-post-gallery">
+        <h3>${phrase}</h3>
+        <div class="blog-gallery-slider" id="${gallery_id}">
+            <div class="blog-gallery-main">
+                <img id="${gallery_id}-main" src="" alt="" class="blog-gallery-main-image">
+                <button class="blog-gallery-prev" onclick="galleryPrev('${gallery_id}')">‹</button>
+                <button class="blog-gallery-next" onclick="galleryNext('${gallery_id}')">›</button>
+            </div>
+            <div class="blog-gallery-thumbnails">
+''')
+
+GALLERY_THUMB_TEMPLATE = скомпилировать_шаблон('''
+                <div class="blog-gallery-thumb ${active_class}" onclick="galleryShow('${gallery_id}', ${idx})">
+                    <img src="${img_url}"${srcset_attr} alt="${alt}" title="${title}" loading="lazy" class="blog-gallery-thumb-image">
+                </div>
+''')
+
+GALLERY_SCRIPT_TEMPLATE = скомпилировать_шаблон('''
+            </div>
+        </div>
+    </div>
+    
+    <script>
+        // Инициализация галереи
+        (function() {
+            const galleryId = '${gallery_id}';
+            const images = ${images_json};
+            
+            // Сохраняем данные галереи в глобальный объект
+            if (!window.blogGalleries) {
+                window.blogGalleries = {};
+            }
+            window.blogGalleries[galleryId] = images;
+            
+            if (images.length > 0) {
+                // Показываем первое изображение
+                galleryShow(galleryId, 0);
+            }
+        })();
+        
+        function galleryShow(galleryId, index) {
+            const gallery = document.getElementById(galleryId);
+            if (!gallery || !window.blogGalleries || !window.blogGalleries[galleryId]) return;
+            
+            const images = window.blogGalleries[galleryId];
+            
+            if (index < 0 || index >= images.length) return;
+            
+            const mainImg = document.getElementById(galleryId + '-main');
+            const thumbs = gallery.querySelectorAll('.blog-gallery-thumb');
+            
+            if (mainImg && images[index]) {
+                // srcset задаём до src, чтобы браузер не скачивал оригинал зря
+                if (images[index].srcset) {
+                    mainImg.sizes = '(max-width: 900px) 100vw, 900px';
+                    mainImg.srcset = images[index].srcset;
+                } else {
+                    mainImg.removeAttribute('srcset');
+                }
+                mainImg.src = images[index].url;
+                mainImg.alt = images[index].alt || '';
+                mainImg.title = images[index].title || '';
+            }
+            
+            // Обновляем активный класс
+            thumbs.forEach((thumb, i) => {
+                if (i === index) {
+                    thumb.classList.add('active');
+                } else {
+                    thumb.classList.remove('active');
+                }
+            });
+        }
+        
+        function galleryNext(galleryId) {
+            const gallery = document.getElementById(galleryId);
+            if (!gallery || !window.blogGalleries || !window.blogGalleries[galleryId]) return;
+            const active = gallery.querySelector('.blog-gallery-thumb.active');
+            if (!active) {
+                galleryShow(galleryId, 0);
+                return;
+            }
+            const thumbs = Array.from(gallery.querySelectorAll('.blog-gallery-thumb'));
+            const currentIndex = thumbs.indexOf(active);
+            const nextIndex = (currentIndex + 1) % thumbs.length;
+            galleryShow(galleryId, nextIndex);
+        }
+        
+        function galleryPrev(galleryId) {
+            const gallery = document.getElementById(galleryId);
+            if (!gallery || !window.blogGalleries || !window.blogGalleries[galleryId]) return;
+            const active = gallery.querySelector('.blog-gallery-thumb.active');
+            if (!active) {
+                const thumbs = gallery.querySelectorAll('.blog-gallery-thumb');
+                galleryShow(galleryId, thumbs.length - 1);
+                return;
+            }
+            const thumbs = Array.from(gallery.querySelectorAll('.blog-gallery-thumb'));
+            const currentIndex = thumbs.indexOf(active);
+            const prevIndex = (currentIndex - 1 + thumbs.length) % thumbs.length;
+            galleryShow(galleryId, prevIndex);
+        }
+    </script>
+''')
+
+def атрибуты_srcset(url, sizes):
+    """Атрибуты srcset/sizes из WebP-вариантов изображения или пустая строка, если вариантов нет"""
+    варианты = image_derivatives.srcset(url, IMAGE_DERIVATIVES_FILE)
+    return f' srcset="{варианты}" sizes="{sizes}"' if варианты else ''
+
 def создать_галерею_изображений(изображения, заголовок, теги):
     """
     Создаёт галерею-слайдер с изображениями статьи, БЕЗ дублирования первого.
@@ -370,17 +662,7 @@ def создать_галерею_изображений(изображения,
     gallery_id = f"gallery-{abs(hash(заголовок)) % 10000}"
     # Заголовок галереи — мотивационная фраза по контексту (девушкам / мужчинам / питание)
     фраза = выбрать_мотивационную_фразу(теги, заголовок)
-    галерея_html = f'''
-    <div class="blog-post-gallery">
-        <h3>{фраза}</h3>
-        <div class="blog-gallery-slider" id="{gallery_id}">
-            <div class="blog-gallery-main">
-                <img id="{gallery_id}-main" src="" alt="" class="blog-gallery-main-image">
-                <button class="blog-gallery-prev" onclick="galleryPrev('{gallery_id}')">‹</button>
-                <button class="blog-gallery-next" onclick="galleryNext('{gallery_id}')">›</button>
-            </div>
-            <div class="blog-gallery-thumbnails">
-'''
+    части = [отрисовать_шаблон(GALLERY_HEAD_TEMPLATE, phrase=фраза, gallery_id=gallery_id)]
     
     for idx, img_dict in enumerate(все_изображения_для_галереи):
         img_url = img_dict.get('url', '')
@@ -404,11 +686,11 @@ def создать_галерею_изображений(изображения,
         # Первое изображение в слайдере показываем сразу
         active_class = 'active' if idx == 0 else ''
         
-        галерея_html += f'''
-                <div class="blog-gallery-thumb {active_class}" onclick="galleryShow('{gallery_id}', {idx})">
-                    <img src="{img_url}" alt="{alt}" title="{title}" loading="lazy" class="blog-gallery-thumb-image">
-                </div>
-'''
+        части.append(отрисовать_шаблон(
+            GALLERY_THUMB_TEMPLATE,
+            active_class=active_class, gallery_id=gallery_id, idx=idx, img_url=img_url,
+            srcset_attr=атрибуты_srcset(img_url, GALLERY_THUMB_SIZES), alt=alt, title=title
+        ))
     
     # Подготавливаем данные для JavaScript
     images_data = []
@@ -420,95 +702,20 @@ def создать_галерею_изображений(изображения,
             # Экранируем для JavaScript
             img_alt = img_alt.replace('\\', '\\\\').replace('"', '\\"').replace("'", "\\'")
             img_title = img_title.replace('\\', '\\\\').replace('"', '\\"').replace("'", "\\'")
-            images_data.append({
+            данные_изображения = {
                 'url': img_url,
                 'alt': img_alt,
                 'title': img_title
-            })
+            }
+            варианты = image_derivatives.srcset(img_url, IMAGE_DERIVATIVES_FILE)
+            if варианты:
+                данные_изображения['srcset'] = варианты
+            images_data.append(данные_изображения)
     
     images_json = json.dumps(images_data, ensure_ascii=False)
     
-    галерея_html += f'''
-            </div>
-        </div>
-    </div>
-    
-    <script>
-        // Инициализация галереи
-        (function() {{
-            const galleryId = '{gallery_id}';
-            const images = {images_json};
-            
-            // Сохраняем данные галереи в глобальный объект
-            if (!window.blogGalleries) {{
-                window.blogGalleries = {{}};
-            }}
-            window.blogGalleries[galleryId] = images;
-            
-            if (images.length > 0) {{
-                // Показываем первое изображение
-                galleryShow(galleryId, 0);
-            }}
-        }})();
-        
-        function galleryShow(galleryId, index) {{
-            const gallery = document.getElementById(galleryId);
-            if (!gallery || !window.blogGalleries || !window.blogGalleries[galleryId]) return;
-            
-            const images = window.blogGalleries[galleryId];
-            
-            if (index < 0 || index >= images.length) return;
-            
-            const mainImg = document.getElementById(galleryId + '-main');
-            const thumbs = gallery.querySelectorAll('.blog-gallery-thumb');
-            
-            if (mainImg && images[index]) {{
-                mainImg.src = images[index].url;
-                mainImg.alt = images[index].alt || '';
-                mainImg.title = images[index].title || '';
-            }}
-            
-            // Обновляем активный класс
-            thumbs.forEach((thumb, i) => {{
-                if (i === index) {{
-                    thumb.classList.add('active');
-                }} else {{
-                    thumb.classList.remove('active');
-                }}
-            }});
-        }}
-        
-        function galleryNext(galleryId) {{
-            const gallery = document.getElementById(galleryId);
-            if (!gallery || !window.blogGalleries || !window.blogGalleries[galleryId]) return;
-            const active = gallery.querySelector('.blog-gallery-thumb.active');
-            if (!active) {{
-                galleryShow(galleryId, 0);
-                return;
-            }}
-            const thumbs = Array.from(gallery.querySelectorAll('.blog-gallery-thumb'));
-            const currentIndex = thumbs.indexOf(active);
-            const nextIndex = (currentIndex + 1) % thumbs.length;
-            galleryShow(galleryId, nextIndex);
-        }}
-        
-        function galleryPrev(galleryId) {{
-            const gallery = document.getElementById(galleryId);
-            if (!gallery || !window.blogGalleries || !window.blogGalleries[galleryId]) return;
-            const active = gallery.querySelector('.blog-gallery-thumb.active');
-            if (!active) {{
-                const thumbs = gallery.querySelectorAll('.blog-gallery-thumb');
-                galleryShow(galleryId, thumbs.length - 1);
-                return;
-            }}
-            const thumbs = Array.from(gallery.querySelectorAll('.blog-gallery-thumb'));
-            const currentIndex = thumbs.indexOf(active);
-            const prevIndex = (currentIndex - 1 + thumbs.length) % thumbs.length;
-            galleryShow(galleryId, prevIndex);
-        }}
-    </script>
-'''
-    return галерея_html
+    части.append(отрисовать_шаблон(GALLERY_SCRIPT_TEMPLATE, gallery_id=gallery_id, images_json=images_json))
+    return ''.join(части)
 
 def создать_заключительный_блок_про_таймер(текст, теги):
     """Создаёт заключительный блок про применение интервального таймера"""
@@ -559,275 +766,221 @@ def создать_заключительный_блок_про_таймер(т
     '''
     return блок
 
+# ---------------------------------------------------------------------------
+# Правила форматирования текста поста (компилируются один раз за процесс)
+# ---------------------------------------------------------------------------
+
+# Имена и их краткие пояснения: (имя, имя с уже добавленным пояснением, замена)
+ПОЯСНЕНИЯ_ИМЁН = [
+    (re.compile(r'\b' + имя + r'\b', re.IGNORECASE),
+     re.compile(имя + r'\s*\([^)]+\)', re.IGNORECASE),
+     замена)
+    for имя, замена in (
+        ('Брэндон', 'Брэндон (американский фитнес-тренер)'),
+        ('Brandon', 'Brandon (американский фитнес-тренер)'),
+    )
+]
+
+# Служебные строки со ссылкой на таймер, которые убираются из текста
+SERVICE_LINES_RE = re.compile(r'^.*?tabatatimer\.ru.*?\n|^.*?Запусти таймер.*?\n', re.IGNORECASE | re.MULTILINE)
+EMOJI_RE = re.compile(r'[🔥💪🧠⏰💥🚫✅❌⚠️📝📸🖼️🔍📥☁️]')
+
+# Разметка начала строки; порядок альтернатив = порядок проверок при разборе
+LINE_MARKUP_RE = re.compile(r'(?P<heading>##)|(?P<hr>---)|(?P<ordered>\d+[\.\)]\s+)|(?P<bullet>[\*\-]\s+)')
+LIST_ITEM_RE = re.compile(r'\d+[\.\)]\s+|[\*\-]\s+')
+HEADING_PREFIX_RE = re.compile(r'^#+\s*')
+DAY_HEADING_RE = re.compile(r'^День\s+\d+:', re.IGNORECASE)
+
+MARKDOWN_BOLD_RE = re.compile(r'\*\*([^*]+)\*\*')
+MARKDOWN_ITALIC_RE = re.compile(r'\*([^*]+)\*')
+MARKDOWN_LINK_RE = re.compile(r'\[([^\]]+)\]\(([^)]+)\)')
+MARKDOWN_LINK_HTML = r'<a href="\2" target="_blank" rel="noopener noreferrer">\1</a>'
+CAPS_FRAGMENT_RE = re.compile(r'\b[A-ZА-ЯЁ]{2,}[A-ZА-ЯЁ\s]{0,30}\b')
+SENTENCE_END_RE = re.compile(r'[.!?]\s+')
+SENTENCE_SPLIT_RE = re.compile(r'([.!?]\s+)')
+HTML_TAG_RE = re.compile(r'<[^>]+>')
+HTML_TAG_SPLIT_RE = re.compile(r'(<[^>]+>)')
+
+IMG_TAG_RE = re.compile(r'<img[^>]*>', re.IGNORECASE)
+IMG_ALT_RE = re.compile(r'alt=["\'][^"\']*["\']')
+IMG_TITLE_RE = re.compile(r'title=["\'][^"\']*["\']')
+
+# Названия упражнений для распознавания пунктов списка — одна альтернация вместо цикла
+EXERCISE_NAMES = (
+    'приседания', 'выпады', 'прыжки', 'подъёмы', 'отжимания', 'скручивания',
+    'планка', 'бёрпи', 'альпинист', 'велосипед', 'мостик', 'махи', 'жим',
+    'подтягивания', 'тяга', 'становая', 'бицепс', 'трицепс', 'плечи'
+)
+EXERCISE_NAMES_RE = re.compile('|'.join(map(re.escape, EXERCISE_NAMES)))
+
+
 def добавить_пояснения_для_имён(текст):
     """Добавляет краткие пояснения в скобках для имён и персоналий"""
     if not текст:
         return текст
     
-    # Словарь имён и их пояснений
-    имена_пояснения = {
-        r'\bБрэндон\b': 'Брэндон (американский фитнес-тренер)',
-        r'\bBrandon\b': 'Brandon (американский фитнес-тренер)',
-    }
-    
     # Заменяем имена, но только если после них нет пояснения в скобках
-    for паттерн, замена in имена_пояснения.items():
-        # Проверяем, нет ли уже пояснения после имени (в скобках)
-        паттерн_с_пояснением = паттерн.replace(r'\b', '') + r'\s*\([^)]+\)'
-        if not re.search(паттерн_с_пояснением, текст, re.IGNORECASE):
-            # Заменяем имя на имя с пояснением
-            текст = re.sub(паттерн, замена, текст, flags=re.IGNORECASE)
+    for паттерн, паттерн_с_пояснением, замена in ПОЯСНЕНИЯ_ИМЁН:
+        if not паттерн_с_пояснением.search(текст):
+            текст = паттерн.sub(замена, текст)
     
     return текст
 
-def форматировать_текст_для_html(текст, заголовок, теги):
-    """
-    Форматирует текст для HTML с чистой, читабельной структурой:
-    - Убирает капс и звёздочки
-    - Разбивает длинные абзацы на короткие (2-4 предложения)
-    - Правильно оформляет списки упражнений
-    - Использует семантическую структуру с <section>
-    """
-    if not текст:
-        return ''
+def нормализовать_капс(капс_текст):
+    """Первая буква заглавная, остальные строчные"""
+    return капс_текст[0].upper() + капс_текст[1:].lower() if len(капс_текст) > 1 else капс_текст
+
+def заменить_капс_фрагмент(match):
+    """Длинный капс внутри строки нормализуем, короткий делаем <strong>"""
+    капс_текст = match.group(0)
+    нормализованный = нормализовать_капс(капс_текст)
+    if len(капс_текст) > 30:
+        return нормализованный
+    return f'<strong>{нормализованный}</strong>'
+
+def убрать_капс_и_форматировать(текст_строки):
+    """Убирает капс, звёздочки, форматирует текст"""
+    # Убираем markdown звёздочки
+    текст_строки = MARKDOWN_BOLD_RE.sub(r'\1', текст_строки)
+    текст_строки = MARKDOWN_ITALIC_RE.sub(r'\1', текст_строки)
+    
+    if текст_строки.isupper():
+        if len(текст_строки) > 20:
+            # Длинный капс-абзац: разбиваем на предложения и делаем нормальный текст
+            нормализованные = []
+            for предл in SENTENCE_END_RE.split(текст_строки):
+                предл = предл.strip()
+                if предл:
+                    нормализованные.append(предл[0].upper() + предл[1:].lower() if len(предл) > 1 else предл.upper())
+            return '. '.join(нормализованные) + '.'
+        # Короткий капс - делаем <strong> с нормальным регистром
+        return f'<strong>{нормализовать_капс(текст_строки)}</strong>'
     
-    # Добавляем пояснения для имён перед форматированием
-    текст = добавить_пояснения_для_имён(текст)
+    # Слова/фразы в капсе (2+ заглавных букв подряд) внутри текста
+    return CAPS_FRAGMENT_RE.sub(заменить_капс_фрагмент, текст_строки)
+
+def разбить_длинный_абзац(абзац_текст):
+    """Разбивает длинный абзац на короткие (2-4 предложения)"""
+    # Разбиваем по предложениям и объединяем разделители с предложениями
+    предложения = SENTENCE_SPLIT_RE.split(абзац_текст)
+    объединённые = []
+    for i in range(0, len(предложения), 2):
+        предложение = предложения[i]
+        if i + 1 < len(предложения):
+            предложение += предложения[i + 1]
+        if предложение.strip():
+            объединённые.append(предложение.strip())
+    
+    # Группируем по 2-4 предложения
+    короткие_абзацы = []
+    текущая_группа = []
+    for предл in объединённые:
+        текущая_группа.append(предл)
+        # Если накопили 2-4 предложения или предложение очень длинное
+        if len(текущая_группа) >= 3 or (len(текущая_группа) >= 2 and len(' '.join(текущая_группа)) > 300):
+            короткие_абзацы.append(' '.join(текущая_группа))
+            текущая_группа = []
     
-    # Удаляем все ссылки на tabatatimer.ru из начала текста
-    текст = re.sub(r'^.*?tabatatimer\.ru.*?\n', '', текст, flags=re.IGNORECASE | re.MULTILINE)
-    текст = re.sub(r'^.*?Запусти таймер.*?\n', '', текст, flags=re.IGNORECASE | re.MULTILINE)
+    if текущая_группа:
+        короткие_абзацы.append(' '.join(текущая_группа))
     
-    # Убираем все эмодзи
-    текст = re.sub(r'[🔥💪🧠⏰💥🚫✅❌⚠️📝📸🖼️🔍📥☁️]', '', текст)
+    return короткие_абзацы if короткие_абзацы else [абзац_текст]
+
+def это_упражнение_или_пункт(строка):
+    """Проверяет, является ли строка упражнением или пунктом списка"""
+    нижний = строка.lower().strip()
+    # Нумерованный или маркированный список, название упражнения
+    if LIST_ITEM_RE.match(нижний) or EXERCISE_NAMES_RE.search(нижний):
+        return True
+    # Короткая строка (вероятно, пункт списка)
+    return len(нижний) < 100 and (',' in нижний or ':' in нижний)
+
+def разобрать_текст_на_блоки(текст):
+    """
+    Один проход по строкам текста: каждая строка классифицируется
+    по LINE_MARKUP_RE и попадает в абзац, список, заголовок или разделитель.
     
-    # Разбиваем текст на строки
-    строки = текст.split('\n')
+    Returns:
+        Список блоков {'type': 'paragraph'|'list'|'h2'|'h3'|'h4'|'hr', 'content': ...}
+    """
     блоки = []
     текущий_абзац = []
     текущий_список = []
     в_списке = False
     список_нумерованный = False
     
-    # Список названий упражнений для распознавания
-    названия_упражнений = [
-        'приседания', 'выпады', 'прыжки', 'подъёмы', 'отжимания', 'скручивания', 
-        'планка', 'бёрпи', 'альпинист', 'велосипед', 'мостик', 'махи', 'жим',
-        'подтягивания', 'тяга', 'становая', 'бицепс', 'трицепс', 'плечи'
-    ]
-    
-    def убрать_капс_и_форматировать(текст_строки):
-        """Убирает капс, звёздочки, форматирует текст"""
-        # Убираем markdown звёздочки
-        текст_строки = re.sub(r'\*\*([^*]+)\*\*', r'\1', текст_строки)
-        текст_строки = re.sub(r'\*([^*]+)\*', r'\1', текст_строки)
-        
-        # Проверяем, весь ли текст в капсе
-        if текст_строки.isupper() and len(текст_строки) > 20:
-            # Если длинный капс-абзац, разбиваем на предложения и делаем нормальный текст
-            предложения = re.split(r'[.!?]\s+', текст_строки)
-            нормализованные = []
-            for предл in предложения:
-                предл = предл.strip()
-                if предл:
-                    # Первую букву делаем заглавной, остальные - строчными
-                    предл = предл[0].upper() + предл[1:].lower() if len(предл) > 1 else предл.upper()
-                    нормализованные.append(предл)
-            return '. '.join(нормализованные) + '.'
-        elif текст_строки.isupper() and len(текст_строки) <= 20:
-            # Короткий капс - делаем <strong> с нормальным регистром
-            нормализованный = текст_строки[0].upper() + текст_строки[1:].lower() if len(текст_строки) > 1 else текст_строки
-            return f'<strong>{нормализованный}</strong>'
-        
-        # Если есть части в капсе внутри текста, заменяем на <strong>
-        def заменить_капс_части(match):
-            капс_текст = match.group(0)
-            if len(капс_текст) > 30:
-                # Длинный капс - нормализуем
-                нормализованный = капс_текст[0].upper() + капс_текст[1:].lower() if len(капс_текст) > 1 else капс_текст
-                return нормализованный
-            else:
-                # Короткий капс - делаем <strong>
-                нормализованный = капс_текст[0].upper() + капс_текст[1:].lower() if len(капс_текст) > 1 else капс_текст
-                return f'<strong>{нормализованный}</strong>'
-        
-        # Находим слова/фразы в капсе (2+ заглавных букв подряд)
-        текст_строки = re.sub(r'\b[A-ZА-ЯЁ]{2,}[A-ZА-ЯЁ\s]{0,30}\b', заменить_капс_части, текст_строки)
-        
-        return текст_строки
-    
-    def разбить_длинный_абзац(абзац_текст):
-        """Разбивает длинный абзац на короткие (2-4 предложения)"""
-        # Разбиваем по предложениям
-        предложения = re.split(r'([.!?]\s+)', абзац_текст)
-        # Объединяем разделители с предложениями
-        объединённые = []
-        for i in range(0, len(предложения), 2):
-            if i < len(предложения):
-                предложение = предложения[i]
-                if i + 1 < len(предложения):
-                    предложение += предложения[i + 1]
-                if предложение.strip():
-                    объединённые.append(предложение.strip())
-        
-        # Группируем по 2-4 предложения
-        короткие_абзацы = []
-        текущая_группа = []
-        for предл in объединённые:
-            текущая_группа.append(предл)
-            # Если накопили 2-4 предложения или предложение очень длинное
-            if len(текущая_группа) >= 3 or (len(текущая_группа) >= 2 and len(' '.join(текущая_группа)) > 300):
-                короткие_абзацы.append(' '.join(текущая_группа))
-                текущая_группа = []
-        
-        if текущая_группа:
-            короткие_абзацы.append(' '.join(текущая_группа))
-        
-        return короткие_абзацы if короткие_абзацы else [абзац_текст]
-    
-    def это_упражнение_или_пункт(строка):
-        """Проверяет, является ли строка упражнением или пунктом списка"""
-        нижний = строка.lower().strip()
-        # Нумерованный список
-        if re.match(r'^\d+[\.\)]\s+', нижний):
-            return True
-        # Маркированный список
-        if re.match(r'^[\*\-]\s+', нижний):
-            return True
-        # Содержит название упражнения
-        if any(название in нижний for название in названия_упражнений):
-            return True
-        # Короткая строка (вероятно, пункт списка)
-        if len(нижний) < 100 and (',' in нижний or ':' in нижний):
-            return True
-        return False
+    def закрыть_абзац(разбить=True):
+        nonlocal текущий_абзац
+        if текущий_абзац:
+            абзац_текст = ' '.join(текущий_абзац)
+            for короткий in (разбить_длинный_абзац(абзац_текст) if разбить else [абзац_текст]):
+                блоки.append({'type': 'paragraph', 'content': короткий})
+            текущий_абзац = []
+    
+    def закрыть_список():
+        nonlocal текущий_список, в_списке, список_нумерованный
+        if текущий_список:
+            блоки.append({'type': 'list', 'content': текущий_список, 'ordered': список_нумерованный})
+            текущий_список = []
+            в_списке = False
+            список_нумерованный = False
     
-    for строка in строки:
+    for строка in текст.split('\n'):
         строка = строка.strip()
         
         # Пустая строка
         if not строка:
-            if текущий_абзац:
-                абзац_текст = ' '.join(текущий_абзац)
-                # Разбиваем длинные абзацы
-                короткие = разбить_длинный_абзац(абзац_текст)
-                for короткий in короткие:
-                    блоки.append({'type': 'paragraph', 'content': короткий})
-                текущий_абзац = []
-            if текущий_список:
-                блоки.append({'type': 'list', 'content': текущий_список, 'ordered': список_нумерованный})
-                текущий_список = []
-                в_списке = False
-                список_нумерованный = False
+            закрыть_абзац()
+            закрыть_список()
             continue
         
+        разметка = LINE_MARKUP_RE.match(строка)
+        вид = разметка.lastgroup if разметка else None
+        
         # Markdown заголовки: ##, ###
-        if строка.startswith('##'):
-            if текущий_абзац:
-                абзац_текст = ' '.join(текущий_абзац)
-                короткие = разбить_длинный_абзац(абзац_текст)
-                for короткий in короткие:
-                    блоки.append({'type': 'paragraph', 'content': короткий})
-                текущий_абзац = []
-            if текущий_список:
-                блоки.append({'type': 'list', 'content': текущий_список, 'ordered': список_нумерованный})
-                текущий_список = []
-                в_списке = False
-                список_нумерованный = False
-            
-            текст_заголовка = re.sub(r'^#+\s*', '', строка).strip()
-            текст_заголовка = убрать_капс_и_форматировать(текст_заголовка)
+        if вид == 'heading':
+            закрыть_абзац()
+            закрыть_список()
+            текст_заголовка = HEADING_PREFIX_RE.sub('', строка).strip()
             # Убираем HTML теги из заголовка (оставляем только текст)
-            текст_заголовка = re.sub(r'<[^>]+>', '', текст_заголовка)
-            
-            if строка.startswith('###'):
-                блоки.append({'type': 'h3', 'content': текст_заголовка})
-            else:
-                блоки.append({'type': 'h2', 'content': текст_заголовка})
+            текст_заголовка = HTML_TAG_RE.sub('', убрать_капс_и_форматировать(текст_заголовка))
+            блоки.append({'type': 'h3' if строка.startswith('###') else 'h2', 'content': текст_заголовка})
             continue
         
         # Горизонтальная линия: ---
-        if строка.startswith('---') or строка == '---':
-            if текущий_абзац:
-                блоки.append({'type': 'paragraph', 'content': ' '.join(текущий_абзац)})
-                текущий_абзац = []
-            if текущий_список:
-                блоки.append({'type': 'list', 'content': текущий_список, 'ordered': список_нумерованный})
-                текущий_список = []
-                в_списке = False
-                список_нумерованный = False
+        if вид == 'hr':
+            закрыть_абзац(разбить=False)
+            закрыть_список()
             блоки.append({'type': 'hr', 'content': ''})
             continue
         
-        # Нумерованный список: 1. пункт или 1) пункт
-        if re.match(r'^\d+[\.\)]\s+', строка):
-            if текущий_абзац:
-                абзац_текст = ' '.join(текущий_абзац)
-                короткие = разбить_длинный_абзац(абзац_текст)
-                for короткий in короткие:
-                    блоки.append({'type': 'paragraph', 'content': короткий})
-                текущий_абзац = []
-            if в_списке and текущий_список and not список_нумерованный:
-                блоки.append({'type': 'list', 'content': текущий_список, 'ordered': False})
-                текущий_список = []
-            в_списке = True
-            список_нумерованный = True
-            пункт = re.sub(r'^\d+[\.\)]\s+', '', строка)
-            пункт = убрать_капс_и_форматировать(пункт)
-            # Обрабатываем markdown ссылки
-            пункт = re.sub(r'\[([^\]]+)\]\(([^)]+)\)', r'<a href="\2" target="_blank" rel="noopener noreferrer">\1</a>', пункт)
-            текущий_список.append(пункт)
-            continue
-        
-        # Маркированный список: * пункт или - пункт
-        if re.match(r'^[\*\-]\s+', строка):
-            if текущий_абзац:
-                абзац_текст = ' '.join(текущий_абзац)
-                короткие = разбить_длинный_абзац(абзац_текст)
-                for короткий in короткие:
-                    блоки.append({'type': 'paragraph', 'content': короткий})
-                текущий_абзац = []
-            if в_списке and текущий_список and список_нумерованный:
-                блоки.append({'type': 'list', 'content': текущий_список, 'ordered': True})
+        # Нумерованный (1. пункт, 1) пункт) или маркированный (* пункт, - пункт) список
+        if вид in ('ordered', 'bullet'):
+            закрыть_абзац()
+            нумерованный = вид == 'ordered'
+            if в_списке and текущий_список and список_нумерованный != нумерованный:
+                блоки.append({'type': 'list', 'content': текущий_список, 'ordered': список_нумерованный})
                 текущий_список = []
             в_списке = True
-            список_нумерованный = False
-            пункт = re.sub(r'^[\*\-]\s+', '', строка)
-            пункт = убрать_капс_и_форматировать(пункт)
-            # Обрабатываем markdown ссылки
-            пункт = re.sub(r'\[([^\]]+)\]\(([^)]+)\)', r'<a href="\2" target="_blank" rel="noopener noreferrer">\1</a>', пункт)
-            текущий_список.append(пункт)
+            список_нумерованный = нумерованный
+            пункт = убрать_капс_и_форматировать(строка[разметка.end():])
+            текущий_список.append(MARKDOWN_LINK_RE.sub(MARKDOWN_LINK_HTML, пункт))
             continue
         
         # Заголовок h3 или h4 (старый формат с **)
         if строка.startswith('**') and строка.endswith('**') and len(строка) > 4:
-            if текущий_абзац:
-                блоки.append({'type': 'paragraph', 'content': ' '.join(текущий_абзац)})
-                текущий_абзац = []
-            if текущий_список:
-                блоки.append({'type': 'list', 'content': текущий_список, 'ordered': список_нумерованный})
-                текущий_список = []
-                в_списке = False
-                список_нумерованный = False
-            
+            закрыть_абзац(разбить=False)
+            закрыть_список()
             текст_заголовка = строка.replace('**', '')
-            if re.match(r'^День\s+\d+:', текст_заголовка, re.IGNORECASE):
-                блоки.append({'type': 'h4', 'content': текст_заголовка})
-            else:
-                блоки.append({'type': 'h3', 'content': текст_заголовка})
+            блоки.append({'type': 'h4' if DAY_HEADING_RE.match(текст_заголовка) else 'h3', 'content': текст_заголовка})
             continue
         
         # Строка упражнения (список)
         if это_упражнение_или_пункт(строка):
-            if текущий_абзац:
-                блоки.append({'type': 'paragraph', 'content': ' '.join(текущий_абзац)})
-                текущий_абзац = []
+            закрыть_абзац(разбить=False)
             в_списке = True
-            # Форматируем строку упражнения
             пункт = убрать_капс_и_форматировать(строка)
-            # Обрабатываем markdown ссылки
-            пункт = re.sub(r'\[([^\]]+)\]\(([^)]+)\)', r'<a href="\2" target="_blank" rel="noopener noreferrer">\1</a>', пункт)
-            текущий_список.append(пункт)
+            текущий_список.append(MARKDOWN_LINK_RE.sub(MARKDOWN_LINK_HTML, пункт))
             continue
         
         # Обычный текст - закрываем список если был
@@ -837,42 +990,52 @@ def форматировать_текст_для_html(текст, заголов
             в_списке = False
             список_нумерованный = False
         
-        # Обрабатываем markdown ссылки
-        строка = re.sub(r'\[([^\]]+)\]\(([^)]+)\)', r'<a href="\2" target="_blank" rel="noopener noreferrer">\1</a>', строка)
-        
-        # Убираем капс и форматируем
-        строка = убрать_капс_и_форматировать(строка)
+        строка = убрать_капс_и_форматировать(MARKDOWN_LINK_RE.sub(MARKDOWN_LINK_HTML, строка))
         
         # Экранируем HTML, но сохраняем уже добавленные теги
-        части = re.split(r'(<[^>]+>)', строка)
-        экранированные_части = []
-        for часть in части:
-            if часть.startswith('<') and часть.endswith('>'):
-                экранированные_части.append(часть)
-            else:
-                экранированные_части.append(html.escape(часть))
-        строка = ''.join(экранированные_части)
-        
-        текущий_абзац.append(строка)
+        текущий_абзац.append(''.join(
+            часть if часть.startswith('<') and часть.endswith('>') else html.escape(часть)
+            for часть in HTML_TAG_SPLIT_RE.split(строка)
+        ))
     
     # Закрываем последние блоки
-    if текущий_абзац:
-        абзац_текст = ' '.join(текущий_абзац)
-        короткие = разбить_длинный_абзац(абзац_текст)
-        for короткий in короткие:
-            блоки.append({'type': 'paragraph', 'content': короткий})
+    закрыть_абзац()
     if текущий_список:
         блоки.append({'type': 'list', 'content': текущий_список, 'ordered': список_нумерованный})
     
-    # Формируем HTML с семантической структурой
-    результат = []
-    в_секции = False
+    return блоки
+
+def форматировать_текст_для_html(текст, заголовок, теги):
+    """
+    Форматирует текст для HTML с чистой, читабельной структурой:
+    - Убирает капс и звёздочки
+    - Разбивает длинные абзацы на короткие (2-4 предложения)
+    - Правильно оформляет списки упражнений
+    - Использует семантическую структуру с <section>
+    """
+    if not текст:
+        return ''
     
-    for i, блок in enumerate(блоки):
-        # Начинаем новую секцию при h2
-        if блок['type'] == 'h2':
-            if в_секции:
-                результат.append('</section>')
+    # Добавляем пояснения для имён перед форматированием
+    текст = добавить_пояснения_для_имён(текст)
+    
+    # Удаляем все ссылки на tabatatimer.ru и призывы запустить таймер
+    текст = SERVICE_LINES_RE.sub('', текст)
+    
+    # Убираем все эмодзи
+    текст = EMOJI_RE.sub('', текст)
+    
+    блоки = разобрать_текст_на_блоки(текст)
+    
+    # Формируем HTML с семантической структурой
+    результат = []
+    в_секции = False
+    
+    for блок in блоки:
+        # Начинаем новую секцию при h2
+        if блок['type'] == 'h2':
+            if в_секции:
+                результат.append('</section>')
             результат.append('<section>')
             в_секции = True
             результат.append(f"<h2>{html.escape(блок['content'])}</h2>")
@@ -908,18 +1071,18 @@ def форматировать_текст_для_html(текст, заголов
         счётчик_изображений += 1
         
         if 'alt=' in полный_тег:
-            полный_тег = re.sub(r'alt=["\'][^"\']*["\']', f'alt="{alt}"', полный_тег)
+            полный_тег = IMG_ALT_RE.sub(f'alt="{alt}"', полный_тег)
         else:
             полный_тег = полный_тег.replace('<img', f'<img alt="{alt}"')
         
         if 'title=' in полный_тег:
-            полный_тег = re.sub(r'title=["\'][^"\']*["\']', f'title="{title}"', полный_тег)
+            полный_тег = IMG_TITLE_RE.sub(f'title="{title}"', полный_тег)
         else:
             полный_тег = полный_тег.replace('<img', f'<img title="{title}"')
         
         return полный_тег
     
-    текст_html = re.sub(r'<img[^>]*>', заменить_изображение, текст_html, flags=re.IGNORECASE)
+    текст_html = IMG_TAG_RE.sub(заменить_изображение, текст_html)
     
     return текст_html
 
@@ -957,81 +1120,9 @@ def адаптировать_заголовок_для_русской_аудит
     
     return заголовок
 
-def сгенерировать_html_страницу(пост):
-    """Генерирует HTML страницу для поста"""
+def определить_slug(пост, заголовок):
+    """Slug страницы поста: из сохранённого URL или из (адаптированного) заголовка"""
     post_id = пост.get('id', 'unknown')
-    заголовок_оригинальный = пост.get('title', 'Статья')
-    текст = пост.get('text', '')
-    
-    # ✅ ИСПРАВЛЕНИЕ: Используем оригинальный заголовок из спарсенной статьи
-    # Удалена логика адаптации с жестко закодированными заголовками
-    заголовок = адаптировать_заголовок_для_русской_аудитории(заголовок_оригинальный, текст)
-    
-    изображение_url = пост.get('image', 'https://www.tabatatimer.ru/images/og-image.jpg')
-    все_изображения_поста = пост.get('images', [])  # Список всех релевантных изображений
-    теги = пост.get('tags', [])
-    дата_публикации = пост.get('date', datetime.now().isoformat())
-    timestamp = пост.get('timestamp', int(datetime.now().timestamp()))
-    
-    # Используем все изображения из поста, если они есть
-    обработанные_изображения = []
-    if все_изображения_поста:
-        обработанные_изображения = все_изображения_поста
-    elif изображение_url:
-        # Если нет массива images, создаём из главного изображения
-        обработанные_изображения = [{
-            'url': изображение_url,
-            'alt': f"{заголовок} - фото тренировки и фитнеса",
-            'title': f"{заголовок} - профессиональное фото тренировки",
-            'is_main': True
-        }]
-    
-    # Главное изображение для Open Graph и Schema.org (первое или помеченное как главное)
-    # Для постов о питании/рецептах: не сток Fitness | Woman, не служебный кадр — фото блюда из галереи
-    источник = (пост.get('source') or '').lower()
-    теги_lower = [str(t).strip().lower() for t in (теги or [])]
-    # Только реальные рецепты из пайплайна рецептов или явный тег «рецепт».
-    # Не используем «питание»/«диеты» — иначе статьи WH про режим питания при тренировках
-    # ошибочно получают логику «фото блюда» при том, что hero — сток Fitness | Woman.
-    пост_про_еду = (
-        источник in ('recipes', 'skinnyms_recipes')
-        or any(t in теги_lower for t in ('рецепт', 'рецепты'))
-    )
-    главное_изображение = None
-    if пост_про_еду and обработанные_изображения:
-        главное_изображение = выбрать_главное_изображение_для_рецепта(обработанные_изображения)
-    if not главное_изображение:
-        for img_dict in обработанные_изображения:
-            if img_dict.get('is_main', False):
-                главное_изображение = img_dict
-                break
-    if not главное_изображение and обработанные_изображения:
-        главное_изображение = обработанные_изображения[0]
-
-    # Синхронизируем порядок images[] и post.image с выбранным hero (превью + модалка на blog.html)
-    if пост_про_еду and все_изображения_поста and главное_изображение:
-        imgs = пост.get('images')
-        if imgs and isinstance(imgs, list) and len(imgs) > 0:
-
-            def _norm_u(u):
-                return (u or '').split('?')[0].rstrip('/').lower()
-
-            gurl = _norm_u(главное_изображение.get('url'))
-            ix = next((i for i, x in enumerate(imgs) if _norm_u(x.get('url')) == gurl), None)
-            if ix is not None and ix > 0:
-                row = imgs.pop(ix)
-                imgs.insert(0, row)
-                пост['_blog_json_dirty'] = True
-            for i, im in enumerate(imgs):
-                im['is_main'] = (i == 0)
-            first_u = imgs[0].get('url')
-            if first_u and _norm_u(пост.get('image')) != _norm_u(first_u):
-                пост['image'] = first_u
-                пост['_blog_json_dirty'] = True
-
-    изображение = главное_изображение['url'] if главное_изображение else изображение_url
-    
-    # Создаём slug для URL
     # ✅ КРИТИЧЕСКОЕ ИСПРАВЛЕНИЕ: Если в посте уже есть URL, извлекаем slug из него
     # Это гарантирует, что slug совпадает с тем, что был сохранен в blog-posts.json
     существующий_url = пост.get('url', '')
@@ -1039,87 +1130,27 @@ def сгенерировать_html_страницу(пост):
         # Извлекаем slug из URL (например: /blog/trenirovka-tabata-sekretnyy-klyuch-k-rezultatu.html)
         # Или: https://www.tabatatimer.ru/blog/30-minute-leg-workout-circuit-for-goddess-worthy-l.html
         slug = существующий_url.split('/blog/')[-1].replace('.html', '').strip()
-        if not slug:
-            # Если slug пустой, генерируем из заголовка
-            slug = создать_slug(заголовок, post_id)
-    else:
-        # Генерируем slug из заголовка
-        slug = создать_slug(заголовок, post_id)
-    
-    url = f"https://www.tabatatimer.ru/blog/{slug}.html"
-    
-    # Создаём чистое описание для meta description (без Markdown, без ID, без мусора)
-    описание_текст = очистить_текст_от_html(текст)
-    if описание_текст:
-        # Разбиваем на строки для правильной обработки Markdown
-        строки = описание_текст.split('\n')
-        очищенные_строки = []
-        for строка in строки:
-            строка = строка.strip()
-            if not строка:
-                continue
-            # Убираем Markdown символы из начала строки
-            строка = re.sub(r'^#+\s*', '', строка)
-            строка = re.sub(r'^\*+\s*', '', строка)
-            строка = re.sub(r'^---+\s*', '', строка)
-            строка = re.sub(r'^\d+\.\s*', '', строка)  # Убираем нумерацию
-            # Убираем Markdown форматирование
-            строка = re.sub(r'\*\*([^*]+)\*\*', r'\1', строка)  # Убираем **
-            строка = re.sub(r'\*([^*]+)\*', r'\1', строка)  # Убираем *
-            if строка:
-                очищенные_строки.append(строка)
-        
-        # Собираем обратно в текст
-        описание_текст = ' '.join(очищенные_строки)
-        
-        # Берём первые 2-3 предложения (до 155 символов для Google)
-        предложения = re.split(r'[.!?]\s+', описание_текст)
-        описание = ''
-        for предложение in предложения:
-            if len(описание + предложение) <= 155:
-                описание += предложение + '. '
-            else:
-                break
-        
-        описание = описание.strip()
-        if not описание or len(описание) < 50:
-            # Если не получилось, берём первые 155 символов
-            описание = описание_текст[:155].strip()
-            if len(описание_текст) > 155:
-                описание = описание.rsplit(' ', 1)[0] + '...'  # Обрезаем по последнему слову
-    else:
-        описание = f"Полезная статья о фитнесе и тренировках. {', '.join(теги)}."
-    
-    # Создаём уникальный Title
-    уникальный_title = f"{заголовок} | Блог TABATATIMER.RU | {', '.join(теги)}"
-    
-    # Форматируем дату
-    try:
-        дата_объект = datetime.fromisoformat(дата_публикации.replace('Z', '+00:00'))
-        дата_публикации_iso = дата_объект.strftime('%Y-%m-%d')
-        дата_публикации_ru = дата_объект.strftime('%d.%m.%Y')
-    except:
-        дата_публикации_iso = datetime.now().strftime('%Y-%m-%d')
-        дата_публикации_ru = datetime.now().strftime('%d.%m.%Y')
-    
-    # Извлекаем заголовки для структуры
-    заголовки = извлечь_заголовки_из_текста(текст)
-    
-    # Форматируем текст для HTML с уникальными ссылками и изображениями
-    текст_html = форматировать_текст_для_html(текст, заголовок, теги)
-    
-    # Создаём уникальные alt и title для главного изображения
-    alt_изображения, title_изображения = создать_уникальный_alt_для_изображения(заголовок, теги, 0)
-    
-    # Ключевые слова из тегов
-    ключевые_слова = ', '.join(теги) + ', фитнес, тренировки, табата, hiit, amrap, emom'
+        if slug:
+            return slug
+        # Если slug пустой, генерируем из заголовка
+    return создать_slug(заголовок, post_id)
+
+# Каркас страницы поста: разбирается один раз за процесс, ${...} — динамические фрагменты
+PAGE_TEMPLATE = скомпилировать_шаблон("""<!DOCTYPE HTML>
+<html lang="ru" prefix="article: http://ogp.me/ns/article#">
+<head>
+    <meta charset="utf-8" />
     
-    # Экранируем фигурные скобки для JavaScript
-    js_redirect = """if (window.location.hostname === 'tabatatimer.ru') {
+    <!-- Автоматический редирект с tabatatimer.ru на www.tabatatimer.ru -->
+    <script>
+        if (window.location.hostname === 'tabatatimer.ru') {
             window.location.replace('https://www.tabatatimer.ru' + window.location.pathname + window.location.search + window.location.hash);
-        }"""
+        }
+    </script>
     
-    js_metrika = """(function(m,e,t,r,i,k,a){m[i]=m[i]||function(){(m[i].a=m[i].a||[]).push(arguments)};
+    <!-- Yandex.Metrika counter -->
+    <script type="text/javascript">
+       (function(m,e,t,r,i,k,a){m[i]=m[i]||function(){(m[i].a=m[i].a||[]).push(arguments)};
        m[i].l=1*new Date();
        for (var j = 0; j < document.scripts.length; j++) {if (document.scripts[j].src === r) { return; }}
        k=e.createElement(t),a=e.getElementsByTagName(t)[0],k.async=1,k.src=r,a.parentNode.insertBefore(k,a)})
@@ -1131,120 +1162,106 @@ def сгенерировать_html_страницу(пост):
             accurateTrackBounce:true,
             webvisor:true,
             trackHash:true
-       });"""
-    
-    html = f"""<!DOCTYPE HTML>
-<html lang="ru" prefix="article: http://ogp.me/ns/article#">
-<head>
-    <meta charset="utf-8" />
-    
-    <!-- Автоматический редирект с tabatatimer.ru на www.tabatatimer.ru -->
-    <script>
-        {js_redirect}
-    </script>
-    
-    <!-- Yandex.Metrika counter -->
-    <script type="text/javascript">
-       {js_metrika}
+       });
     </script>
     <noscript><div><img src="https://mc.yandex.ru/watch/42580049" style="position:absolute; left:-9999px;" alt="" /></div></noscript>
     <!-- /Yandex.Metrika counter -->
     
-    <title>{уникальный_title}</title>
+    <title>${title}</title>
     
-    <meta name="description" content="{описание}">
+    <meta name="description" content="${description}">
     <meta name="viewport" content="width=device-width, initial-scale=1, user-scalable=no" />
     <meta name="author" content="TABATATIMER.RU">
     <meta name="robots" content="index, follow">
     <meta http-equiv="X-Robots-Tag" content="index, follow, max-image-preview:large, max-snippet:-1, max-video-preview:-1">
-    <link rel="canonical" href="{url}">
-    <link rel="alternate" hreflang="ru" href="{url}">
-    <link rel="alternate" hreflang="x-default" href="{url}">
+    <link rel="canonical" href="${url}">
+    <link rel="alternate" hreflang="ru" href="${url}">
+    <link rel="alternate" hreflang="x-default" href="${url}">
     <meta name="yandex-verification" content="5e156b77592f12f7" />
     
     <!-- Open Graph / Facebook -->
     <meta property="og:type" content="article">
-    <meta property="og:url" content="{url}">
-    <meta property="og:title" content="{заголовок}">
-    <meta property="og:description" content="{описание}">
-    <meta property="og:image" content="{изображение}">
+    <meta property="og:url" content="${url}">
+    <meta property="og:title" content="${headline}">
+    <meta property="og:description" content="${description}">
+    <meta property="og:image" content="${image}">
     <meta property="og:image:width" content="1200">
     <meta property="og:image:height" content="630">
     <meta property="og:image:type" content="image/jpeg">
-    <meta property="og:image:alt" content="{заголовок}">
+    <meta property="og:image:alt" content="${headline}">
     <meta property="og:locale" content="ru_RU">
     <meta property="og:site_name" content="TABATATIMER.RU">
-    <meta property="article:published_time" content="{дата_публикации_iso}">
-    <meta property="article:modified_time" content="{дата_публикации_iso}">
+    <meta property="article:published_time" content="${date_iso}">
+    <meta property="article:modified_time" content="${date_iso}">
     <meta property="article:author" content="TABATATIMER.RU">
     <meta property="article:section" content="Фитнес">
-    {''.join([f'<meta property="article:tag" content="{тег}">' for тег in теги])}
+    ${article_tags}
     
     <!-- Twitter Card -->
     <meta name="twitter:card" content="summary_large_image">
-    <meta name="twitter:url" content="{url}">
-    <meta name="twitter:title" content="{заголовок}">
-    <meta name="twitter:description" content="{описание}">
-    <meta name="twitter:image" content="{изображение}">
+    <meta name="twitter:url" content="${url}">
+    <meta name="twitter:title" content="${headline}">
+    <meta name="twitter:description" content="${description}">
+    <meta name="twitter:image" content="${image}">
     
     <!-- Schema.org JSON-LD -->
     <script type="application/ld+json">
-    {{
+    {
         "@context": "https://schema.org",
         "@type": "Article",
-        "headline": {json.dumps(заголовок)},
-        "description": {json.dumps(описание)},
-        "image": {json.dumps(изображение)},
-        "datePublished": "{дата_публикации_iso}",
-        "dateModified": "{дата_публикации_iso}",
-        "author": {{
+        "headline": ${headline_json},
+        "description": ${description_json},
+        "image": ${image_json},
+        "datePublished": "${date_iso}",
+        "dateModified": "${date_iso}",
+        "author": {
             "@type": "Organization",
             "name": "TABATATIMER.RU",
             "url": "https://www.tabatatimer.ru/"
-        }},
-        "publisher": {{
+        },
+        "publisher": {
             "@type": "Organization",
             "name": "TABATATIMER.RU",
             "url": "https://www.tabatatimer.ru/",
-            "logo": {{
+            "logo": {
                 "@type": "ImageObject",
                 "url": "https://www.tabatatimer.ru/images/og-image.jpg"
-            }}
-        }},
-        "mainEntityOfPage": {{
+            }
+        },
+        "mainEntityOfPage": {
             "@type": "WebPage",
-            "@id": {json.dumps(url)}
-        }},
-        "keywords": {json.dumps(ключевые_слова)}
-    }}
+            "@id": ${url_json}
+        },
+        "keywords": ${keywords_json}
+    }
     </script>
     
     <!-- Breadcrumb Schema -->
     <script type="application/ld+json">
-    {{
+    {
         "@context": "https://schema.org",
         "@type": "BreadcrumbList",
         "itemListElement": [
-            {{
+            {
                 "@type": "ListItem",
                 "position": 1,
                 "name": "Главная",
                 "item": "https://www.tabatatimer.ru/"
-            }},
-            {{
+            },
+            {
                 "@type": "ListItem",
                 "position": 2,
                 "name": "Блог",
                 "item": "https://www.tabatatimer.ru/blog.html"
-            }},
-            {{
+            },
+            {
                 "@type": "ListItem",
                 "position": 3,
-                "name": {json.dumps(заголовок)},
-                "item": {json.dumps(url)}
-            }}
+                "name": ${headline_json},
+                "item": ${url_json}
+            }
         ]
-    }}
+    }
     </script>
     
     <!-- Favicon -->
@@ -1256,67 +1273,67 @@ def сгенерировать_html_страницу(пост):
     <link rel="stylesheet" href="../assets/css/font-awesome.min.css">
     
     <style>
-        html, body {{
+        html, body {
             overflow-x: hidden;
             margin: 0;
             padding: 0;
-        }}
+        }
         
-        .blog-post-page {{
+        .blog-post-page {
             max-width: 900px;
             margin: 0 auto;
             padding: 40px 20px;
             color: rgba(255, 255, 255, 0.9);
             background: #1a1a1a;
             min-height: 100vh;
-        }}
+        }
         
-        .blog-post-header {{
+        .blog-post-header {
             margin-bottom: 40px;
-        }}
+        }
         
-        .blog-post-title {{
+        .blog-post-title {
             font-size: 2.5rem;
             font-weight: 700;
             margin-bottom: 20px;
             color: #fff;
             line-height: 1.2;
-        }}
+        }
         
-        .blog-post-meta {{
+        .blog-post-meta {
             display: flex;
             gap: 20px;
             flex-wrap: wrap;
             margin-bottom: 30px;
             color: rgba(255, 255, 255, 0.6);
             font-size: 0.9rem;
-        }}
+        }
         
-        .blog-post-image {{
+        .blog-post-image {
             width: 100%;
             max-height: 500px;
             object-fit: cover;
             border-radius: 12px;
             margin-bottom: 30px;
-        }}
+        }
         
-        .blog-post-gallery {{
+        .blog-post-gallery {
             margin: 40px 0;
             padding: 30px 0;
             border-top: 1px solid rgba(255, 255, 255, 0.1);
-        }}
+        }
         
-        .blog-post-gallery h3 {{
+        .blog-post-gallery h3 {
             font-size: 1.5rem;
             margin: 0 0 20px 0;
             color: #7af5ff;
-        }}
+        }
         
-        .blog-gallery-slider {{
+        .blog-gallery-slider {
             position: relative;
-        }}
+        }
         
-        .blog-gallery-main {{
+        .blog-gallery-main {
             position: relative;
             margin-bottom: 20px;
             border-radius: 12px;
@@ -1326,18 +1343,18 @@ def сгенерировать_html_страницу(пост):
             display: flex;
             align-items: center;
             justify-content: center;
-        }}
+        }
         
-        .blog-gallery-main-image {{
+        .blog-gallery-main-image {
             width: 100%;
             height: auto;
             max-height: 600px;
             object-fit: contain;
             display: block;
-        }}
+        }
         
         .blog-gallery-prev,
-        .blog-gallery-next {{
+        .blog-gallery-next {
             position: absolute;
             top: 50%;
             transform: translateY(-50%);
@@ -1355,50 +1372,50 @@ def сгенерировать_html_страницу(пост):
             align-items: center;
             justify-content: center;
             line-height: 1;
-        }}
+        }
         
-        .blog-gallery-prev {{
+        .blog-gallery-prev {
             left: 15px;
-        }}
+        }
         
-        .blog-gallery-next {{
+        .blog-gallery-next {
             right: 15px;
-        }}
+        }
         
         .blog-gallery-prev:hover,
-        .blog-gallery-next:hover {{
+        .blog-gallery-next:hover {
             background: #7af5ff;
             transform: translateY(-50%) scale(1.1);
-        }}
+        }
         
-        .blog-gallery-thumbnails {{
+        .blog-gallery-thumbnails {
             display: flex;
             gap: 10px;
             overflow-x: auto;
             padding: 10px 0;
             scrollbar-width: thin;
             scrollbar-color: rgba(122, 245, 255, 0.3) transparent;
-        }}
+        }
         
-        .blog-gallery-thumbnails::-webkit-scrollbar {{
+        .blog-gallery-thumbnails::-webkit-scrollbar {
             height: 8px;
-        }}
+        }
         
-        .blog-gallery-thumbnails::-webkit-scrollbar-track {{
+        .blog-gallery-thumbnails::-webkit-scrollbar-track {
             background: rgba(255, 255, 255, 0.05);
             border-radius: 4px;
-        }}
+        }
         
-        .blog-gallery-thumbnails::-webkit-scrollbar-thumb {{
+        .blog-gallery-thumbnails::-webkit-scrollbar-thumb {
             background: rgba(122, 245, 255, 0.3);
             border-radius: 4px;
-        }}
+        }
         
-        .blog-gallery-thumbnails::-webkit-scrollbar-thumb:hover {{
+        .blog-gallery-thumbnails::-webkit-scrollbar-thumb:hover {
             background: rgba(122, 245, 255, 0.5);
-        }}
+        }
         
-        .blog-gallery-thumb {{
+        .blog-gallery-thumb {
             flex-shrink: 0;
             width: 120px;
             height: 120px;
@@ -1408,151 +1425,151 @@ def сгенерировать_html_страницу(пост):
             border: 2px solid transparent;
             transition: all 0.3s ease;
             background: rgba(255, 255, 255, 0.05);
-        }}
+        }
         
-        .blog-gallery-thumb:hover {{
+        .blog-gallery-thumb:hover {
             border-color: rgba(122, 245, 255, 0.5);
             transform: scale(1.05);
-        }}
+        }
         
-        .blog-gallery-thumb.active {{
+        .blog-gallery-thumb.active {
             border-color: #7af5ff;
             box-shadow: 0 0 15px rgba(122, 245, 255, 0.5);
-        }}
+        }
         
-        .blog-gallery-thumb-image {{
+        .blog-gallery-thumb-image {
             width: 100%;
             height: 100%;
             object-fit: cover;
             display: block;
-        }}
+        }
         
-        @media (max-width: 768px) {{
-            .blog-gallery-main {{
+        @media (max-width: 768px) {
+            .blog-gallery-main {
                 min-height: 300px;
-            }}
+            }
             
-            .blog-gallery-main-image {{
+            .blog-gallery-main-image {
                 max-height: 400px;
-            }}
+            }
             
-            .blog-gallery-thumb {{
+            .blog-gallery-thumb {
                 width: 80px;
                 height: 80px;
-            }}
+            }
             
             .blog-gallery-prev,
-            .blog-gallery-next {{
+            .blog-gallery-next {
                 width: 40px;
                 height: 40px;
                 font-size: 1.5rem;
-            }}
-        }}
+            }
+        }
         
-        .blog-post-content {{
+        .blog-post-content {
             line-height: 1.8;
             font-size: 1.1rem;
-        }}
+        }
         
-        .blog-post-content section {{
+        .blog-post-content section {
             margin: 40px 0;
             padding: 0;
-        }}
+        }
         
-        .blog-post-content section:first-of-type {{
+        .blog-post-content section:first-of-type {
             margin-top: 0;
-        }}
+        }
         
-        .blog-post-content section:last-of-type {{
+        .blog-post-content section:last-of-type {
             margin-bottom: 0;
-        }}
+        }
         
-        .blog-post-content h2 {{
+        .blog-post-content h2 {
             font-size: 1.8rem;
             margin: 30px 0 20px 0;
             color: #7af5ff;
             font-weight: 600;
             line-height: 1.3;
-        }}
+        }
         
-        .blog-post-content section > h2:first-child {{
+        .blog-post-content section > h2:first-child {
             margin-top: 0;
-        }}
+        }
         
-        .blog-post-content h3 {{
+        .blog-post-content h3 {
             font-size: 1.5rem;
             margin: 30px 0 12px 0;
             color: rgba(255, 255, 255, 0.9);
-        }}
+        }
         
-        .blog-post-content h3:first-of-type {{
+        .blog-post-content h3:first-of-type {
             margin-top: 40px;
-        }}
+        }
         
-        .blog-post-content h4 {{
+        .blog-post-content h4 {
             font-size: 1.2rem;
             margin: 20px 0 10px 0;
             color: rgba(255, 255, 255, 0.85);
-        }}
+        }
         
-        .blog-post-content p {{
+        .blog-post-content p {
             margin: 0 0 15px 0;
-        }}
+        }
         
-        .blog-post-content p.lead {{
+        .blog-post-content p.lead {
             font-size: 1.3rem;
             font-weight: 500;
             color: rgba(255, 255, 255, 0.95);
             margin: 20px 0 25px 0;
             line-height: 1.6;
-        }}
+        }
         
-        .blog-post-content hr {{
+        .blog-post-content hr {
             border: none;
             border-top: 1px solid rgba(255, 255, 255, 0.2);
             margin: 30px 0;
-        }}
+        }
         
         .blog-post-content ul,
-        .blog-post-content ol {{
+        .blog-post-content ol {
             margin: 20px 0 25px 0;
             padding-left: 30px;
             line-height: 1.7;
-        }}
+        }
         
-        .blog-post-content li {{
+        .blog-post-content li {
             margin: 10px 0;
             line-height: 1.7;
             padding-left: 5px;
-        }}
+        }
         
-        .blog-post-content ul li {{
+        .blog-post-content ul li {
             list-style-type: disc;
-        }}
+        }
         
-        .blog-post-content ol li {{
+        .blog-post-content ol li {
             list-style-type: decimal;
-        }}
+        }
         
-        .blog-post-content a {{
+        .blog-post-content a {
             color: #7af5ff;
             text-decoration: none;
-        }}
+        }
         
-        .blog-post-content a:hover {{
+        .blog-post-content a:hover {
             text-decoration: underline;
-        }}
+        }
         
-        .blog-post-tags {{
+        .blog-post-tags {
             display: flex;
             gap: 10px;
             flex-wrap: wrap;
             margin-top: 30px;
             padding-top: 30px;
             border-top: 1px solid rgba(255, 255, 255, 0.1);
-        }}
+        }
         
-        .blog-post-tag {{
+        .blog-post-tag {
             padding: 5px 12px;
             background: rgba(122, 245, 255, 0.1);
             border: 1px solid rgba(122, 245, 255, 0.3);
@@ -1564,104 +1581,104 @@ def сгенерировать_html_страницу(пост):
             display: inline-block;
             transition: all 0.3s ease;
             color: rgba(255, 255, 255, 0.8);
-        }}
+        }
         
-        .blog-post-tag:hover {{
+        .blog-post-tag:hover {
             background: rgba(122, 245, 255, 0.2);
             border-color: #7af5ff;
             color: #7af5ff;
             transform: translateY(-2px);
-        }}
+        }
         
-        .blog-timer-block {{
+        .blog-timer-block {
             margin-top: 40px;
             padding: 30px;
             background: rgba(122, 245, 255, 0.05);
             border: 1px solid rgba(122, 245, 255, 0.2);
             border-radius: 12px;
-        }}
+        }
         
-        .blog-timer-block h3 {{
+        .blog-timer-block h3 {
             color: #7af5ff;
             margin-top: 0;
             margin-bottom: 20px;
             font-size: 1.3rem;
-        }}
+        }
         
-        .blog-timer-block ul {{
+        .blog-timer-block ul {
             margin: 15px 0;
             padding-left: 25px;
-        }}
+        }
         
-        .blog-timer-block li {{
+        .blog-timer-block li {
             margin: 8px 0;
             color: rgba(255, 255, 255, 0.8);
-        }}
+        }
         
-        .blog-timer-block a {{
+        .blog-timer-block a {
             color: #7af5ff;
             text-decoration: none;
-        }}
+        }
         
-        .blog-timer-block a:hover {{
+        .blog-timer-block a:hover {
             text-decoration: underline;
-        }}
+        }
         
-        .blog-post-back {{
+        .blog-post-back {
             display: inline-block;
             margin-bottom: 30px;
             color: #7af5ff;
             text-decoration: none;
             font-size: 0.9rem;
-        }}
+        }
         
-        .blog-post-back:hover {{
+        .blog-post-back:hover {
             text-decoration: underline;
-        }}
+        }
         
         /* Блок подписки на Telegram канал */
-        .blog-subscribe-footer {{
+        .blog-subscribe-footer {
             margin-top: 60px;
             padding: 40px 20px;
             background: linear-gradient(135deg, rgba(122, 245, 255, 0.08) 0%, rgba(122, 245, 255, 0.03) 100%);
             border-top: 1px solid rgba(122, 245, 255, 0.15);
-        }}
+        }
         
-        .blog-subscribe-container {{
+        .blog-subscribe-container {
             max-width: 800px;
             margin: 0 auto;
-        }}
+        }
         
-        .blog-subscribe-content {{
+        .blog-subscribe-content {
             text-align: center;
-        }}
+        }
         
-        .blog-subscribe-title {{
+        .blog-subscribe-title {
             font-size: 1.5rem;
             color: #7af5ff;
             margin: 0 0 15px 0;
             font-weight: 600;
-        }}
+        }
         
-        .blog-subscribe-description {{
+        .blog-subscribe-description {
             color: rgba(255, 255, 255, 0.85);
             font-size: 1rem;
             line-height: 1.6;
             margin: 0 0 25px 0;
-        }}
+        }
         
-        .blog-subscribe-description strong {{
+        .blog-subscribe-description strong {
             color: #7af5ff;
-        }}
+        }
         
-        .blog-subscribe-buttons {{
+        .blog-subscribe-buttons {
             display: flex;
             gap: 15px;
             justify-content: center;
             flex-wrap: wrap;
-        }}
+        }
         
-        .blog-subscribe-button {{
+        .blog-subscribe-button {
             display: inline-block;
             border-radius: 8px;
             text-decoration: none;
@@ -1670,64 +1687,64 @@ def сгенерировать_html_страницу(пост):
             transition: all 0.3s ease;
             border: 2px solid transparent;
             text-align: center;
-        }}
+        }
         
-        .blog-subscribe-button-primary {{
+        .blog-subscribe-button-primary {
             padding: 12px 17px;
             background: #7af5ff;
             color: #1a1a2e;
             border-color: #7af5ff;
-        }}
+        }
         
-        .blog-subscribe-button-primary:hover {{
+        .blog-subscribe-button-primary:hover {
             background: #5dd5e5;
             border-color: #5dd5e5;
             transform: translateY(-2px);
             box-shadow: 0 4px 12px rgba(122, 245, 255, 0.3);
-        }}
+        }
         
-        .blog-subscribe-button-secondary {{
+        .blog-subscribe-button-secondary {
             padding: 12px 17px;
             background: transparent;
             color: #7af5ff;
             border-color: #7af5ff;
-        }}
+        }
         
-        .blog-subscribe-button-secondary:hover {{
+        .blog-subscribe-button-secondary:hover {
             background: rgba(122, 245, 255, 0.1);
             transform: translateY(-2px);
-        }}
+        }
         
-        @media (max-width: 768px) {{
-            .blog-post-title {{
+        @media (max-width: 768px) {
+            .blog-post-title {
                 font-size: 1.8rem;
-            }}
+            }
             
-            .blog-post-page {{
+            .blog-post-page {
                 padding: 20px 15px;
-            }}
+            }
             
-            .blog-subscribe-footer {{
+            .blog-subscribe-footer {
                 padding: 30px 15px;
                 margin-top: 40px;
-            }}
+            }
             
-            .blog-subscribe-title {{
+            .blog-subscribe-title {
                 font-size: 1.3rem;
-            }}
+            }
             
-            .blog-subscribe-buttons {{
+            .blog-subscribe-buttons {
                 flex-wrap: wrap;
                 gap: 15px;
-            }}
+            }
             
-            .blog-subscribe-button {{
+            .blog-subscribe-button {
                 min-width: auto;
                 flex: 1 1 auto;
                 text-align: center;
                 padding-left: 17px;
-            }}
-        }}
+            }
+        }
     </style>
 </head>
 <body>
@@ -1735,25 +1752,25 @@ def сгенерировать_html_страницу(пост):
         <a href="../blog.html" class="blog-post-back">← Вернуться к блогу</a>
         
         <article class="blog-post-header">
-            <h1 class="blog-post-title">{заголовок}</h1>
+            <h1 class="blog-post-title">${headline}</h1>
             
             <div class="blog-post-meta">
-                <span>📅 {дата_публикации_ru}</span>
-                <span>🏷️ {', '.join(теги)}</span>
+                <span>📅 ${date_ru}</span>
+                <span>🏷️ ${tags_text}</span>
             </div>
             
-            {f'<img src="{изображение}" alt="{alt_изображения}" title="{title_изображения}" class="blog-post-image" loading="lazy">' if изображение else ''}
+            ${hero_image}
         </article>
         
         <div class="blog-post-content">
-            {текст_html}
+            ${content}
             
             <!-- Галерея всех релевантных изображений из статьи -->
-            {создать_галерею_изображений(обработанные_изображения, заголовок, теги) if обработанные_изображения and len(обработанные_изображения) > 1 else ''}
+            ${gallery}
         </div>
         
         <div class="blog-post-tags">
-            {''.join([f'<a href="../blog.html?filter={quote(тег)}" class="blog-post-tag">{тег}</a>' for тег in теги])}
+            ${tag_links}
         </div>
         
         <!-- Блок подписки на Telegram канал -->
@@ -1763,10 +1780,10 @@ def сгенерировать_html_страницу(пост):
                     <h3 class="blog-subscribe-title">Больше тренировок и мотивации</h3>
                     <p class="blog-subscribe-description">Подписывайся на наш Telegram-канал <strong>TABATA TIMER</strong> и получай ежедневные программы тренировок, таймеры и советы по фитнесу</p>
                     <div class="blog-subscribe-buttons">
-                        <a href="https://t.me/fitnesstimer" target="_blank" rel="noopener noreferrer" class="blog-subscribe-button blog-subscribe-button-primary" onclick="if(typeof ym !== 'undefined'){{ym(42580049, 'reachGoal', 'blogSubscribeTelegram');}}">
+                        <a href="https://t.me/fitnesstimer" target="_blank" rel="noopener noreferrer" class="blog-subscribe-button blog-subscribe-button-primary" onclick="if(typeof ym !== 'undefined'){ym(42580049, 'reachGoal', 'blogSubscribeTelegram');}">
                             Подписаться на канал
                         </a>
-                        <a href="https://tabatatimer.ru/#timer" class="blog-subscribe-button blog-subscribe-button-secondary" onclick="if(typeof ym !== 'undefined'){{ym(42580049, 'reachGoal', 'blogToTimer');}}">
+                        <a href="https://tabatatimer.ru/#timer" class="blog-subscribe-button blog-subscribe-button-secondary" onclick="if(typeof ym !== 'undefined'){ym(42580049, 'reachGoal', 'blogToTimer');}">
                             Открыть таймер
                         </a>
                     </div>
@@ -1778,88 +1795,400 @@ def сгенерировать_html_страницу(пост):
     <!-- Burger Menu Script -->
     <script src="../assets/js/burger-menu.js"></script>
 </body>
-</html>"""
+</html>""")
+
+def сгенерировать_html_страницу(пост, заголовок=None, slug=None):
+    """Генерирует HTML страницу для поста
     
-    return html, slug, изображение
+    заголовок и slug можно передать заранее (их назначает сборщик страниц,
+    чтобы slug не зависел от порядка параллельной отрисовки).
+    """
+    post_id = пост.get('id', 'unknown')
+    заголовок_оригинальный = пост.get('title', 'Статья')
+    текст = пост.get('text', '')
+    
+    # ✅ ИСПРАВЛЕНИЕ: Используем оригинальный заголовок из спарсенной статьи
+    # Удалена логика адаптации с жестко закодированными заголовками
+    if заголовок is None:
+        заголовок = адаптировать_заголовок_для_русской_аудитории(заголовок_оригинальный, текст)
+    
+    изображение_url = пост.get('image', 'https://www.tabatatimer.ru/images/og-image.jpg')
+    все_изображения_поста = пост.get('images', [])  # Список всех релевантных изображений
+    теги = пост.get('tags', [])
+    дата_публикации = пост.get('date', datetime.now().isoformat())
+    timestamp = пост.get('timestamp', int(datetime.now().timestamp()))
+    
+    # Используем все изображения из поста, если они есть
+    обработанные_изображения = []
+    if все_изображения_поста:
+        обработанные_изображения = все_изображения_поста
+    elif изображение_url:
+        # Если нет массива images, создаём из главного изображения
+        обработанные_изображения = [{
+            'url': изображение_url,
+            'alt': f"{заголовок} - фото тренировки и фитнеса",
+            'title': f"{заголовок} - профессиональное фото тренировки",
+            'is_main': True
+        }]
+    
+    # Главное изображение для Open Graph и Schema.org (первое или помеченное как главное)
+    # Для постов о питании/рецептах: не сток Fitness | Woman, не служебный кадр — фото блюда из галереи
+    пост_про_еду = это_пост_про_еду(пост)
+    главное_изображение = None
+    if пост_про_еду and обработанные_изображения:
+        if все_изображения_поста and isinstance(все_изображения_поста, list):
+            # Выбор из кэша по хешу images; при промахе — оценка и синхронизация images[]/post.image
+            главное_изображение = главное_изображение_рецепта(пост)
+        else:
+            главное_изображение = выбрать_главное_изображение_для_рецепта(обработанные_изображения)
+    if not главное_изображение:
+        for img_dict in обработанные_изображения:
+            if img_dict.get('is_main', False):
+                главное_изображение = img_dict
+                break
+    if not главное_изображение and обработанные_изображения:
+        главное_изображение = обработанные_изображения[0]
 
-def обновить_sitemap():
-    """Обновляет sitemap.xml со всеми статьями блога"""
-    if not BLOG_POSTS_FILE.exists():
-        return
+    изображение = главное_изображение['url'] if главное_изображение else изображение_url
     
-    with open(BLOG_POSTS_FILE, 'r', encoding='utf-8') as f:
-        data = json.load(f)
+    # Создаём slug для URL
+    if slug is None:
+        slug = определить_slug(пост, заголовок)
     
-    посты = data.get('posts', [])
+    url = f"https://www.tabatatimer.ru/blog/{slug}.html"
     
-    # Читаем существующий sitemap или создаём новый
-    sitemap_file = Path('../public_html/sitemap.xml')
-    sitemap_entries = []
-    
-    if sitemap_file.exists():
-        # Парсим существующий sitemap (упрощённо)
-        with open(sitemap_file, 'r', encoding='utf-8') as f:
-            content = f.read()
-            # Извлекаем существующие URL (кроме блог-постов)
-            import re
-            urls = re.findall(r'<loc>(https://www\.tabatatimer\.ru/[^<]+)</loc>', content)
-            for url in urls:
-                if '/blog/' not in url:  # Исключаем старые блог-посты
-                    sitemap_entries.append(url)
-    
-    # Добавляем главную страницу и блог, если их нет
-    if 'https://www.tabatatimer.ru/' not in sitemap_entries:
-        sitemap_entries.insert(0, 'https://www.tabatatimer.ru/')
-    if 'https://www.tabatatimer.ru/blog.html' not in sitemap_entries:
-        sitemap_entries.append('https://www.tabatatimer.ru/blog.html')
-    
-    # Добавляем все посты блога
-    for пост in посты:
-        post_id = пост.get('id', 'unknown')
-        заголовок = пост.get('title', 'Статья')
-        slug = создать_slug(заголовок, post_id)
-        url = f"https://www.tabatatimer.ru/blog/{slug}.html"
-        if url not in sitemap_entries:
-            sitemap_entries.append(url)
-    
-    # Генерируем sitemap.xml
-    sitemap_xml = '''<?xml version="1.0" encoding="UTF-8"?>
+    # Создаём чистое описание для meta description (без Markdown, без ID, без мусора)
+    описание_текст = очистить_текст_от_html(текст)
+    if описание_текст:
+        # Разбиваем на строки для правильной обработки Markdown
+        строки = описание_текст.split('\n')
+        очищенные_строки = []
+        for строка in строки:
+            строка = строка.strip()
+            if not строка:
+                continue
+            # Убираем Markdown символы из начала строки
+            строка = re.sub(r'^#+\s*', '', строка)
+            строка = re.sub(r'^\*+\s*', '', строка)
+            строка = re.sub(r'^---+\s*', '', строка)
+            строка = re.sub(r'^\d+\.\s*', '', строка)  # Убираем нумерацию
+            # Убираем Markdown форматирование
+            строка = re.sub(r'\*\*([^*]+)\*\*', r'\1', строка)  # Убираем **
+            строка = re.sub(r'\*([^*]+)\*', r'\1', строка)  # Убираем *
+            if строка:
+                очищенные_строки.append(строка)
+        
+        # Собираем обратно в текст
+        описание_текст = ' '.join(очищенные_строки)
+        
+        # Берём первые 2-3 предложения (до 155 символов для Google)
+        предложения = re.split(r'[.!?]\s+', описание_текст)
+        описание = ''
+        for предложение in предложения:
+            if len(описание + предложение) <= 155:
+                описание += предложение + '. '
+            else:
+                break
+        
+        описание = описание.strip()
+        if not описание or len(описание) < 50:
+            # Если не получилось, берём первые 155 символов
+            описание = описание_текст[:155].strip()
+            if len(описание_текст) > 155:
+                описание = описание.rsplit(' ', 1)[0] + '...'  # Обрезаем по последнему слову
+    else:
+        описание = f"Полезная статья о фитнесе и тренировках. {', '.join(теги)}."
+    
+    # Создаём уникальный Title
+    уникальный_title = f"{заголовок} | Блог TABATATIMER.RU | {', '.join(теги)}"
+    
+    # Форматируем дату
+    try:
+        дата_объект = datetime.fromisoformat(дата_публикации.replace('Z', '+00:00'))
+        дата_публикации_iso = дата_объект.strftime('%Y-%m-%d')
+        дата_публикации_ru = дата_объект.strftime('%d.%m.%Y')
+    except:
+        дата_публикации_iso = datetime.now().strftime('%Y-%m-%d')
+        дата_публикации_ru = datetime.now().strftime('%d.%m.%Y')
+    
+    # Извлекаем заголовки для структуры
+    заголовки = извлечь_заголовки_из_текста(текст)
+    
+    # Форматируем текст для HTML с уникальными ссылками и изображениями
+    текст_html = форматировать_текст_для_html(текст, заголовок, теги)
+    
+    # Создаём уникальные alt и title для главного изображения
+    alt_изображения, title_изображения = создать_уникальный_alt_для_изображения(заголовок, теги, 0)
+    
+    # Ключевые слова из тегов
+    ключевые_слова = ', '.join(теги) + ', фитнес, тренировки, табата, hiit, amrap, emom'
+    
+    # Статичный каркас страницы (head, CSS, JS) разобран один раз в PAGE_TEMPLATE,
+    # здесь собираются только динамические фрагменты
+    html = отрисовать_шаблон(
+        PAGE_TEMPLATE,
+        title=уникальный_title,
+        description=описание,
+        url=url,
+        headline=заголовок,
+        image=изображение,
+        date_iso=дата_публикации_iso,
+        date_ru=дата_публикации_ru,
+        tags_text=', '.join(теги),
+        article_tags=''.join([f'<meta property="article:tag" content="{тег}">' for тег in теги]),
+        headline_json=json.dumps(заголовок),
+        description_json=json.dumps(описание),
+        image_json=json.dumps(изображение),
+        url_json=json.dumps(url),
+        keywords_json=json.dumps(ключевые_слова),
+        hero_image=f'<img src="{изображение}"{атрибуты_srcset(изображение, HERO_IMAGE_SIZES)} alt="{alt_изображения}" title="{title_изображения}" class="blog-post-image" loading="lazy">' if изображение else '',
+        content=текст_html,
+        gallery=создать_галерею_изображений(обработанные_изображения, заголовок, теги) if обработанные_изображения and len(обработанные_изображения) > 1 else '',
+        tag_links=''.join([f'<a href="../blog.html?filter={quote(тег)}" class="blog-post-tag">{тег}</a>' for тег in теги])
+    )
+    
+    return html, slug, изображение
+
+SITEMAP_URLSET_HEADER = '''<?xml version="1.0" encoding="UTF-8"?>
 <urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9"
         xmlns:news="http://www.google.com/schemas/sitemap-news/0.9"
         xmlns:xhtml="http://www.w3.org/1999/xhtml"
         xmlns:image="http://www.google.com/schemas/sitemap-image/1.1"
         xmlns:video="http://www.google.com/schemas/sitemap-video/1.1">
 '''
+SITEMAP_URLSET_FOOTER = '</urlset>'
+SITEMAP_LOC_RE = re.compile(r'<loc>(https://www\.tabatatimer\.ru/[^<]+)</loc>')
+SITEMAP_PART_RE = re.compile(r'sitemap-\d+\.xml')
+
+def прочитать_url_из_sitemap(файл):
+    """Построчно отдаёт <loc> из sitemap; для индекса — URL из его локальных частей sitemap-N.xml"""
+    if not файл.exists():
+        return
+    with open(файл, 'r', encoding='utf-8') as f:
+        for строка in f:
+            for url in SITEMAP_LOC_RE.findall(строка):
+                url = xml_unescape(url)
+                имя = url.rsplit('/', 1)[-1]
+                if SITEMAP_PART_RE.fullmatch(имя):
+                    yield from прочитать_url_из_sitemap(файл.with_name(имя))
+                else:
+                    yield url
+
+def дата_для_lastmod(дата):
+    """Дата поста в формате W3C (YYYY-MM-DD) или None"""
+    if not дата:
+        return None
+    try:
+        return datetime.fromisoformat(str(дата).replace('Z', '+00:00')).strftime('%Y-%m-%d')
+    except ValueError:
+        return None
+
+def изображения_для_sitemap(пост, url_страницы):
+    """Абсолютные URL главного изображения и галереи поста без повторов"""
+    изображения = []
+    увиденные = set()
+    кандидаты = [пост.get('image')] + [img.get('url') for img in (пост.get('images') or []) if isinstance(img, dict)]
+    for кандидат in кандидаты:
+        if not кандидат:
+            continue
+        абсолютный = urljoin(url_страницы, кандидат)
+        if not абсолютный.startswith(('http://', 'https://')) or абсолютный in увиденные:
+            continue
+        увиденные.add(абсолютный)
+        изображения.append(абсолютный)
+        if len(изображения) >= SITEMAP_MAX_IMAGES:
+            break
+    return изображения
+
+def элемент_sitemap(url, lastmod=None, изображения=()):
+    """XML одного <url> с приоритетом и частотой обновления по типу страницы"""
+    if url == f'{SITE_URL}/':
+        priority, changefreq = '1.0', 'daily'
+    elif '/blog/' in url:
+        priority, changefreq = '0.8', 'weekly'
+    else:
+        priority, changefreq = '0.7', 'monthly'
+    
+    части = ['   <url>\n', f'      <loc>{xml_escape(url)}</loc>\n']
+    if lastmod:
+        части.append(f'      <lastmod>{lastmod}</lastmod>\n')
+    части.append(f'      <changefreq>{changefreq}</changefreq>\n')
+    части.append(f'      <priority>{priority}</priority>\n')
+    for изображение in изображения:
+        части.append(f'      <image:image>\n         <image:loc>{xml_escape(изображение)}</image:loc>\n      </image:image>\n')
+    части.append('   </url>\n')
+    return ''.join(части)
+
+def записать_sitemap(элементы):
+    """
+    Потоково пишет элементы <url> в SITEMAP_FILE.
     
-    for url in sitemap_entries:
-        # Определяем приоритет и частоту обновления
-        if url == 'https://www.tabatatimer.ru/':
-            priority = '1.0'
-            changefreq = 'daily'
-        elif '/blog/' in url:
-            priority = '0.8'
-            changefreq = 'weekly'
-        else:
-            priority = '0.7'
-            changefreq = 'monthly'
-        
-        sitemap_xml += f'''   <url>
-      <loc>{url}</loc>
-      <changefreq>{changefreq}</changefreq>
-      <priority>{priority}</priority>
-   </url>
-'''
+    Пока укладываемся в SITEMAP_MAX_URLS и SITEMAP_MAX_BYTES — обычный sitemap.xml;
+    иначе части sitemap-N.xml и sitemap.xml как индекс. Лишние части от прошлых
+    сборок удаляются.
+    
+    Returns:
+        (число URL, число частей)
+    """
+    каталог = SITEMAP_FILE.parent
+    заголовок_байт = len(SITEMAP_URLSET_HEADER.encode('utf-8'))
+    подвал_байт = len(SITEMAP_URLSET_FOOTER.encode('utf-8'))
+    временные = []
+    f = None
+    в_части = 0
+    байт_в_части = 0
+    всего = 0
+    
+    try:
+        for элемент in элементы:
+            размер = len(элемент.encode('utf-8'))
+            if f is None or в_части >= SITEMAP_MAX_URLS or байт_в_части + размер + подвал_байт > SITEMAP_MAX_BYTES:
+                if f is not None:
+                    f.write(SITEMAP_URLSET_FOOTER)
+                    f.close()
+                временный = каталог / f".sitemap-{len(временные) + 1}.xml.{os.getpid()}.tmp"
+                временные.append(временный)
+                f = open(временный, 'w', encoding='utf-8')
+                f.write(SITEMAP_URLSET_HEADER)
+                в_части = 0
+                байт_в_части = заголовок_байт
+            f.write(элемент)
+            в_части += 1
+            байт_в_части += размер
+            всего += 1
+        if f is None:
+            временный = каталог / f".sitemap-1.xml.{os.getpid()}.tmp"
+            временные.append(временный)
+            f = open(временный, 'w', encoding='utf-8')
+            f.write(SITEMAP_URLSET_HEADER)
+        f.write(SITEMAP_URLSET_FOOTER)
+        f.close()
+    except BaseException:
+        if f is not None:
+            f.close()
+        for временный in временные:
+            временный.unlink(missing_ok=True)
+        raise
+    
+    if len(временные) == 1:
+        os.replace(временные[0], SITEMAP_FILE)
+    else:
+        for номер, временный in enumerate(временные, 1):
+            os.replace(временный, каталог / f"sitemap-{номер}.xml")
+        сегодня = datetime.now().strftime('%Y-%m-%d')
+        индекс = ['<?xml version="1.0" encoding="UTF-8"?>\n<sitemapindex xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n']
+        for номер in range(1, len(временные) + 1):
+            индекс.append(f'   <sitemap>\n      <loc>{SITE_URL}/sitemap-{номер}.xml</loc>\n      <lastmod>{сегодня}</lastmod>\n   </sitemap>\n')
+        индекс.append('</sitemapindex>')
+        записать_атомарно(SITEMAP_FILE, ''.join(индекс))
+    
+    # Части от прошлой, более длинной сборки
+    частей = len(временные) if len(временные) > 1 else 0
+    for файл in каталог.glob('sitemap-*.xml'):
+        if SITEMAP_PART_RE.fullmatch(файл.name) and int(файл.stem.split('-')[1]) > частей:
+            файл.unlink()
+    
+    return всего, len(временные)
+
+def обновить_sitemap():
+    """Обновляет sitemap.xml со всеми статьями блога (lastmod и изображения постов)"""
+    if not BLOG_POSTS_FILE.exists():
+        return
     
-    sitemap_xml += '</urlset>'
+    with open(BLOG_POSTS_FILE, 'r', encoding='utf-8') as f:
+        data = json.load(f)
     
-    # Сохраняем sitemap
-    with open(sitemap_file, 'w', encoding='utf-8') as f:
-        f.write(sitemap_xml)
+    посты = data.get('posts', [])
     
-    print(f"✅ Sitemap обновлён ({len(sitemap_entries)} URL)")
+    # Страницы сайта из текущего sitemap (кроме блог-постов) сохраняем в прежнем порядке
+    страницы_сайта = [url for url in прочитать_url_из_sitemap(SITEMAP_FILE) if '/blog/' not in url]
+    if f'{SITE_URL}/' not in страницы_сайта:
+        страницы_сайта.insert(0, f'{SITE_URL}/')
+    if f'{SITE_URL}/blog.html' not in страницы_сайта:
+        страницы_сайта.append(f'{SITE_URL}/blog.html')
+    
+    def элементы():
+        увиденные = set()
+        for url in страницы_сайта:
+            if url not in увиденные:
+                увиденные.add(url)
+                yield элемент_sitemap(url)
+        for пост in посты:
+            # Тот же slug, что и у сгенерированной страницы
+            slug = определить_slug(пост, пост.get('title', 'Статья'))
+            url = f"{SITE_URL}/blog/{slug}.html"
+            if url in увиденные:
+                continue
+            увиденные.add(url)
+            yield элемент_sitemap(url, дата_для_lastmod(пост.get('date')), изображения_для_sitemap(пост, url))
+    
+    всего, частей = записать_sitemap(элементы())
+    if частей > 1:
+        print(f"✅ Sitemap обновлён ({всего} URL, индекс из {частей} частей)")
+    else:
+        print(f"✅ Sitemap обновлён ({всего} URL)")
+
+def версия_генератора():
+    """Хеш исходника генератора: при изменении шаблона/логики все страницы пересобираются"""
+    return hashlib.sha256(Path(__file__).read_bytes()).hexdigest()[:16]
+
+def хеш_поста(пост):
+    """Хеш содержимого поста (служебные ключи с '_' не учитываются)"""
+    данные = {k: v for k, v in пост.items() if not k.startswith('_')}
+    return hashlib.sha256(json.dumps(данные, ensure_ascii=False, sort_keys=True).encode('utf-8')).hexdigest()
+
+def загрузить_манифест_сборки():
+    if not BUILD_MANIFEST_FILE.exists():
+        return {}
+    try:
+        with open(BUILD_MANIFEST_FILE, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except Exception as e:
+        print(f"⚠️ Не удалось прочитать манифест сборки: {e}")
+        return {}
+
+def сохранить_манифест_сборки(манифест):
+    with open(BUILD_MANIFEST_FILE, 'w', encoding='utf-8') as f:
+        json.dump(манифест, f, ensure_ascii=False, indent=2)
+
+def найти_осиротевшие_страницы(slugs, прошлый_манифест):
+    """
+    Страницы в blog/, которым не соответствует ни один пост.
+    
+    Returns:
+        (собранные_ранее, неизвестные) - осиротевшие страницы из прошлых сборок
+        и страницы, которые генератор никогда не создавал (ручные/старые)
+    """
+    прошлые_slugs = {запись.get('slug') for запись in прошлый_манифест.get('posts', {}).values()}
+    собранные_ранее, неизвестные = [], []
+    for файл in sorted(BLOG_POSTS_DIR.glob('*.html')):
+        if файл.stem in slugs:
+            continue
+        (собранные_ранее if файл.stem in прошлые_slugs else неизвестные).append(файл)
+    return собранные_ранее, неизвестные
+
+def записать_атомарно(файл, содержимое):
+    """Пишет файл через временный файл и os.replace — читатель не увидит недописанную страницу"""
+    временный = файл.with_name(f".{файл.name}.{os.getpid()}.tmp")
+    with open(временный, 'w', encoding='utf-8') as f:
+        f.write(содержимое)
+    os.replace(временный, файл)
+
+def _отрисовать_страницу(задача):
+    """Отрисовывает и записывает страницу (выполняется в том числе в дочернем процессе)"""
+    индекс, пост, заголовок, slug = задача
+    html, slug, изображение_использовано = сгенерировать_html_страницу(пост, заголовок=заголовок, slug=slug)
+    записать_атомарно(BLOG_POSTS_DIR / f"{slug}.html", html)
+    return индекс, пост, slug, изображение_использовано
 
-def сгенерировать_страницы_для_всех_постов():
-    """Генерирует HTML страницы для всех постов в blog-posts.json"""
+def сгенерировать_страницы_для_всех_постов(полная_сборка=False, удалить_осиротевшие=False, jobs=1):
+    """
+    Генерирует HTML страницы для постов в blog-posts.json
+    
+    Пересобираются только новые и изменённые посты (по манифесту сборки);
+    полная_сборка=True (--full) пересобирает все страницы,
+    jobs > 1 (--jobs N) отрисовывает страницы в пуле процессов.
+    """
     if not BLOG_POSTS_FILE.exists():
         print("❌ Файл blog-posts.json не найден")
         return
@@ -1874,24 +2203,95 @@ def сгенерировать_страницы_для_всех_постов():
     SLUG_CACHE.clear()
     USED_SLUGS.clear()
     
+    прошлый_манифест = загрузить_манифест_сборки()
+    загрузить_кэш_главных_изображений()
+    версия = версия_генератора()
+    if not полная_сборка and прошлый_манифест.get('generator') != версия:
+        if прошлый_манифест:
+            print("🔄 Генератор изменился с прошлой сборки — пересобираю все страницы")
+        полная_сборка = True
+    прошлые_записи = прошлый_манифест.get('posts', {})
+    записи = {}
+    slugs = set()
+    
     сгенерировано = 0
+    пропущено = 0
     обновления_изображений = {}  # post_id -> URL главного изображения (для списка блога)
-    for пост in посты:
+    задачи = []
+    # Первый проход (по порядку): пропуск актуальных страниц и назначение slug,
+    # чтобы разрешение коллизий slug не зависело от порядка параллельной отрисовки
+    for индекс, пост in enumerate(посты):
+        post_id = пост.get('id')
+        запись = прошлые_записи.get(post_id) if post_id else None
+        if (not полная_сборка and запись and запись.get('hash') == хеш_поста(пост)
+                and (BLOG_POSTS_DIR / f"{запись.get('slug')}.html").exists()):
+            # Страница актуальна; slug занимаем в том же порядке, что и при полной сборке
+            slug = запись['slug']
+            if '/blog/' not in (пост.get('url') or ''):
+                SLUG_CACHE[post_id] = slug
+                USED_SLUGS.add(slug)
+            записи[post_id] = запись
+            slugs.add(slug)
+            пропущено += 1
+            continue
         try:
-            html, slug, изображение_использовано = сгенерировать_html_страницу(пост)
-            файл = BLOG_POSTS_DIR / f"{slug}.html"
-            
-            with open(файл, 'w', encoding='utf-8') as f:
-                f.write(html)
-            
-            обновления_изображений[пост.get('id')] = изображение_использовано
-            сгенерировано += 1
-            print(f"✅ Создана страница: {slug}.html")
+            if это_пост_про_еду(пост):
+                # Hero рецепта выбираем здесь: решение попадает в кэш родительского процесса
+                главное_изображение_рецепта(пост)
+            заголовок = адаптировать_заголовок_для_русской_аудитории(пост.get('title', 'Статья'), пост.get('text', ''))
+            задачи.append((индекс, пост, заголовок, определить_slug(пост, заголовок)))
         except Exception as e:
             print(f"❌ Ошибка создания страницы для поста {пост.get('id', 'unknown')}: {e}")
     
+    # WebP-варианты изображений отрисовываемых постов — до отрисовки, чтобы страницы получили srcset
+    имена_изображений = {
+        url.split('?')[0].rsplit('/', 1)[-1]
+        for _, пост, _, _ in задачи
+        for url in [пост.get('image')] + [img.get('url') for img in пост.get('images') or [] if isinstance(img, dict)]
+        if url and '/images/blog/' in url
+    }
+    if имена_изображений and image_derivatives.доступен():
+        try:
+            итог_вариантов = image_derivatives.подготовить_варианты(
+                BLOG_IMAGES_DIR, имена_изображений, IMAGE_DERIVATIVES_FILE
+            )
+            print(f"🖼️ WebP-варианты: создано {итог_вариантов['created']}, из кэша {итог_вариантов['cached']}, ошибок {итог_вариантов['failed']}")
+        except Exception as e:
+            print(f"⚠️ Ошибка создания WebP-вариантов изображений: {e}")
+    
+    # Второй проход: отрисовка (CPU) — в пуле процессов при jobs > 1
+    if jobs > 1 and len(задачи) > 1:
+        print(f"⚙️ Отрисовка {len(задачи)} страниц в {jobs} процессах")
+        with ProcessPoolExecutor(max_workers=jobs) as executor:
+            futures = [executor.submit(_отрисовать_страницу, задача) for задача in задачи]
+            результаты = []
+            for задача, future in zip(задачи, futures):
+                try:
+                    результаты.append(future.result())
+                except Exception as e:
+                    print(f"❌ Ошибка создания страницы для поста {задача[1].get('id', 'unknown')}: {e}")
+    else:
+        результаты = []
+        for задача in задачи:
+            try:
+                результаты.append(_отрисовать_страницу(задача))
+            except Exception as e:
+                print(f"❌ Ошибка создания страницы для поста {задача[1].get('id', 'unknown')}: {e}")
+    
+    for индекс, пост, slug, изображение_использовано in результаты:
+        # Генератор мог поправить image/images поста (в другом процессе) — берём его версию
+        посты[индекс] = пост
+        post_id = пост.get('id')
+        обновления_изображений[post_id] = изображение_использовано
+        if post_id:
+            записи[post_id] = {'slug': slug}
+        slugs.add(slug)
+        сгенерировано += 1
+        print(f"✅ Создана страница: {slug}.html")
+    
     # Сохраняем blog-posts.json, если менялись post.image / порядок images (рецепты) или сверка с HTML
-    json_dirty = any(пост.pop('_blog_json_dirty', False) for пост in data['posts'])
+    # pop у всех постов (any() по генератору остановился бы на первом и оставил флаг в JSON)
+    json_dirty = any([пост.pop('_blog_json_dirty', False) for пост in data['posts']])
     if обновления_изображений:
         for пост in data['posts']:
             pid = пост.get('id')
@@ -1903,7 +2303,40 @@ def сгенерировать_страницы_для_всех_постов():
             json.dump(data, f, ensure_ascii=False, indent=2)
         print("✅ blog-posts.json обновлён (превью/модалка и порядок фото для рецептов)")
     
-    print(f"\n✅ Сгенерировано страниц: {сгенерировано}/{len(посты)}")
+    # Хеш считаем по посту в том виде, в каком он сохранён в blog-posts.json
+    for пост in посты:
+        post_id = пост.get('id')
+        if post_id in записи and 'hash' not in записи[post_id]:
+            записи[post_id]['hash'] = хеш_поста(пост)
+    
+    print(f"\n✅ Сгенерировано страниц: {сгенерировано}/{len(посты)} (без изменений: {пропущено})")
+    
+    собранные_ранее, неизвестные = найти_осиротевшие_страницы(slugs, прошлый_манифест)
+    if собранные_ранее or неизвестные:
+        print(f"🧟 Осиротевшие страницы: {len(собранные_ранее)} из прошлых сборок, {len(неизвестные)} не из генератора")
+        for файл in собранные_ранее:
+            if удалить_осиротевшие:
+                файл.unlink()
+                print(f"   🗑️ Удалена: {файл.name}")
+            else:
+                print(f"   - {файл.name}")
+    
+    сохранить_манифест_сборки({
+        'version': 1,
+        'generator': версия,
+        'updated_at': datetime.now().isoformat(),
+        'posts': записи
+    })
+    сохранить_кэш_главных_изображений({пост.get('id') for пост in посты if пост.get('id')})
+    
+    # Компактный индекс и шарды ленты для сайта и парсеров (пишутся только изменённые файлы)
+    try:
+        итог_ленты = blog_feed.записать_ленту(
+            BLOG_POSTS_FILE, посты, {post_id: запись['slug'] for post_id, запись in записи.items()}
+        )
+        print(f"🗂️ Лента блога: {итог_ленты['pages']} стр., обновлено файлов: {итог_ленты['written']}, удалено: {итог_ленты['removed']}")
+    except Exception as e:
+        print(f"⚠️ Ошибка записи индекса ленты блога: {e}")
     
     # Загружаем все изображения блога в Yandex Cloud
     print("\n📤 Загружаю все изображения блога в Yandex Cloud...")
@@ -1912,9 +2345,22 @@ def сгенерировать_страницы_для_всех_постов():
     except Exception as e:
         print(f"⚠️ Ошибка при загрузке изображений: {e}")
     
-    # Обновляем sitemap
-    обновить_sitemap()
-    print("✅ Sitemap обновлён")
+    # Sitemap переписываем, только если изменился набор страниц
+    изменения = сгенерировано or json_dirty or (удалить_осиротевшие and собранные_ранее)
+    if изменения or set(прошлые_записи) != set(записи) or not SITEMAP_FILE.exists():
+        обновить_sitemap()
+        print("✅ Sitemap обновлён")
+    else:
+        print("ℹ️ Страницы не менялись — sitemap не переписываю")
 
 if __name__ == '__main__':
-    сгенерировать_страницы_для_всех_постов()
+    # --full: пересобрать все страницы; --prune-orphans: удалить страницы удалённых постов;
+    # --jobs N: число процессов отрисовки (по умолчанию BLOG_RENDER_JOBS)
+    jobs = BLOG_RENDER_JOBS
+    if '--jobs' in sys.argv:
+        jobs = int(sys.argv[sys.argv.index('--jobs') + 1])
+    сгенерировать_страницы_для_всех_постов(
+        полная_сборка='--full' in sys.argv,
+        удалить_осиротевшие='--prune-orphans' in sys.argv,
+        jobs=jobs
+    )
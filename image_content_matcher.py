@@ -10,12 +10,22 @@
 """
 
 import os
-import requests
 import json
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
 from typing import List, Dict, Tuple, Optional
 
+import deepseek_client
+from image_prefilter import проверить_локально
+from image_phash import ИНДЕКС_ИЗОБРАЖЕНИЙ
+
 DEEPSEEK_API_KEY = os.getenv('DEEPSEEK_API_KEY')
+# Сколько кандидатов проверять параллельно, если пакетная оценка не удалась
+IMAGE_JUDGE_WORKERS = int(os.getenv('IMAGE_JUDGE_WORKERS', '4'))
+# Оценка, при которой параллельная проверка останавливается на найденном победителе
+IMAGE_JUDGE_HIGH_CONFIDENCE = float(os.getenv('IMAGE_JUDGE_HIGH_CONFIDENCE', '0.9'))
+# Признаки подкастов/логотипов в alt/title
+ALT_REJECT_MARKERS = ['podcast', 'episode', 'logo', 'training science', 'the training science']
 
 def проверить_соответствие_изображения_строго_через_deepseek(
     url_изображения: str,
@@ -28,12 +38,6 @@ def проверить_соответствие_изображения_стро
         return True, 0.5, "DeepSeek не настроен, пропускаем строгую проверку"
     
     try:
-        url = "https://api.deepseek.com/v1/chat/completions"
-        headers = {
-            "Content-Type": "application/json",
-            "Authorization": f"Bearer {DEEPSEEK_API_KEY}"
-        }
-        
         system_prompt = """Ты очень строгий редактор фитнес‑контента.
 Нужно допускать только изображения без логотипов, баннеров, надписей и рекламных элементов.
 Подходят только чистые фото фитнеса/тренировок/питания, напрямую связанные с текстом статьи.
@@ -55,23 +59,16 @@ def проверить_соответствие_изображения_стро
 Alt/Title: {alt_текст or 'нет'}
 URL изображения: {url_изображения}"""
         
-        data = {
-            "model": "deepseek-chat",
-            "messages": [
+        анализ = deepseek_client.chat_json(
+            [
                 {"role": "system", "content": system_prompt},
                 {"role": "user", "content": user_prompt}
             ],
-            "temperature": 0.1,
-            "max_tokens": 200,
-            "response_format": {"type": "json_object"}
-        }
-        
-        response = requests.post(url, headers=headers, json=data, timeout=30)
-        response.raise_for_status()
-        result = response.json()
-        ответ = result['choices'][0]['message']['content']
-        
-        анализ = json.loads(ответ)
+            temperature=0.1,
+            max_tokens=200,
+            timeout=30,
+            purpose='image_strict'
+        )
         соответствует = анализ.get('соответствует', False)
         оценка = float(анализ.get('оценка', 0.0))
         объяснение = анализ.get('объяснение', 'Строгая проверка')
@@ -93,7 +90,11 @@ def проверить_изображение_в_два_этапа(
     заголовок_статьи: str,
     текст_статьи: str
 ) -> Tuple[bool, float, str]:
-    """Двухэтапный контроль качества изображения."""
+    """Двухэтапный контроль качества изображения (после локального фильтра)."""
+    проходит, причина = проверить_локально(url_изображения, alt_текст)
+    if not проходит:
+        return False, 0.0, f"Локальный фильтр: {причина}"
+    
     ok1, score1, exp1 = проверить_соответствие_изображения_контенту_через_deepseek(
         url_изображения, alt_текст, заголовок_статьи, текст_статьи
     )
@@ -134,13 +135,6 @@ def проверить_соответствие_изображения_конт
         return True, 0.5, "DeepSeek не настроен, пропускаем проверку"
     
     try:
-        url = "https://api.deepseek.com/v1/chat/completions"
-        
-        headers = {
-            "Content-Type": "application/json",
-            "Authorization": f"Bearer {DEEPSEEK_API_KEY}"
-        }
-        
         system_prompt = """Ты эксперт по анализу соответствия изображений контенту статей о фитнесе и здоровье.
 
 Твоя задача: проанализировать, соответствует ли изображение (по его описанию/alt тексту) контенту статьи.
@@ -185,26 +179,21 @@ URL изображения: {url_изображения[:100]}
 
 Проанализируй соответствие изображения контенту статьи. Верни только JSON без дополнительного текста."""
         
-        data = {
-            "model": "deepseek-chat",
-            "messages": [
+        ответ = deepseek_client.chat_text(
+            [
                 {"role": "system", "content": system_prompt},
                 {"role": "user", "content": user_prompt}
             ],
-            "temperature": 0.3,  # Низкая температура для более точного анализа
-            "max_tokens": 200,
-            "response_format": {"type": "json_object"}
-        }
-        
-        response = requests.post(url, headers=headers, json=data, timeout=30)
-        response.raise_for_status()
-        
-        result = response.json()
-        ответ = result['choices'][0]['message']['content']
+            temperature=0.3,  # Низкая температура для более точного анализа
+            max_tokens=200,
+            timeout=30,
+            json_mode=True,
+            purpose='image_match'
+        )
         
         # Парсим JSON ответ
         try:
-            анализ = json.loads(ответ)
+            анализ = deepseek_client.parse_json(ответ)
             соответствует = анализ.get('соответствует', True)
             оценка = float(анализ.get('оценка', 0.5))
             объяснение = анализ.get('объяснение', 'Проверка выполнена')
@@ -219,7 +208,7 @@ URL изображения: {url_изображения[:100]}
             
             # ДОПОЛНИТЕЛЬНАЯ ПРОВЕРКА: Проверяем alt/title текст на наличие признаков подкастов, логотипов
             alt_нижний = (alt_текст or '').lower()
-            if any(маркер in alt_нижний for маркер in ['podcast', 'episode', 'logo', 'training science', 'the training science']):
+            if any(маркер in alt_нижний for маркер in ALT_REJECT_MARKERS):
                 print(f"  ❌ Изображение отклонено: alt/title содержит признаки подкаста/логотипа")
                 return False, 0.0, f"Изображение связано с подкастом/логотипом (не подходит для блога)"
             
@@ -233,6 +222,141 @@ URL изображения: {url_изображения[:100]}
         # При ошибке не блокируем, но логируем
         return True, 0.5, f"Ошибка: {str(e)[:50]}"
 
+def оценить_изображения_пакетом(
+    изображения: List[Dict],
+    заголовок_статьи: str,
+    текст_статьи: str
+) -> Optional[List[Tuple[bool, float, str]]]:
+    """
+    Оценивает все изображения-кандидаты одним запросом к DeepSeek.
+
+    Критерии те же, что у двух этапов проверки (без логотипов и текста,
+    высокая релевантность, оценка не ниже 0.7), но вместо двух запросов
+    на каждое изображение — один на статью.
+
+    Returns:
+        [(соответствует, оценка, объяснение)] в порядке изображений или None,
+        если DeepSeek не настроен или ответ не покрывает всех кандидатов
+    """
+    if not DEEPSEEK_API_KEY or not изображения:
+        return None
+    
+    system_prompt = """Ты очень строгий редактор фитнес‑контента.
+Тебе дан пронумерованный список изображений-кандидатов (URL и alt/title) для одной статьи.
+Оцени КАЖДОЕ изображение отдельно.
+Подходят только чистые фото фитнеса/тренировок/питания без логотипов, баннеров, надписей и рекламы,
+напрямую связанные с текстом статьи.
+
+Формат ответа (строго JSON):
+{
+  "изображения": [
+    {
+      "номер": 1,
+      "соответствует": true/false,
+      "оценка": 0.0-1.0,
+      "объяснение": "краткое объяснение на русском",
+      "есть_логотип": true/false,
+      "есть_текст_на_изображении": true/false,
+      "релевантность_контенту": "высокая/средняя/низкая"
+    }
+  ]
+}
+
+ЕСЛИ есть логотип ИЛИ текст ИЛИ релевантность не высокая — вернуть "соответствует": false."""
+    
+    кандидаты = '\n'.join(
+        f"{номер}. URL: {img.get('url', '')[:150]} | Alt/Title: {img.get('alt', '') or img.get('title', '') or 'нет'}"
+        for номер, img in enumerate(изображения, 1)
+    )
+    user_prompt = f"""Заголовок статьи: {заголовок_статьи}
+Текст статьи (фрагмент): {текст_статьи[:1200]}
+
+Изображения:
+{кандидаты}"""
+    
+    try:
+        анализ = deepseek_client.chat_json(
+            [
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": user_prompt}
+            ],
+            temperature=0.1,
+            max_tokens=120 * len(изображения) + 100,
+            timeout=60,
+            purpose='image_batch'
+        )
+        вердикты = {int(в.get('номер', 0)): в for в in анализ.get('изображения', []) if isinstance(в, dict)}
+    except Exception as e:
+        print(f"⚠️ Пакетная оценка изображений через DeepSeek не удалась: {e}")
+        return None
+    
+    if any(номер not in вердикты for номер in range(1, len(изображения) + 1)):
+        print(f"⚠️ DeepSeek оценил {len(вердикты)} из {len(изображения)} изображений, проверяю по одному")
+        return None
+    
+    результаты = []
+    for номер, img in enumerate(изображения, 1):
+        вердикт = вердикты[номер]
+        try:
+            оценка = float(вердикт.get('оценка', 0.0))
+        except (TypeError, ValueError):
+            оценка = 0.0
+        alt_нижний = (img.get('alt', '') or img.get('title', '') or '').lower()
+        if (вердикт.get('есть_логотип', False) or вердикт.get('есть_текст_на_изображении', False)
+                or вердикт.get('релевантность_контенту', 'низкая') != 'высокая'):
+            результаты.append((False, 0.0, "Строгий фильтр: логотип/текст/низкая релевантность"))
+        elif any(маркер in alt_нижний for маркер in ALT_REJECT_MARKERS):
+            результаты.append((False, 0.0, "Изображение связано с подкастом/логотипом (не подходит для блога)"))
+        else:
+            соответствует = bool(вердикт.get('соответствует', False)) and оценка >= 0.7
+            результаты.append((соответствует, оценка, вердикт.get('объяснение', 'Пакетная проверка')))
+    return результаты
+
+def _оценить_изображения_параллельно(
+    изображения: List[Dict],
+    заголовок_статьи: str,
+    текст_статьи: str
+) -> List[Tuple[int, Tuple[bool, float, str]]]:
+    """
+    Двухэтапная проверка кандидатов в пуле потоков.
+
+    Останавливается, как только найдено подходящее изображение с оценкой
+    не ниже IMAGE_JUDGE_HIGH_CONFIDENCE: ещё не начатые проверки отменяются.
+
+    Returns:
+        [(индекс изображения, (соответствует, оценка, объяснение))] для проверенных
+    """
+    результаты = []
+    with ThreadPoolExecutor(max_workers=max(1, min(IMAGE_JUDGE_WORKERS, len(изображения)))) as executor:
+        futures = {
+            executor.submit(
+                проверить_изображение_в_два_этапа,
+                img.get('url', ''), img.get('alt', '') or img.get('title', ''), заголовок_статьи, текст_статьи
+            ): индекс
+            for индекс, img in enumerate(изображения)
+        }
+        for future in as_completed(futures):
+            результат = future.result()
+            результаты.append((futures[future], результат))
+            соответствует, оценка, _ = результат
+            if соответствует and оценка >= IMAGE_JUDGE_HIGH_CONFIDENCE:
+                отменено = sum(f.cancel() for f in futures if not f.done())
+                if отменено:
+                    print(f"  ⏭️ Найдено изображение с оценкой {оценка:.2f}, остальные {отменено} не проверяю")
+                break
+    return sorted(результаты, key=lambda пара: пара[0])
+
+def _проверить_кандидата_локально(img: Dict) -> Tuple[bool, str]:
+    """Локальный фильтр и поиск того же фото среди опубликованных (без DeepSeek)."""
+    img_url = img.get('url', '')
+    проходит, причина = проверить_локально(img_url, img.get('alt', '') or img.get('title', ''))
+    if not проходит:
+        return False, причина
+    повтор = ИНДЕКС_ИЗОБРАЖЕНИЙ.find_duplicate_url(img_url)
+    if повтор:
+        return False, f"то же фото уже опубликовано (расстояние {повтор[0]}/64)"
+    return True, ''
+
 def выбрать_лучшее_изображение_для_контента(
     список_изображений: List[Dict],
     заголовок_статьи: str,
@@ -292,15 +416,35 @@ def выбрать_лучшее_изображение_для_контента(
         # Если все изображения уже используются, берем первое (но это не идеально)
         return список_изображений[0] if список_изображений else None
     
-    # Оцениваем каждое уникальное изображение через DeepSeek
+    # Оцениваем кандидатов через DeepSeek: одним пакетным запросом,
+    # иначе параллельно по два этапа с остановкой на уверенном победителе
+    кандидаты = уникальные_изображения[:10]  # Увеличиваем до 10 для большего разнообразия
+    
+    # Логотипы, иконки, миниатюры, баннеры и уже опубликованные под другим URL фото
+    # отсекаем локально, до DeepSeek
+    ИНДЕКС_ИЗОБРАЖЕНИЙ.add_urls(существующие_изображения, local_only=True)
+    with ThreadPoolExecutor(max_workers=max(1, min(IMAGE_JUDGE_WORKERS, len(кандидаты)))) as executor:
+        локальные = list(executor.map(_проверить_кандидата_локально, кандидаты))
+    проверенные = [(индекс, (False, 0.0, f"Локальный фильтр: {причина}"))
+                   for индекс, (проходит, причина) in enumerate(локальные) if not проходит]
+    прошедшие = [индекс for индекс, (проходит, _) in enumerate(локальные) if проходит]
+    if проверенные:
+        print(f"  🧹 Локальный фильтр отклонил {len(проверенные)} из {len(кандидаты)} изображений")
+    
+    if прошедшие:
+        прошедшие_изображения = [кандидаты[индекс] for индекс in прошедшие]
+        пакет = оценить_изображения_пакетом(прошедшие_изображения, заголовок_статьи, текст_статьи)
+        if пакет is None:
+            пакет_пары = _оценить_изображения_параллельно(прошедшие_изображения, заголовок_статьи, текст_статьи)
+        else:
+            пакет_пары = list(enumerate(пакет))
+        проверенные += [(прошедшие[номер], результат) for номер, результат in пакет_пары]
+    проверенные.sort(key=lambda пара: пара[0])
+    
     оценки_изображений = []
-    for img in уникальные_изображения[:10]:  # Увеличиваем до 10 для большего разнообразия
+    for индекс, (соответствует, оценка, объяснение) in проверенные:
+        img = кандидаты[индекс]
         img_url = img.get('url', '')
-        alt_текст = img.get('alt', '') or img.get('title', '')
-        
-        соответствует, оценка, объяснение = проверить_изображение_в_два_этапа(
-            img_url, alt_текст, заголовок_статьи, текст_статьи
-        )
         
         оценки_изображений.append({
             'изображение': img,
@@ -316,14 +460,16 @@ def выбрать_лучшее_изображение_для_контента(
     # Сортируем по оценке (лучшие первыми)
     оценки_изображений.sort(key=lambda x: x['оценка'], reverse=True)
     
-    # Проверяем, все ли изображения имеют одинаковую оценку (например, 0.50 когда DeepSeek не настроен)
-    все_одинаковые_оценки = len(оценки_изображений) > 0 and all(
-        abs(оценка['оценка'] - оценки_изображений[0]['оценка']) < 0.01
-        for оценка in оценки_изображений
+    # Проверяем, все ли изображения имеют одинаковую оценку (например, 0.50 когда DeepSeek не настроен);
+    # отклонённые локальным фильтром в сравнение не входят
+    оценённые = [о for о in оценки_изображений if not о['объяснение'].startswith('Локальный фильтр')]
+    все_одинаковые_оценки = len(оценённые) > 0 and all(
+        abs(оценка['оценка'] - оценённые[0]['оценка']) < 0.01
+        for оценка in оценённые
     )
     
     # Если все оценки одинаковые, используем индекс для разнообразия
-    if все_одинаковые_оценки and len(оценки_изображений) > 1:
+    if все_одинаковые_оценки and len(оценённые) > 1:
         # Фильтруем только те, которые соответствуют контенту
         соответствующие = [о for о in оценки_изображений if о['соответствует']]
         if соответствующие:
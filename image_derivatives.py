@@ -0,0 +1,225 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+    Уменьшенные WebP-варианты изображений блога для srcset
+
+    Источник скачивается как есть (часто JPEG на 1–3 МБ), а страницы и
+    миниатюры галереи ссылались на этот оригинал. Здесь для каждого
+    изображения из images/blog/ создаются WebP-варианты по ширинам
+    (миниатюра, галерея, hero) в images/blog/derived/, а страницы получают
+    srcset/sizes. Оригинал остаётся в src как запасной вариант.
+
+    Варианты именуются по SHA-256 содержимого источника, поэтому одинаковые
+    файлы не пережимаются дважды; манифест кэширует хеш по размеру и mtime.
+    Кодирование идёт в пуле процессов. Без Pillow модуль ничего не делает,
+    и страницы остаются без srcset.
+
+    Автор: VR-Lounge
+"""
+
+import hashlib
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterable, Optional
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:
+    Image = None
+
+
+# Ширины вариантов: миниатюра галереи (120px @2x), основное фото галереи и hero
+DERIVATIVE_WIDTHS = {'thumb': 240, 'gallery': 960, 'hero': 1600}
+DERIVATIVE_QUALITY = int(os.getenv('IMAGE_DERIVATIVE_QUALITY', '80'))
+DERIVATIVE_WORKERS = int(os.getenv('IMAGE_DERIVATIVE_WORKERS', str(os.cpu_count() or 2)))
+DERIVED_DIR_NAME = 'derived'
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.webp', '.gif', '.bmp', '.tif', '.tiff')
+
+# Загруженный манифест: имя исходного файла -> {size, mtime, sha256, width, height, variants}
+_files: Optional[Dict[str, Dict]] = None
+
+
+def доступен() -> bool:
+    """Pillow установлен и варианты можно создавать."""
+    return Image is not None
+
+
+def _sha256(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _settings() -> Dict:
+    return {'widths': sorted(DERIVATIVE_WIDTHS.values()), 'quality': DERIVATIVE_QUALITY, 'format': 'webp'}
+
+
+def загрузить_манифест(manifest_path: Path) -> Dict[str, Dict]:
+    """Читает манифест; при смене ширин/качества он считается пустым."""
+    global _files
+    _files = {}
+    if manifest_path and Path(manifest_path).exists():
+        try:
+            with open(manifest_path, 'r', encoding='utf-8') as f:
+                данные = json.load(f)
+            if данные.get('settings') == _settings():
+                _files = данные.get('files', {})
+        except Exception as e:
+            print(f"⚠️ Не удалось прочитать манифест вариантов изображений: {e}")
+    return _files
+
+
+def _сохранить_манифест(manifest_path: Path, files: Dict[str, Dict]) -> None:
+    try:
+        with open(manifest_path, 'w', encoding='utf-8') as f:
+            json.dump({
+                'version': 1,
+                'settings': _settings(),
+                'updated_at': datetime.now().isoformat(),
+                'files': files
+            }, f, ensure_ascii=False, indent=2)
+    except Exception as e:
+        print(f"⚠️ Не удалось сохранить манифест вариантов изображений: {e}")
+
+
+def _создать_варианты(задача):
+    """Создаёт недостающие WebP-варианты одного изображения (выполняется в дочернем процессе)."""
+    путь, хеш, каталог, ширины, качество = задача
+    with Image.open(путь) as исходное:
+        if getattr(исходное, 'is_animated', False):
+            return None  # анимацию в статичный WebP не превращаем
+        изображение = ImageOps.exif_transpose(исходное)
+        if изображение.mode not in ('RGB', 'RGBA'):
+            прозрачное = изображение.mode in ('LA', 'PA') or 'transparency' in изображение.info
+            изображение = изображение.convert('RGBA' if прозрачное else 'RGB')
+        ширина, высота = изображение.size
+        # Не увеличиваем; если источник уже меньше hero — добавляем WebP в исходной ширине
+        целевые = [w for w in ширины if w < ширина]
+        if ширина <= max(ширины):
+            целевые.append(ширина)
+        варианты = {}
+        for w in sorted(set(целевые)):
+            имя = f"{хеш[:20]}-{w}.webp"
+            цель = Path(каталог) / имя
+            if not цель.exists():
+                h = max(1, round(высота * w / ширина))
+                копия = изображение if w == ширина else изображение.resize((w, h), Image.LANCZOS)
+                временный = цель.with_name(f".{имя}.{os.getpid()}.tmp")
+                копия.save(временный, 'WEBP', quality=качество, method=4)
+                os.replace(временный, цель)
+            варианты[str(w)] = имя
+    return {'width': ширина, 'height': высота, 'variants': варианты}
+
+
+def подготовить_варианты(
+    images_dir: Path,
+    names: Iterable[str],
+    manifest_path: Path,
+    *,
+    workers: int = None
+) -> Dict[str, int]:
+    """
+    Создаёт недостающие варианты для файлов names из images_dir.
+
+    Уже обработанные файлы (тот же размер и mtime или тот же SHA-256)
+    пропускаются; варианты пишутся в images_dir/derived/.
+
+    Returns:
+        {'created': N, 'cached': N, 'failed': N}
+    """
+    files = загрузить_манифест(manifest_path)
+    итог = {'created': 0, 'cached': 0, 'failed': 0}
+    if not доступен():
+        return итог
+
+    images_dir = Path(images_dir)
+    derived_dir = images_dir / DERIVED_DIR_NAME
+    derived_dir.mkdir(parents=True, exist_ok=True)
+    ширины = sorted(DERIVATIVE_WIDTHS.values())
+
+    задачи = []
+    for имя in sorted(set(names)):
+        путь = images_dir / имя
+        if путь.suffix.lower() not in IMAGE_EXTENSIONS or not путь.is_file():
+            continue
+        stat = путь.stat()
+        запись = files.get(имя, {})
+        if запись.get('size') == stat.st_size and запись.get('mtime') == stat.st_mtime and 'variants' in запись:
+            if all((derived_dir / v).exists() for v in запись['variants'].values()):
+                итог['cached'] += 1
+                continue
+        хеш = _sha256(путь)
+        # Тот же источник под другим именем — варианты уже есть
+        готовая = next((з for з in files.values() if з.get('sha256') == хеш and 'variants' in з), None)
+        if готовая and all((derived_dir / v).exists() for v in готовая['variants'].values()):
+            files[имя] = dict(готовая, size=stat.st_size, mtime=stat.st_mtime)
+            итог['cached'] += 1
+            continue
+        files[имя] = {'size': stat.st_size, 'mtime': stat.st_mtime, 'sha256': хеш}
+        задачи.append((имя, (str(путь), хеш, str(derived_dir), ширины, DERIVATIVE_QUALITY)))
+
+    if задачи:
+        workers = max(1, min(workers or DERIVATIVE_WORKERS, len(задачи)))
+        print(f"🖼️ Создаю WebP-варианты для {len(задачи)} изображений ({workers} процессов)")
+
+        def _учесть(имя, результат):
+            if результат is None:
+                files[имя]['variants'] = {}
+            else:
+                files[имя].update(результат)
+            итог['created'] += 1
+
+        if workers > 1:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                futures = [(имя, executor.submit(_создать_варианты, задача)) for имя, задача in задачи]
+                for имя, future in futures:
+                    try:
+                        _учесть(имя, future.result())
+                    except Exception as e:
+                        files.pop(имя, None)
+                        итог['failed'] += 1
+                        print(f"⚠️ Не удалось создать варианты {имя}: {e}")
+        else:
+            for имя, задача in задачи:
+                try:
+                    _учесть(имя, _создать_варианты(задача))
+                except Exception as e:
+                    files.pop(имя, None)
+                    итог['failed'] += 1
+                    print(f"⚠️ Не удалось создать варианты {имя}: {e}")
+
+    # Записи удалённых источников и варианты, на которые никто не ссылается
+    for имя in [имя for имя in files if not (images_dir / имя).exists()]:
+        del files[имя]
+    нужные = {v for запись in files.values() for v in запись.get('variants', {}).values()}
+    for файл in derived_dir.glob('*.webp'):
+        if файл.name not in нужные:
+            файл.unlink()
+
+    _сохранить_манифест(manifest_path, files)
+    return итог
+
+
+def srcset(url: str, manifest_path: Path = None) -> Optional[str]:
+    """
+    srcset из WebP-вариантов для URL изображения из images/blog/
+    или None, если вариантов нет (внешний URL, Pillow не установлен и т.п.).
+    """
+    global _files
+    if not url or '/images/blog/' not in url:
+        return None
+    if _files is None:
+        загрузить_манифест(manifest_path)
+    база, имя = url.split('?')[0].rsplit('/', 1)
+    запись = _files.get(имя)
+    if not запись or not запись.get('variants'):
+        return None
+    return ', '.join(
+        f"{база}/{DERIVED_DIR_NAME}/{вариант} {ширина}w"
+        for ширина, вариант in sorted(запись['variants'].items(), key=lambda item: int(item[0]))
+    )
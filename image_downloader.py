@@ -5,6 +5,11 @@
     
     Скачивает изображения из интернета, сохраняет локально
     и загружает в Yandex Cloud Object Storage для доступа из России.
+
+    Изображения хранятся по содержимому: индекс .image-store.json связывает
+    URL источника с SHA-256 байтов, а SHA-256 — с единственным файлом в
+    images/blog/. Тот же снимок по другому URL или из другого поста не
+    сохраняется второй раз: возвращается ссылка на уже сохранённый файл.
     
     Автор: VR-Lounge
 """
@@ -13,12 +18,16 @@ import os
 import re
 import requests
 import hashlib
+import json
+import threading
+from datetime import datetime
 from pathlib import Path
 from urllib.parse import urlparse, urljoin
 import subprocess
 import time
 
 from image_content_matcher import проверить_изображение_в_два_этапа
+import s3_sync
 
 # Определяем пути
 SCRIPT_DIR = Path(__file__).parent.absolute()
@@ -36,26 +45,126 @@ BLOG_IMAGES_DIR.mkdir(parents=True, exist_ok=True)
 
 # Настройки Yandex Cloud
 BUCKET_NAME = "www.tabatatimer.ru"
-ENDPOINT_URL = "https://storage.yandexcloud.net"
+# Адрес хранилища общий с s3_sync (переопределяется через S3_ENDPOINT_URL, например для MinIO)
+ENDPOINT_URL = s3_sync.S3_ENDPOINT_URL
 YANDEX_ACCESS_KEY_ID = os.getenv('YANDEX_ACCESS_KEY_ID')
 YANDEX_SECRET_ACCESS_KEY = os.getenv('YANDEX_SECRET_ACCESS_KEY')
+# Кэш MD5 и отметки загрузки изображений (не публикуется: лежит вне images/blog)
+UPLOAD_MANIFEST_FILE = REPO_ROOT / 'public_html' / '.s3-upload-manifest.json'
+# WebP-варианты для srcset (image_derivatives) и их отдельный манифест загрузки
+BLOG_DERIVED_DIR = BLOG_IMAGES_DIR / 'derived'
+UPLOAD_DERIVED_MANIFEST_FILE = REPO_ROOT / 'public_html' / '.s3-upload-manifest-derived.json'
+# Индекс хранилища изображений: URL -> SHA-256 содержимого, SHA-256 -> файл в images/blog
+IMAGE_STORE_FILE = REPO_ROOT / 'public_html' / '.image-store.json'
 
-def скачать_изображение(url, post_id=None):
+_store_lock = threading.RLock()
+_store = None
+
+
+def _sha256_файла(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _загрузить_хранилище():
     """
-    Скачивает изображение из интернета и сохраняет локально
-    
-    Args:
-        url: URL изображения
-        post_id: ID поста для создания уникального имени файла
-    
+    Индекс хранилища {'urls': {url: sha256}, 'files': {sha256: имя файла}}.
+
+    Файлы images/blog/, которых нет в индексе (скачанные до появления
+    хранилища или добавленные вручную), хешируются один раз при загрузке;
+    для байт-в-байт копий каноническим остаётся первый по имени файл.
+    """
+    global _store
+    with _store_lock:
+        if _store is not None:
+            return _store
+        _store = {'urls': {}, 'files': {}}
+        if IMAGE_STORE_FILE.exists():
+            try:
+                with open(IMAGE_STORE_FILE, 'r', encoding='utf-8') as f:
+                    данные = json.load(f)
+                _store['urls'] = данные.get('urls', {})
+                _store['files'] = данные.get('files', {})
+            except Exception as e:
+                print(f"⚠️ Не удалось прочитать индекс хранилища изображений: {e}")
+        # Записи о файлах, которых больше нет
+        _store['files'] = {h: имя for h, имя in _store['files'].items() if (BLOG_IMAGES_DIR / имя).is_file()}
+        _store['urls'] = {url: h for url, h in _store['urls'].items() if h in _store['files']}
+        известные = set(_store['files'].values())
+        новые = sorted(p for p in BLOG_IMAGES_DIR.glob('*.*')
+                       if p.is_file() and not p.name.startswith('.') and p.name not in известные)
+        for path in новые:
+            _store['files'].setdefault(_sha256_файла(path), path.name)
+        if новые:
+            _сохранить_хранилище()
+        return _store
+
+
+def _сохранить_хранилище():
+    try:
+        временный = IMAGE_STORE_FILE.with_name(f".{IMAGE_STORE_FILE.name}.{os.getpid()}.tmp")
+        with open(временный, 'w', encoding='utf-8') as f:
+            json.dump({
+                'version': 1,
+                'updated_at': datetime.now().isoformat(),
+                'urls': _store['urls'],
+                'files': _store['files']
+            }, f, ensure_ascii=False, indent=2)
+        os.replace(временный, IMAGE_STORE_FILE)
+    except Exception as e:
+        print(f"⚠️ Не удалось сохранить индекс хранилища изображений: {e}")
+
+
+def _файл_по_url(url):
+    """Имя уже сохранённого файла для URL источника или None"""
+    with _store_lock:
+        хранилище = _загрузить_хранилище()
+        имя = хранилище['files'].get(хранилище['urls'].get(url))
+    return имя if имя and (BLOG_IMAGES_DIR / имя).is_file() else None
+
+
+def _сохранить_содержимое(url, временный_путь, filename):
+    """
+    Переносит скачанный файл в хранилище под именем filename или, если такие
+    байты уже сохранены, удаляет его и возвращает имя существующего файла.
+    """
+    digest = _sha256_файла(временный_путь)
+    with _store_lock:
+        хранилище = _загрузить_хранилище()
+        существующий = хранилище['files'].get(digest)
+        if существующий and (BLOG_IMAGES_DIR / существующий).is_file():
+            временный_путь.unlink()
+            filename = существующий
+        else:
+            os.replace(временный_путь, BLOG_IMAGES_DIR / filename)
+            хранилище['files'][digest] = filename
+        хранилище['urls'][url] = digest
+        _сохранить_хранилище()
+    return filename
+
+
+def _сохранить_изображение(url, post_id=None):
+    """
+    Скачивает изображение в хранилище.
+
     Returns:
-        tuple: (локальный_путь, yandex_url) или (None, None) при ошибке
+        tuple: (локальный_путь, yandex_url, новый_файл) или (None, None, False) при ошибке
     """
+
     try:
         # Проверяем, что это валидный URL
         if not url or not url.startswith(('http://', 'https://')):
             print(f"⚠️ Некорректный URL изображения: {url}")
-            return None, None
+            return None, None, False
+        
+        # URL уже скачивался (в том числе для другого поста) — файл есть в хранилище
+        filename = _файл_по_url(url)
+        if filename:
+            print(f"✅ Изображение уже в хранилище: {filename}")
+            return str(BLOG_IMAGES_DIR / filename), f"https://www.tabatatimer.ru/images/blog/{filename}", False
         
         # Создаём уникальное имя файла
         parsed_url = urlparse(url)
@@ -78,11 +187,17 @@ def скачать_изображение(url, post_id=None):
         
         local_path = BLOG_IMAGES_DIR / filename
         
-        # Если файл уже существует, возвращаем его
+        # Если файл уже существует (скачан до появления индекса), возвращаем его
         if local_path.exists():
             print(f"✅ Изображение уже скачано: {filename}")
+            with _store_lock:
+                хранилище = _загрузить_хранилище()
+                digest = next((h for h, имя in хранилище['files'].items() if имя == filename), None)
+                if digest:
+                    хранилище['urls'][url] = digest
+                    _сохранить_хранилище()
             yandex_url = f"https://www.tabatatimer.ru/images/blog/{filename}"
-            return str(local_path), yandex_url
+            return str(local_path), yandex_url, False
         
         # Скачиваем изображение
         print(f"📥 Скачиваю изображение: {url[:80]}...")
@@ -96,23 +211,45 @@ def скачать_изображение(url, post_id=None):
         content_type = response.headers.get('Content-Type', '')
         if not content_type.startswith('image/'):
             print(f"⚠️ URL не является изображением (Content-Type: {content_type})")
-            return None, None
-        
-        # Сохраняем файл
-        with open(local_path, 'wb') as f:
-            for chunk in response.iter_content(chunk_size=8192):
-                f.write(chunk)
+            return None, None, False
         
-        print(f"✅ Изображение скачано: {filename} ({local_path.stat().st_size} bytes)")
+        # Сохраняем во временный файл: имя в хранилище зависит от содержимого
+        временный_путь = BLOG_IMAGES_DIR / f".{filename}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(временный_путь, 'wb') as f:
+                for chunk in response.iter_content(chunk_size=8192):
+                    f.write(chunk)
+            размер = временный_путь.stat().st_size
+            сохранённый = _сохранить_содержимое(url, временный_путь, filename)
+        finally:
+            if временный_путь.exists():
+                временный_путь.unlink()
         
-        # Формируем URL для Yandex Cloud
-        yandex_url = f"https://www.tabatatimer.ru/images/blog/{filename}"
+        yandex_url = f"https://www.tabatatimer.ru/images/blog/{сохранённый}"
+        if сохранённый != filename:
+            print(f"♻️ Такое изображение уже сохранено: {сохранённый} (повторно не сохраняю)")
+            return str(BLOG_IMAGES_DIR / сохранённый), yandex_url, False
         
-        return str(local_path), yandex_url
+        print(f"✅ Изображение скачано: {filename} ({размер} bytes)")
+        return str(local_path), yandex_url, True
         
     except Exception as e:
         print(f"❌ Ошибка при скачивании изображения {url}: {e}")
-        return None, None
+        return None, None, False
+
+def скачать_изображение(url, post_id=None):
+    """
+    Скачивает изображение из интернета и сохраняет локально
+    
+    Args:
+        url: URL изображения
+        post_id: ID поста для создания уникального имени файла
+    
+    Returns:
+        tuple: (локальный_путь, yandex_url) или (None, None) при ошибке
+    """
+    локальный_путь, yandex_url, _ = _сохранить_изображение(url, post_id)
+    return локальный_путь, yandex_url
 
 def загрузить_в_yandex_cloud(локальный_путь, yandex_путь=None):
     """
@@ -226,8 +363,8 @@ def скачать_и_загрузить_изображение(
             print(f"❌ DeepSeek (2 этапа) отклонил изображение: {объяснение}")
             return None
     
-    # Скачиваем изображение
-    локальный_путь, yandex_url = скачать_изображение(url, post_id)
+    # Скачиваем изображение (или берём уже сохранённый файл с теми же байтами)
+    локальный_путь, yandex_url, новый_файл = _сохранить_изображение(url, post_id)
     
     # ✅ Для skinnyms.com не отклоняем, если скачивание не удалось - вернём оригинальный URL
     if not локальный_путь:
@@ -242,6 +379,10 @@ def скачать_и_загрузить_изображение(
         print("⚠️ Yandex креды не заданы — использую локальный файл, загрузка будет позже")
         return yandex_url
 
+    if not новый_файл:
+        # Файл из хранилища уже загружался; пропущенное догрузит синхронизация после генерации
+        return yandex_url
+
     успех = загрузить_в_yandex_cloud(локальный_путь)
     if успех:
         return yandex_url
@@ -260,11 +401,40 @@ def загрузить_все_изображения_блога():
         print(f"⚠️ Папка с изображениями не найдена: {BLOG_IMAGES_DIR}")
         return False
     
-    images = list(BLOG_IMAGES_DIR.glob('*.*'))
+    images = [p for p in BLOG_IMAGES_DIR.glob('*.*') if p.is_file()]
+    if BLOG_DERIVED_DIR.exists():
+        images += list(BLOG_DERIVED_DIR.glob('*.webp'))
     if not images:
         print("ℹ️ Нет изображений для загрузки")
         return True
     
+    if s3_sync.доступен():
+        # Загружаем только новые/изменённые файлы одним клиентом с пулом соединений
+        try:
+            client = s3_sync.создать_клиент(YANDEX_ACCESS_KEY_ID, YANDEX_SECRET_ACCESS_KEY)
+            итог = s3_sync.синхронизировать_папку(
+                BLOG_IMAGES_DIR,
+                BUCKET_NAME,
+                'images/blog/',
+                client=client,
+                manifest_path=UPLOAD_MANIFEST_FILE
+            )
+            if BLOG_DERIVED_DIR.exists():
+                итог_вариантов = s3_sync.синхронизировать_папку(
+                    BLOG_DERIVED_DIR,
+                    BUCKET_NAME,
+                    'images/blog/derived/',
+                    client=client,
+                    manifest_path=UPLOAD_DERIVED_MANIFEST_FILE,
+                    pattern='*.webp',
+                    delete=True  # варианты, удалённые image_derivatives, убираем и из бакета
+                )
+                итог = {ключ: итог[ключ] + итог_вариантов[ключ] for ключ in итог}
+            print(f"✅ Загружено: {итог['uploaded']}, без изменений: {итог['skipped']}, удалено: {итог['deleted']}, ошибок: {итог['failed']}")
+            return итог['failed'] == 0
+        except Exception as e:
+            print(f"⚠️ Синхронизация через S3-клиент не удалась, загружаю через AWS CLI: {e}")
+    
     print(f"📤 Загружаю {len(images)} изображений в Yandex Cloud...")
     
     env = os.environ.copy()
@@ -277,7 +447,7 @@ def загрузить_все_изображения_блога():
     
     for image_path in images:
         try:
-            yandex_путь = f"images/blog/{image_path.name}"
+            yandex_путь = f"images/blog/{image_path.relative_to(BLOG_IMAGES_DIR).as_posix()}"
             s3_path = f"s3://{BUCKET_NAME}/{yandex_путь}"
             
             result = subprocess.run(
@@ -0,0 +1,319 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+    Перцептивные хеши опубликованных изображений (поиск повторов фото)
+
+    Повторы изображений раньше искались только по строке URL, поэтому то же
+    фото с другого CDN, в другом размере или пережатое проходило проверку.
+    Здесь для каждого опубликованного изображения один раз считается dHash
+    (64 бита, Pillow) и сохраняется в state_db (выгружается в
+    .image_phashes.json). Поиск почти-дубликата — расстояние Хэмминга сразу
+    ко всем хешам через XOR и подсчёт битов в массиве NumPy.
+
+    Источники в индексе: 'blog' — изображения постов блога (в том числе
+    взятые из коллекций Fitness | Woman/Man и библиотеки), 'telegram' —
+    фото постов канала. Изображения сайта (https://www.tabatatimer.ru/images/...)
+    читаются из public_html, остальные скачиваются. Без Pillow модуль
+    ничего не находит, и остаются только проверки по URL.
+
+    Автор: VR-Lounge
+"""
+
+import io
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+from urllib.parse import unquote
+
+import numpy as np
+import requests
+
+import state_db
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:
+    Image = None
+
+
+# Расстояние Хэмминга (из 64 бит), до которого фото считается тем же самым
+IMAGE_PHASH_MAX_DISTANCE = int(os.getenv('IMAGE_PHASH_MAX_DISTANCE', '6'))
+IMAGE_PHASH_MAX_ITEMS = int(os.getenv('IMAGE_PHASH_MAX_ITEMS', '20000'))
+IMAGE_PHASH_WORKERS = int(os.getenv('IMAGE_PHASH_WORKERS', '4'))
+IMAGE_PHASH_TIMEOUT = float(os.getenv('IMAGE_PHASH_TIMEOUT', '15'))
+# dHash: 9x8 оттенков серого -> 8x8 сравнений соседних пикселей
+HASH_SIZE = 8
+
+SITE_IMAGES_URL = 'https://www.tabatatimer.ru/images/'
+
+# Определяем пути
+SCRIPT_DIR = Path(__file__).parent.absolute()
+if (SCRIPT_DIR.parent / 'public_html').exists():
+    REPO_ROOT = SCRIPT_DIR.parent
+elif (SCRIPT_DIR / 'public_html').exists():
+    REPO_ROOT = SCRIPT_DIR
+else:
+    REPO_ROOT = Path.cwd()
+    if not (REPO_ROOT / 'public_html').exists():
+        REPO_ROOT = REPO_ROOT.parent
+
+SITE_IMAGES_DIR = REPO_ROOT / 'public_html' / 'images'
+
+HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
+}
+
+# Число единичных битов для каждого байта
+_POPCOUNT = np.array([bin(i).count('1') for i in range(256)], dtype=np.uint8)
+
+
+def доступен() -> bool:
+    """Pillow установлен и хеши можно считать."""
+    return Image is not None
+
+
+def ключ_url(url: str) -> str:
+    """Нормализованный URL (без параметров запроса, в нижнем регистре)."""
+    return (url or '').split('?')[0].lower().strip()
+
+
+def расстояние(хеш1: int, хеш2: int) -> int:
+    """Расстояние Хэмминга между двумя 64-битными хешами."""
+    return bin(хеш1 ^ хеш2).count('1')
+
+
+def dhash(источник) -> Optional[int]:
+    """
+    64-битный dHash изображения (путь к файлу, bytes или файловый объект).
+
+    Устойчив к смене размера, пережатию и небольшим правкам цвета.
+    """
+    if Image is None:
+        return None
+    if isinstance(источник, (bytes, bytearray)):
+        источник = io.BytesIO(источник)
+    try:
+        with Image.open(источник) as изображение:
+            # JPEG декодируется сразу в уменьшенном масштабе
+            изображение.draft('L', ((HASH_SIZE + 1) * 8, HASH_SIZE * 8))
+            серое = ImageOps.exif_transpose(изображение).convert('L')
+            пиксели = серое.resize((HASH_SIZE + 1, HASH_SIZE), Image.LANCZOS).tobytes()
+    except Exception:
+        return None
+    хеш = 0
+    for строка in range(HASH_SIZE):
+        начало = строка * (HASH_SIZE + 1)
+        for столбец in range(HASH_SIZE):
+            хеш = (хеш << 1) | (пиксели[начало + столбец] < пиксели[начало + столбец + 1])
+    return хеш
+
+
+def _локальный_путь(url: str) -> Optional[Path]:
+    """Файл в public_html для URL изображения сайта или None."""
+    if url.startswith(SITE_IMAGES_URL):
+        путь = SITE_IMAGES_DIR / unquote(url.split('?')[0][len(SITE_IMAGES_URL):])
+    elif url.startswith('/images/'):
+        путь = SITE_IMAGES_DIR / unquote(url.split('?')[0][len('/images/'):])
+    else:
+        return None
+    return путь if путь.is_file() else None
+
+
+def хеш_по_url(url: str) -> Optional[int]:
+    """dHash изображения по URL: файл сайта читается с диска, остальное скачивается."""
+    if Image is None or not url:
+        return None
+    путь = _локальный_путь(url)
+    if путь is not None:
+        return dhash(путь)
+    if not url.startswith(('http://', 'https://')):
+        return dhash(url) if os.path.isfile(url) else None
+    try:
+        response = requests.get(url, headers=HEADERS, timeout=IMAGE_PHASH_TIMEOUT)
+        response.raise_for_status()
+    except Exception:
+        return None
+    return dhash(response.content)
+
+
+class ImagePHashIndex:
+    """
+    Индекс перцептивных хешей опубликованных изображений.
+
+    Хеши загружаются из state_db один раз; для каждого источника держится
+    массив uint64, и поиск считает расстояние Хэмминга до всех хешей
+    векторно (XOR + подсчёт битов по байтам). Новые хеши сразу видны в
+    индексе и пишутся в базу пачкой одной транзакцией (flush).
+    """
+
+    def __init__(self, max_items: int = IMAGE_PHASH_MAX_ITEMS):
+        self.max_items = max_items
+        self._keys: Dict[str, List[str]] = {}
+        self._hashes: Dict[str, List[int]] = {}
+        self._arrays: Dict[str, np.ndarray] = {}
+        self._positions: Dict[str, Dict[str, int]] = {}
+        self._by_key: Dict[str, int] = {}
+        # Хеши кандидатов, которые не публиковались (URL -> хеш или None)
+        self._computed: Dict[str, Optional[int]] = {}
+        self._pending: List[Dict] = []
+        self._loaded = False
+        self._lock = threading.RLock()
+
+    def _index(self, source: str, url_key: str, phash: int):
+        self._positions.setdefault(source, {})[url_key] = len(self._keys.get(source, []))
+        self._by_key[url_key] = phash
+        self._keys.setdefault(source, []).append(url_key)
+        self._hashes.setdefault(source, []).append(phash)
+        self._arrays.pop(source, None)
+
+    def _ensure_loaded(self):
+        if self._loaded:
+            return
+        self._loaded = True
+        self._keys, self._hashes, self._arrays, self._positions, self._by_key = {}, {}, {}, {}, {}
+        try:
+            for item in state_db.image_phashes():
+                self._index(item['source'], item['url_key'], item['phash'])
+        except Exception as e:
+            print(f"⚠️ Ошибка загрузки перцептивных хешей изображений: {e}")
+
+    def __len__(self) -> int:
+        with self._lock:
+            self._ensure_loaded()
+            return sum(len(keys) for keys in self._keys.values())
+
+    def _array(self, source: str) -> np.ndarray:
+        if source not in self._arrays:
+            self._arrays[source] = np.array(self._hashes.get(source, []), dtype=np.uint64)
+        return self._arrays[source]
+
+    def _contains(self, source: str, url_key: str) -> bool:
+        return url_key in self._positions.get(source, {})
+
+    def phash(self, url: str) -> Optional[int]:
+        """Хеш изображения (из индекса, если URL уже проиндексирован)"""
+        key = ключ_url(url)
+        with self._lock:
+            self._ensure_loaded()
+            if key in self._by_key:
+                return self._by_key[key]
+            if key in self._computed:
+                return self._computed[key]
+        phash = хеш_по_url(url)
+        with self._lock:
+            self._computed[key] = phash
+        return phash
+
+    def add(self, url: str, source: str = 'blog', phash: int = None) -> Optional[int]:
+        """Индексирует изображение; запись в базу — при flush()"""
+        key = ключ_url(url)
+        if not key:
+            return None
+        with self._lock:
+            self._ensure_loaded()
+            if self._contains(source, key):
+                return self._by_key[key]
+        if phash is None:
+            phash = self.phash(url)
+        if phash is None:
+            return None
+        with self._lock:
+            if not self._contains(source, key):
+                self._index(source, key, phash)
+                self._pending.append({'source': source, 'url_key': key, 'phash': phash})
+        return phash
+
+    def add_urls(self, urls: Iterable[str], source: str = 'blog', *, local_only: bool = False, workers: int = None):
+        """
+        Индексирует ещё не проиндексированные URL (хеши считаются параллельно).
+
+        local_only: только изображения сайта, лежащие в public_html, — без
+        скачивания, чтобы недоступные внешние URL не запрашивались каждый запуск.
+        """
+        with self._lock:
+            self._ensure_loaded()
+            новые = list(dict.fromkeys(
+                url for url in urls if url and not self._contains(source, ключ_url(url))
+            ))
+        if local_only:
+            новые = [url for url in новые if _локальный_путь(url) is not None]
+        if новые:
+            workers = max(1, min(workers or IMAGE_PHASH_WORKERS, len(новые)))
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                list(executor.map(lambda url: self.add(url, source), новые))
+        self.flush()
+
+    def add_posts(self, посты: List[Dict]):
+        """Индексирует главные изображения и галереи постов блога (файлы из public_html)"""
+        urls = []
+        for пост in посты:
+            urls.append(пост.get('image', '') or '')
+            urls.extend((img or {}).get('url', '') for img in пост.get('images', []) or [])
+        self.add_urls(urls, 'blog', local_only=True)
+
+    def flush(self):
+        """Записывает новые хеши в state_db одной транзакцией"""
+        with self._lock:
+            if not self._pending:
+                return
+            try:
+                state_db.add_image_phashes(self._pending, max_items=self.max_items)
+                self._pending = []
+            except Exception as e:
+                print(f"⚠️ Ошибка сохранения перцептивных хешей: {e}")
+                return
+            if sum(len(keys) for keys in self._keys.values()) > self.max_items:
+                self._loaded = False
+
+    def find_near_duplicate(
+        self,
+        phash: int,
+        порог: int = None,
+        sources: Iterable[str] = ('blog',),
+        исключить: str = None
+    ) -> Optional[Tuple[int, str]]:
+        """
+        Ищет ближайший проиндексированный хеш с расстоянием <= порог
+
+        Returns:
+            (расстояние, url_key) или None
+        """
+        порог = IMAGE_PHASH_MAX_DISTANCE if порог is None else порог
+        лучший = None
+        with self._lock:
+            self._ensure_loaded()
+            for source in sources:
+                массив = self._array(source)
+                if not len(массив):
+                    continue
+                расстояния = _POPCOUNT[(массив ^ np.uint64(phash)).view(np.uint8)].reshape(-1, 8).sum(axis=1)
+                позиция = self._positions[source].get(ключ_url(исключить)) if исключить else None
+                if позиция is not None:
+                    расстояния[позиция] = HASH_SIZE * HASH_SIZE + 1
+                i = int(np.argmin(расстояния))
+                d = int(расстояния[i])
+                if d <= порог and (лучший is None or d < лучший[0]):
+                    лучший = (d, self._keys[source][i])
+        return лучший
+
+    def find_duplicate_url(
+        self,
+        url: str,
+        порог: int = None,
+        sources: Iterable[str] = ('blog',),
+        исключить: str = None
+    ) -> Optional[Tuple[int, str]]:
+        """То же для изображения по URL; пустой индекс не требует скачивания"""
+        with self._lock:
+            self._ensure_loaded()
+            if not any(self._hashes.get(source) for source in sources):
+                return None
+        phash = self.phash(url)
+        if phash is None:
+            return None
+        return self.find_near_duplicate(phash, порог, sources, исключить)
+
+
+ИНДЕКС_ИЗОБРАЖЕНИЙ = ImagePHashIndex()
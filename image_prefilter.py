@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+    Локальный предварительный фильтр изображений (до запросов к DeepSeek)
+
+    Очевидно неподходящие кандидаты — логотипы, иконки, баннеры,
+    WordPress-миниатюры вида -150x150 и картинки со странными пропорциями —
+    отсекаются без обращения к модели. Сначала проверяется сам URL и alt,
+    затем, если установлен Pillow, скачивается только начало файла
+    (до IMAGE_PROBE_BYTES), из заголовка которого берутся формат и размеры.
+
+    Если размеры узнать не удалось (сеть, 403, неизвестный формат),
+    изображение не отклоняется: решение остаётся за DeepSeek.
+
+    Автор: VR-Lounge
+"""
+
+import os
+import re
+import threading
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+from urllib.parse import unquote, urlparse
+
+import requests
+
+try:
+    from PIL import ImageFile
+except ImportError:
+    ImageFile = None
+
+
+IMAGE_MIN_SIDE = int(os.getenv('IMAGE_MIN_SIDE', '300'))
+IMAGE_MAX_ASPECT = float(os.getenv('IMAGE_MAX_ASPECT', '3.0'))
+IMAGE_PROBE_BYTES = int(os.getenv('IMAGE_PROBE_BYTES', '65536'))
+IMAGE_PROBE_TIMEOUT = float(os.getenv('IMAGE_PROBE_TIMEOUT', '10'))
+IMAGE_FORMATS = {'JPEG', 'MPO', 'PNG', 'WEBP', 'GIF', 'AVIF'}
+
+# Брендированная графика SkinnyMs (в skinnyms_parser — подстроки URL,
+# в общем фильтре — целые слова имени файла: «ad-» не ловит «salad-recipe»)
+BLOCKED_IMAGE_URLS = {
+    "https://skinnyms.com/wp-content/uploads/2024/11/Skinny-Ms-Graphics-Horizontal.png"
+}
+BLOCKED_IMAGE_KEYWORDS = [
+    "graphics", "horizontal", "banner", "bundle", "promo", "cta", "button",
+    "ad-", "advert", "logo", "skinny-ms-graphics", "skinnyms-graphics"
+]
+
+# Слова в имени файла, которые однозначно означают служебную графику. Слова,
+# встречающиеся и в названиях блюд/фото (button-mushroom, signature-salad,
+# ads, pixel), сюда не входят — баннеры отсекаются по пропорциям и DeepSeek
+SERVICE_IMAGE_TOKENS = {
+    'logo', 'logos', 'icon', 'icons', 'favicon', 'sprite', 'avatar', 'gravatar',
+    'placeholder', 'spacer',
+}
+SERVICE_IMAGE_EXTENSIONS = ('.svg', '.ico', '.bmp')
+FILENAME_TOKEN_RE = re.compile(r'[a-z]+')
+BLOCKED_IMAGE_TOKENS = [tuple(FILENAME_TOKEN_RE.findall(k)) for k in BLOCKED_IMAGE_KEYWORDS]
+# WordPress-миниатюры: name-150x150.jpg
+WP_SIZE_SUFFIX_RE = re.compile(r'-(\d{2,4})x(\d{2,4})\.[a-z0-9]+$', re.IGNORECASE)
+ALT_LOGO_RE = re.compile(r'\blogo\b|логотип', re.IGNORECASE)
+
+HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
+}
+
+_lock = threading.Lock()
+_probe_cache: Dict[str, Optional[Tuple[str, int, int]]] = {}
+
+
+def _есть_подряд(слова, фраза) -> bool:
+    """Слова фразы идут в имени файла подряд (целыми словами)."""
+    n = len(фраза)
+    return n > 0 and any(tuple(слова[i:i + n]) == фраза for i in range(len(слова) - n + 1))
+
+
+def причина_по_url(url: str, alt: str = '') -> Optional[str]:
+    """Причина отклонения только по URL и alt (без сети) или None."""
+    if not url:
+        return 'нет URL'
+    clean = url.split('?')[0]
+    path = unquote(urlparse(clean).path).lower()
+    filename = path.rsplit('/', 1)[-1]
+    if path.endswith(SERVICE_IMAGE_EXTENSIONS):
+        return f'служебный формат {Path(path).suffix}'
+    слова = FILENAME_TOKEN_RE.findall(filename.rsplit('.', 1)[0])
+    if 'skinnyms.com' in clean.lower():
+        if clean in BLOCKED_IMAGE_URLS or any(_есть_подряд(слова, k) for k in BLOCKED_IMAGE_TOKENS):
+            return 'брендированная графика SkinnyMs'
+    служебные = set(слова) & SERVICE_IMAGE_TOKENS
+    if служебные:
+        return f"служебная графика ({', '.join(sorted(служебные))})"
+    размер = WP_SIZE_SUFFIX_RE.search(filename)
+    if размер and max(int(размер.group(1)), int(размер.group(2))) < IMAGE_MIN_SIDE:
+        return f"миниатюра {размер.group(1)}x{размер.group(2)}"
+    if alt and ALT_LOGO_RE.search(alt):
+        return 'логотип по alt'
+    return None
+
+
+def размеры_изображения(url: str) -> Optional[Tuple[str, int, int]]:
+    """
+    (формат, ширина, высота) по заголовку файла: локальный путь читается
+    с диска, URL скачивается только до разбора заголовка. None, если не удалось.
+    """
+    if ImageFile is None or not url:
+        return None
+    with _lock:
+        if url in _probe_cache:
+            return _probe_cache[url]
+
+    parser = ImageFile.Parser()
+    результат = None
+    try:
+        if url.startswith(('http://', 'https://')):
+            with requests.get(url, headers=HEADERS, timeout=IMAGE_PROBE_TIMEOUT, stream=True) as response:
+                response.raise_for_status()
+                прочитано = 0
+                for chunk in response.iter_content(chunk_size=4096):
+                    parser.feed(chunk)
+                    прочитано += len(chunk)
+                    if parser.image is not None or прочитано >= IMAGE_PROBE_BYTES:
+                        break
+        else:
+            with open(url, 'rb') as f:
+                while parser.image is None:
+                    chunk = f.read(4096)
+                    if not chunk or f.tell() > IMAGE_PROBE_BYTES:
+                        break
+                    parser.feed(chunk)
+        if parser.image is not None:
+            результат = (parser.image.format, parser.image.width, parser.image.height)
+    except Exception:
+        результат = None
+    finally:
+        try:
+            parser.close()
+        except Exception:
+            pass
+
+    with _lock:
+        _probe_cache[url] = результат
+    return результат
+
+
+def проверить_локально(url: str, alt: str = '', *, probe: bool = True) -> Tuple[bool, str]:
+    """
+    Быстрая локальная проверка кандидата.
+
+    Returns:
+        (проходит, причина) — причина пустая, если изображение прошло
+    """
+    причина = причина_по_url(url, alt)
+    if причина:
+        return False, причина
+    if not probe:
+        return True, ''
+    размеры = размеры_изображения(url)
+    if размеры is None:
+        return True, ''
+    формат, ширина, высота = размеры
+    if формат not in IMAGE_FORMATS:
+        return False, f'неподходящий формат {формат}'
+    if min(ширина, высота) < IMAGE_MIN_SIDE:
+        return False, f'слишком маленькое {ширина}x{высота}'
+    if max(ширина, высота) / max(1, min(ширина, высота)) > IMAGE_MAX_ASPECT:
+        return False, f'пропорции баннера {ширина}x{высота}'
+    return True, ''
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+    Многошаблонный поиск ключевых слов (автомат Ахо-Корасик)
+
+    Общий матчер для проверки релевантности, определения тегов и тем:
+    списки ключевых слов по категориям компилируются в автомат один раз
+    за процесс, а текст просматривается за один проход — O(длина текста)
+    вместо O(текст × число ключевых слов). Совпадения ищутся как подстроки,
+    так же как проверки `слово in текст`.
+
+    Автор: VR-Lounge
+"""
+
+from collections import deque
+from typing import Dict, Iterable, List, Set
+
+
+class KeywordMatcher:
+    """Автомат Ахо-Корасик над словарём {категория: [ключевые слова]}."""
+
+    def __init__(self, categories: Dict[str, Iterable[str]]):
+        self._patterns: List[tuple] = []  # (категория, ключевое слово) в порядке объявления
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._output: List[List[int]] = [[]]
+
+        seen = set()
+        for category, keywords in categories.items():
+            for keyword in keywords:
+                pattern = keyword.lower()
+                if not pattern or (category, pattern) in seen:
+                    continue
+                seen.add((category, pattern))
+                self._patterns.append((category, keyword))
+                self._insert(pattern, len(self._patterns) - 1)
+        self._build_links()
+
+    def _insert(self, pattern: str, pattern_id: int):
+        state = 0
+        for char in pattern:
+            next_state = self._goto[state].get(char)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto[state][char] = next_state
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append([])
+            state = next_state
+        self._output[state].append(pattern_id)
+
+    def _build_links(self):
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fail = self._fail[state]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[next_state] = self._goto[fail].get(char, 0)
+                # Совпадения суффикса наследуются, чтобы не ходить по fail-ссылкам при поиске
+                self._output[next_state] = self._output[next_state] + self._output[self._fail[next_state]]
+
+    def _hits(self, text: str) -> Set[int]:
+        goto, fail, output = self._goto, self._fail, self._output
+        hits = set()
+        state = 0
+        for char in text.lower():
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            if output[state]:
+                hits.update(output[state])
+        return hits
+
+    def find(self, *texts: str) -> Dict[str, List[str]]:
+        """
+        Находит все ключевые слова в текстах за один проход по каждому.
+
+        Returns:
+            {категория: [найденные ключевые слова в порядке объявления]}
+        """
+        hits = set()
+        for text in texts:
+            if text:
+                hits |= self._hits(text)
+        found: Dict[str, List[str]] = {}
+        for pattern_id in sorted(hits):
+            category, keyword = self._patterns[pattern_id]
+            found.setdefault(category, []).append(keyword)
+        return found
+
+    def categories(self, *texts: str) -> Set[str]:
+        """Категории, у которых найдено хотя бы одно ключевое слово."""
+        return set(self.find(*texts))
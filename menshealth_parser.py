@@ -15,7 +15,6 @@ import os
 import requests
 import json
 import re
-import xml.etree.ElementTree as ET
 from datetime import datetime
 from pathlib import Path
 from urllib.parse import urlparse, urljoin
@@ -42,6 +41,13 @@ from topic_balance import выбрать_статью_для_баланса
 from content_library import load_library
 from telegram_dedup import is_duplicate as telegram_is_duplicate, record_post as telegram_record_post
 from publication_logger import логировать_публикацию
+from rss_fetcher import fetch_feeds, looks_like_feed_url
+import feed_cache
+from rss_stream import FeedParseError, read_feed_articles
+from processed_store import ProcessedArticlesStore
+from keyword_matcher import KeywordMatcher
+from blog_feed import BlogFeed
+import deepseek_client
 
 # Импортируем функцию адаптации заголовка
 try:
@@ -186,9 +192,12 @@ RELEVANT_KEYWORDS = [
     'quick workout', 'home workout', 'bodyweight', 'no equipment',
     'short workout', 'efficient workout', 'effective training'
 ]
+МАТЧЕР_РЕЛЕВАНТНОСТИ = KeywordMatcher({'relevant': RELEVANT_KEYWORDS})
 
 # Файл для хранения обработанных статей (чтобы не дублировать)
 PROCESSED_ARTICLES_FILE = Path('.menshealth_processed.json')
+# Индекс загружается один раз за процесс, проверки — O(1) без чтения файла
+ОБРАБОТАННЫЕ_СТАТЬИ = ProcessedArticlesStore(PROCESSED_ARTICLES_FILE)
 
 # Ограничение частоты публикации для источников (в днях)
 # Источники, которые публикуются слишком часто, будут ограничены
@@ -317,35 +326,22 @@ else:
             REPO_ROOT = Path.cwd()
 
 BLOG_POSTS_FILE = REPO_ROOT / 'public_html' / 'blog-posts.json'
+# Индекс ленты без полных текстов — для проверок источников и дат
+ЛЕНТА_БЛОГА = BlogFeed(BLOG_POSTS_FILE)
 
 # ============= ФУНКЦИИ ПАРСИНГА =============
 
 def загрузить_обработанные_статьи():
     """Загружает список уже обработанных статей"""
-    if PROCESSED_ARTICLES_FILE.exists():
-        try:
-            with open(PROCESSED_ARTICLES_FILE, 'r', encoding='utf-8') as f:
-                return json.load(f)
-        except Exception:
-            return {'articles': [], 'last_update': None}
-    return {'articles': [], 'last_update': None}
+    return {'articles': ОБРАБОТАННЫЕ_СТАТЬИ.urls(), 'last_update': ОБРАБОТАННЫЕ_СТАТЬИ.last_update}
 
 def сохранить_обработанную_статью(article_url):
     """Сохраняет URL обработанной статьи"""
-    data = загрузить_обработанные_статьи()
-    if article_url not in data['articles']:
-        data['articles'].append(article_url)
-        data['last_update'] = datetime.now().isoformat()
-        # Ограничиваем размер (храним последние 1000 статей)
-        if len(data['articles']) > 1000:
-            data['articles'] = data['articles'][-1000:]
-        with open(PROCESSED_ARTICLES_FILE, 'w', encoding='utf-8') as f:
-            json.dump(data, f, ensure_ascii=False, indent=2)
+    ОБРАБОТАННЫЕ_СТАТЬИ.add(article_url)
 
 def уже_обработана(article_url):
     """Проверяет, была ли статья уже обработана"""
-    data = загрузить_обработанные_статьи()
-    return article_url in data['articles']
+    return article_url in ОБРАБОТАННЫЕ_СТАТЬИ
 
 def парсить_rss_feed(rss_url):
     """Парсит RSS фид и возвращает список статей"""
@@ -353,37 +349,28 @@ def парсить_rss_feed(rss_url):
         headers = {
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
         }
-        response = requests.get(rss_url, headers=headers, timeout=30)
-        response.raise_for_status()
-        
-        # Парсим XML
-        root = ET.fromstring(response.content)
-        articles = []
-        
-        # Обрабатываем элементы <item>
-        for item in root.findall('.//item'):
-            title_elem = item.find('title')
-            link_elem = item.find('link')
-            description_elem = item.find('description')
-            pub_date_elem = item.find('pubDate')
+        # Условный запрос: если фид не менялся, сервер ответит 304 без тела
+        headers.update(feed_cache.conditional_headers(rss_url))
+        response = requests.get(rss_url, headers=headers, timeout=30, stream=True)
+        with response:
+            if response.status_code == 304:
+                articles = feed_cache.cached_articles(rss_url)
+                print(f"♻️ Фид не изменился (304), из кэша {len(articles)} статей: {rss_url[:60]}...")
+                return articles
+            response.raise_for_status()
             
-            if title_elem is not None and link_elem is not None:
-                title = title_elem.text or ''
-                link = link_elem.text or ''
-                description = description_elem.text if description_elem is not None else ''
-                pub_date = pub_date_elem.text if pub_date_elem is not None else ''
-                
-                articles.append({
-                    'title': title,
-                    'link': link,
-                    'description': description,
-                    'pub_date': pub_date,
-                    'rss_feed_url': rss_url  # Сохраняем URL RSS фида для ротации источников
-                })
+            # Потоковый разбор: читаем фид до N уже обработанных статей подряд
+            response.raw.decode_content = True
+            articles = read_feed_articles(response.raw, rss_url, is_processed=уже_обработана)
         
+        feed_cache.store(rss_url, response.headers.get('ETag'), response.headers.get('Last-Modified'), articles)
         print(f"✅ Получено {len(articles)} статей из {rss_url}")
         return articles
     
+    except FeedParseError as e:
+        # Фид разобран не до конца — неполный список в кэш фидов не сохраняем
+        print(f"❌ Фид {rss_url} не разобран, кэш не обновлён: {e}")
+        return []
     except Exception as e:
         print(f"❌ Ошибка парсинга RSS {rss_url}: {e}")
         return []
@@ -392,11 +379,8 @@ def проверить_релевантность(article):
     """Проверяет, релевантна ли статья по ключевым словам"""
     text_to_check = f"{article['title']} {article['description']}".lower()
     
-    # Проверяем наличие ключевых слов
-    matches = []
-    for keyword in RELEVANT_KEYWORDS:
-        if keyword.lower() in text_to_check:
-            matches.append(keyword)
+    # Проверяем наличие ключевых слов (один проход по тексту)
+    matches = МАТЧЕР_РЕЛЕВАНТНОСТИ.find(text_to_check).get('relevant', [])
     
     # Если найдено хотя бы 2 ключевых слова - статья релевантна
     return len(matches) >= 2, matches
@@ -420,12 +404,8 @@ def получить_последние_использованные_источ
         return {'rss_feeds': последние_rss_фиды, 'domains': последние_домены}
     
     try:
-        with open(BLOG_POSTS_FILE, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-            посты = data.get('posts', [])
-        
-        # Получаем RSS фиды и домены из последних n постов
-        for пост in посты[:n]:
+        # Получаем RSS фиды и домены из последних n постов (компактный индекс, без текстов)
+        for пост in ЛЕНТА_БЛОГА.recent(n):
             # Проверяем RSS фид (если сохранён)
             rss_feed_url = пост.get('rss_feed_url') or ''
             if rss_feed_url and rss_feed_url not in последние_rss_фиды:
@@ -475,9 +455,7 @@ def проверить_ограничение_частоты_публикаци
         return True, None
     
     try:
-        with open(BLOG_POSTS_FILE, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-            посты = data.get('posts', [])
+        посты = ЛЕНТА_БЛОГА.index()
         
         # Проверяем последние публикации из этого источника
         текущая_дата = datetime.now()
@@ -778,13 +756,6 @@ def расширить_контент_для_статьи(оригинальны
         return None
     
     try:
-        url = "https://api.deepseek.com/v1/chat/completions"
-        
-        headers = {
-            "Content-Type": "application/json",
-            "Authorization": f"Bearer {DEEPSEEK_API_KEY}"
-        }
-        
         # Используем оптимизированные промпты для Cache HIT
         # System prompt кэшируется при каждом запросе (экономия 90%)
         system_prompt = SYSTEM_PROMPT_ARTICLE
@@ -795,23 +766,19 @@ def расширить_контент_для_статьи(оригинальны
             текст=оригинальный_текст[:5000]
         )
         
-        data = {
-            "model": "deepseek-chat",
-            "messages": [
+        result = deepseek_client.chat(
+            [
                 {"role": "system", "content": system_prompt},
                 {"role": "user", "content": user_prompt}
             ],
-            "temperature": 0.8,
-            "max_tokens": 3000,  # Больше токенов для расширенного контента
-            "top_p": 0.9,
-            "frequency_penalty": 0.3,
-            "presence_penalty": 0.3
-        }
-        
-        response = requests.post(url, headers=headers, json=data, timeout=90)
-        response.raise_for_status()
-        
-        result = response.json()
+            temperature=0.8,
+            max_tokens=3000,  # Больше токенов для расширенного контента
+            timeout=90,
+            purpose='article_expand',
+            top_p=0.9,
+            frequency_penalty=0.3,
+            presence_penalty=0.3
+        )
         расширенный_текст = result['choices'][0]['message']['content']
         
         # Очищаем текст от AI-маркеров
@@ -846,13 +813,6 @@ def рерайтить_через_deepseek(оригинальный_текст,
         return None
     
     try:
-        url = "https://api.deepseek.com/v1/chat/completions"
-        
-        headers = {
-            "Content-Type": "application/json",
-            "Authorization": f"Bearer {DEEPSEEK_API_KEY}"
-        }
-        
         # Используем оптимизированные промпты для Cache HIT
         # System prompt кэшируется при каждом запросе (экономия 90%)
         system_prompt = SYSTEM_PROMPT_TELEGRAM
@@ -863,23 +823,19 @@ def рерайтить_через_deepseek(оригинальный_текст,
             текст=оригинальный_текст[:4000]
         )
         
-        data = {
-            "model": "deepseek-chat",
-            "messages": [
+        result = deepseek_client.chat(
+            [
                 {"role": "system", "content": system_prompt},
                 {"role": "user", "content": user_prompt}
             ],
-            "temperature": 0.8,  # Больше креативности для разговорного стиля
-            "max_tokens": 1000,  # Ограничиваем для коротких постов
-            "top_p": 0.9,
-            "frequency_penalty": 0.3,
-            "presence_penalty": 0.3
-        }
-        
-        response = requests.post(url, headers=headers, json=data, timeout=60)
-        response.raise_for_status()
-        
-        result = response.json()
+            temperature=0.8,  # Больше креативности для разговорного стиля
+            max_tokens=1000,  # Ограничиваем для коротких постов
+            timeout=60,
+            purpose='telegram_rewrite',
+            top_p=0.9,
+            frequency_penalty=0.3,
+            presence_penalty=0.3
+        )
         рерайт = result['choices'][0]['message']['content']
         
         # Очищаем текст от AI-маркеров
@@ -1020,25 +976,12 @@ def форматировать_пост(рерайт, оригинальный_
     
     return пост
 
-def определить_теги(текст, заголовок, источник='menshealth'):
-    """Улучшенная функция определения тегов на основе контента и источника"""
-    теги = []
-    текст_нижний = (текст + ' ' + заголовок).lower()
-    заголовок_нижний = заголовок.lower()
-    
-    # ============= АУДИТОРИЯ (Мужчинам/Девушкам) =============
-    мужская_аудитория = False
-    женская_аудитория = False
-    
-    # Прямые указания
-    if any(word in текст_нижний for word in ['мужчин', 'мужской', 'для парней', 'мужчинам', 'мужское', 'парням']):
-        мужская_аудитория = True
-    
-    if any(word in текст_нижний for word in ['девушк', 'женщин', 'для девочек', 'девушкам', 'женский', 'для женщин', 'девушкам']):
-        женская_аудитория = True
-    
-    # Контекстные признаки мужской аудитории
-    мужские_маркеры = [
+# Маркеры тегов: тег -> подстроки в тексте поста (аудитория + темы, порядок = порядок тегов)
+МАРКЕРЫ_ТЕГОВ = {
+    'Мужчинам': [
+        # Прямые указания
+        'мужчин', 'мужской', 'для парней', 'мужчинам', 'мужское', 'парням',
+        # Контекстные признаки
         'братан', 'брат',  # Обращение
         'твой кишечник', 'твой жкт', 'твой пресс', 'твой кишечник',  # Мужское обращение
         'набор массы', 'набираем массу', 'набрать массу', 'набор мышечной',  # Мужские цели
@@ -1047,45 +990,18 @@ def определить_теги(текст, заголовок, источни
         'тестостерон',  # Мужские гормоны
         'брэндон', 'тренер',  # Мужской контекст
         'для мужчин', 'мужчина',  # Явные указания
-    ]
-    
-    if any(маркер in текст_нижний for маркер in мужские_маркеры):
-        мужская_аудитория = True
-    
-    # Контекстные признаки женской аудитории
-    женские_маркеры = [
+    ],
+    'Девушкам': [
+        # Прямые указания
+        'девушк', 'женщин', 'для девочек', 'девушкам', 'женский', 'для женщин', 'девушкам',
+        # Контекстные признаки
         'подруга', 'девочки',  # Обращение
         'стройное тело', 'похудеть', 'для девушек', 'для женщин',  # Женские цели
         'женское здоровье', 'женский',  # Женское здоровье
         'девушкам', 'девушка',  # Явные указания
-    ]
-    
-    if any(маркер in текст_нижний for маркер in женские_маркеры):
-        женская_аудитория = True
-    
-    # Если источник menshealth - по умолчанию для мужчин (если нет явных указаний на женскую аудиторию)
-    if источник == 'menshealth' and not женская_аудитория:
-        мужская_аудитория = True
-    
-    # Если источник womenshealth - по умолчанию для женщин (если нет явных указаний на мужскую аудиторию)
-    if источник == 'womenshealth' and not мужская_аудитория:
-        женская_аудитория = True
-    
-    # Проверка заголовка
-    if any(word in заголовок_нижний for word in ['мужской', 'мужчин', 'мужск', 'для мужчин']):
-        мужская_аудитория = True
-    
-    if any(word in заголовок_нижний for word in ['девушк', 'женщин', 'для девушек', 'женск']):
-        женская_аудитория = True
-    
-    if мужская_аудитория:
-        теги.append('Мужчинам')
-    
-    if женская_аудитория:
-        теги.append('Девушкам')
-    
-    # ============= ПИТАНИЕ =============
-    питание_маркеры = [
+    ],
+    # ПИТАНИЕ
+    'Питание': [
         'рецепт', 'питани', 'еда', 'блюд', 'продукт', 'ингредиент',
         'жкт', 'кишечник', 'желудок', 'пищеварен', 'желудочно-кишечн',
         'белок', 'углевод', 'жир', 'клетчатка', 'воды', 'водой',
@@ -1094,38 +1010,26 @@ def определить_теги(текст, заголовок, источни
         'овощ', 'фрукт', 'мясо', 'рыба', 'яйцо', 'молочн',
         'питание мужчинам', 'для мужчин питание', 'мужское питание',
         'до тренировки', 'после тренировки', 'белки для роста'
-    ]
-    
-    if any(маркер in текст_нижний for маркер in питание_маркеры):
-        теги.append('Питание')
-    
-    # ============= ДИЕТЫ =============
-    диеты_маркеры = [
+    ],
+    # ДИЕТЫ
+    'Диеты': [
         'диет', 'похуден', 'калори', 'дефицит калори', 'профицит',
         'кето', 'палео', 'вегетариан', 'веган', 'средиземноморск',
         'потеря веса', 'сброс веса', 'снижение веса',
         'бжу', 'баланс', 'макрос', 'микрос',
         'диета мужчинам', 'для мужчин диета', 'мужская диета'
-    ]
-    
-    if any(маркер in текст_нижний for маркер in диеты_маркеры):
-        теги.append('Диеты')
-    
-    # ============= МОТИВАЦИЯ =============
-    мотивация_маркеры = [
+    ],
+    # МОТИВАЦИЯ
+    'Мотивация': [
         'мотивац', 'вдохнов', 'мотивир', 'результат', 'цель', 'успех',
         'философия', 'система', 'принцип', 'лайфхак', 'совет',
         'начни', 'начинай', 'не откладывай', 'сегодня',
         'сила в', 'мотивация', 'вдохновение', 'мотивировать',
         'психологи', 'ментальн', 'настрой', 'мышление',
         'мотивация мужчинам', 'для мужчин мотивация', 'мужская мотивация'
-    ]
-    
-    if any(маркер in текст_нижний for маркер in мотивация_маркеры):
-        теги.append('Мотивация')
-    
-    # ============= ТРЕНИРОВКА =============
-    тренировка_маркеры = [
+    ],
+    # ТРЕНИРОВКА
+    'Тренировка': [
         'тренировк', 'упражнен', 'программа тренировок', 'программа',
         'подход', 'повторен', 'раунд', 'серия', 'цикл',
         'бурпи', 'приседан', 'отжиман', 'планка', 'выпад',
@@ -1136,13 +1040,9 @@ def определить_теги(текст, заголовок, источни
         'разминка', 'заминка', 'растяжка',
         'упражнения мужчинам', 'тренировки мужчинам', 'для мужчин тренировка',
         'силовая тренировка', 'набор массы', 'набрать массу'
-    ]
-    
-    if any(маркер in текст_нижний for маркер in тренировка_маркеры):
-        теги.append('Тренировка')
-    
-    # ============= СИЛОВЫЕ ТРЕНИРОВКИ =============
-    силовые_маркеры = [
+    ],
+    # СИЛОВЫЕ ТРЕНИРОВКИ
+    'Силовые': [
         'силовые тренировки', 'силовой тренинг', 'силовая подготовка',
         'weight training', 'strength training', 'силовые',
         'жим лёжа', 'присед со штангой', 'становая тяга',
@@ -1151,58 +1051,90 @@ def определить_теги(текст, заголовок, источни
         '5/3/1', 'wendler', 'westside', 'conjugate',
         'max effort', 'dynamic effort', 'repetition effort',
         'силовой тренинг', 'силовая работа', 'работа с весом'
-    ]
-    
-    if any(маркер in текст_нижний for маркер in силовые_маркеры):
-        теги.append('Силовые')
-    
-    # ============= БОДИБИЛДИНГ =============
-    бодибилдинг_маркеры = [
+    ],
+    # БОДИБИЛДИНГ
+    'Бодибилдинг': [
         'бодибилдинг', 'bodybuilding', 'набор мышечной массы',
         'гипертрофия', 'hypertrophy', 'мышечная масса',
         'набор массы', 'набрать массу', 'рост мышц',
         'split', 'сплит', 'бодибилдинг программа',
         'bodybuilding', 'бодибилдинг тренировка',
         'мышечный рост', 'набор веса', 'масса'
-    ]
-    
-    if any(маркер in текст_нижний for маркер in бодибилдинг_маркеры):
-        теги.append('Бодибилдинг')
-    
-    # ============= ПАУЭРЛИФТИНГ =============
-    пауэрлифтинг_маркеры = [
+    ],
+    # ПАУЭРЛИФТИНГ
+    'Пауэрлифтинг': [
         'пауэрлифтинг', 'powerlifting', 'сила',
         'жим', 'присед', 'тяга', 'big three',
         '1rm', 'одноповторный максимум', 'максимальный вес',
         'powerlifting', 'пауэрлифтинг программа',
         'conjugate', 'westside', 'сила'
-    ]
-    
-    if any(маркер in текст_нижний for маркер in пауэрлифтинг_маркеры):
-        теги.append('Пауэрлифтинг')
-    
-    # ============= КРОССФИТ =============
-    кроссфит_маркеры = [
+    ],
+    # КРОССФИТ
+    'Кроссфит': [
         'кроссфит', 'crossfit', 'wod', 'workout of the day',
         'функциональный тренинг', 'functional training',
         'кроссфит тренировка', 'crossfit workout',
         'функционалка', 'functional', 'кроссфит программа'
-    ]
-    
-    if any(маркер in текст_нижний for маркер in кроссфит_маркеры):
-        теги.append('Кроссфит')
-    
-    # ============= ФУНКЦИОНАЛЬНЫЙ ТРЕНИНГ =============
-    функциональный_маркеры = [
+    ],
+    # ФУНКЦИОНАЛЬНЫЙ ТРЕНИНГ
+    'Функциональный тренинг': [
         'функциональный тренинг', 'functional training',
         'функциональные движения', 'functional movement',
         'функционалка', 'functional', 'двигательные паттерны',
         'movement patterns', 'функциональная подготовка',
         'functional fitness', 'функциональный фитнес'
-    ]
+    ],
+}
+
+# Маркеры аудитории, которые проверяются только в заголовке
+МАРКЕРЫ_АУДИТОРИИ_В_ЗАГОЛОВКЕ = {
+    'Мужчинам': [
+        'мужской', 'мужчин', 'мужск', 'для мужчин'
+    ],
+    'Девушкам': [
+        'девушк', 'женщин', 'для девушек', 'женск'
+    ],
+}
+
+# Автоматы Ахо-Корасик строятся один раз; текст просматривается за один проход
+МАТЧЕР_ТЕГОВ = KeywordMatcher(МАРКЕРЫ_ТЕГОВ)
+МАТЧЕР_АУДИТОРИИ_В_ЗАГОЛОВКЕ = KeywordMatcher(МАРКЕРЫ_АУДИТОРИИ_В_ЗАГОЛОВКЕ)
+
+def определить_теги(текст, заголовок, источник='menshealth'):
+    """Улучшенная функция определения тегов на основе контента и источника"""
+    теги = []
+    найдено = МАТЧЕР_ТЕГОВ.categories((текст + ' ' + заголовок).lower())
+    в_заголовке = МАТЧЕР_АУДИТОРИИ_В_ЗАГОЛОВКЕ.categories(заголовок.lower())
+    
+    # ============= АУДИТОРИЯ (Мужчинам/Девушкам) =============
+    мужская_аудитория = 'Мужчинам' in найдено
+    женская_аудитория = 'Девушкам' in найдено
+    
+    # Если источник menshealth - по умолчанию для мужчин (если нет явных указаний на женскую аудиторию)
+    if источник == 'menshealth' and not женская_аудитория:
+        мужская_аудитория = True
+    
+    # Если источник womenshealth - по умолчанию для женщин (если нет явных указаний на мужскую аудиторию)
+    if источник == 'womenshealth' and not мужская_аудитория:
+        женская_аудитория = True
     
-    if any(маркер in текст_нижний for маркер in функциональный_маркеры):
-        теги.append('Функциональный тренинг')
+    # Проверка заголовка
+    if 'Мужчинам' in в_заголовке:
+        мужская_аудитория = True
+    
+    if 'Девушкам' in в_заголовке:
+        женская_аудитория = True
+    
+    if мужская_аудитория:
+        теги.append('Мужчинам')
+    
+    if женская_аудитория:
+        теги.append('Девушкам')
+    
+    # ============= ТЕМЫ =============
+    for тег in МАРКЕРЫ_ТЕГОВ:
+        if тег not in ('Мужчинам', 'Девушкам') and тег in найдено:
+            теги.append(тег)
     
     # Если тегов нет, добавляем по умолчанию
     if not теги:
@@ -1524,38 +1456,28 @@ def главная():
         return
     
     # Загружаем список обработанных статей
-    processed = загрузить_обработанные_статьи()
-    print(f"📋 Уже обработано статей: {len(processed['articles'])}")
+    print(f"📋 Уже обработано статей: {len(ОБРАБОТАННЫЕ_СТАТЬИ)}")
     
     # Парсим RSS фиды
     все_статьи = []
+    rss_фиды = []
     for rss_url in MENSHEALTH_RSS_FEEDS:
         # Проверяем различные форматы RSS/Atom фидов
-        if (rss_url.endswith('.xml') or 
-            rss_url.endswith('.xml/') or
-            rss_url.endswith('.atom') or 
-            rss_url.endswith('/feed') or 
-            rss_url.endswith('/feed/') or
-            rss_url.endswith('?format=feed') or
-            rss_url.endswith('?format=rss') or
-            rss_url.endswith('?format=RSS') or
-            '/feed' in rss_url or
-            '/rss' in rss_url or
-            '.xml' in rss_url or
-            '.atom' in rss_url or
-            'feedburner.com' in rss_url or
-            'feeds/posts' in rss_url):
-            try:
-                # Это RSS фид
-                статьи = парсить_rss_feed(rss_url)
-                все_статьи.extend(статьи)
-            except Exception as e:
-                print(f"⚠️ Ошибка парсинга {rss_url}: {e}")
-                continue
+        if looks_like_feed_url(rss_url):
+            rss_фиды.append(rss_url)
         else:
             # Это обычная страница - можно добавить парсинг HTML позже
             print(f"⏭️ Пропускаем HTML страницу: {rss_url}")
     
+    # Фиды загружаются параллельно, результаты приходят в порядке списка
+    результаты_фидов = fetch_feeds(rss_фиды, парсить_rss_feed)
+    feed_cache.save_feed_cache()
+    for rss_url, статьи in результаты_фидов:
+        if статьи is None:
+            print(f"⚠️ Ошибка парсинга {rss_url}")
+            continue
+        все_статьи.extend(статьи)
+    
     # Удаляем дубликаты по URL
     уникальные_статьи = {}
     for статья in все_статьи:
@@ -1801,3 +1723,4 @@ def главная():
 
 if __name__ == '__main__':
     главная()
+    deepseek_client.напечатать_метрики()
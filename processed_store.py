@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+    Индекс обработанных статей для парсеров
+
+    Загружает список обработанных статей парсера из state_db один раз
+    за процесс и держит нормализованные URL в set, поэтому проверка
+    «статья уже обработана» — O(1) без обращения к диску. Новый URL —
+    одна вставка строки в SQLite (WAL), без перезаписи всего списка.
+    Файл .womenshealth_processed.json / .menshealth_processed.json
+    служит ключом хранилища и формируется командой `state_db.py export`.
+
+    Автор: VR-Lounge
+"""
+
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import List, Optional
+from urllib.parse import parse_qsl, urlencode, urlparse
+
+import state_db
+
+
+PROCESSED_MAX_ITEMS = 1000
+
+
+def normalize_article_url(url: str) -> str:
+    """Ключ статьи: без схемы, www., фрагмента, utm-меток и завершающего слеша."""
+    if not url:
+        return ''
+    parsed = urlparse(url.strip())
+    host = parsed.netloc.lower()
+    if host.startswith('www.'):
+        host = host[4:]
+    query = [(k, v) for k, v in parse_qsl(parsed.query, keep_blank_values=True) if not k.lower().startswith('utm_')]
+    key = f"{host}{parsed.path}".rstrip('/')
+    if query:
+        key += '?' + urlencode(query)
+    return key
+
+
+class ProcessedArticlesStore:
+    """Set-индекс обработанных URL поверх таблицы processed_articles."""
+
+    def __init__(self, path: Path, max_items: int = PROCESSED_MAX_ITEMS):
+        self.path = Path(path)
+        self.store = str(self.path)
+        self.max_items = max_items
+        self.last_update: Optional[str] = None
+        self._urls: List[str] = []
+        self._keys = set()
+        self._loaded = False
+        self._lock = threading.RLock()
+
+    def _load(self):
+        if self._loaded:
+            return
+        self._loaded = True
+        try:
+            for row in state_db.processed_articles(self.store):
+                self._urls.append(row['url'])
+                self._keys.add(row['url_key'])
+                self.last_update = row['processed_at']
+        except Exception as e:
+            print(f"⚠️ Ошибка загрузки обработанных статей: {e}")
+
+    def __contains__(self, url: str) -> bool:
+        with self._lock:
+            self._load()
+            return normalize_article_url(url) in self._keys
+
+    def __len__(self) -> int:
+        with self._lock:
+            self._load()
+            return len(self._urls)
+
+    def urls(self) -> List[str]:
+        with self._lock:
+            self._load()
+            return list(self._urls)
+
+    def add(self, url: str) -> None:
+        """Отмечает статью обработанной: O(1) в памяти плюс одна строка в базе."""
+        key = normalize_article_url(url)
+        with self._lock:
+            self._load()
+            if not key or key in self._keys:
+                return
+            self._keys.add(key)
+            self._urls.append(url)
+            self.last_update = datetime.now().isoformat()
+            try:
+                state_db.add_processed_article(self.store, url, key, self.max_items)
+            except Exception as e:
+                print(f"⚠️ Ошибка сохранения обработанной статьи: {e}")
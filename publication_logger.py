@@ -9,14 +9,13 @@
     Автор: VR-Lounge
 """
 
-import json
-import os
-from pathlib import Path
 from datetime import datetime
 from typing import Dict, Optional
 
-# Путь к файлу логов
-PUBLICATION_LOG_FILE = Path('.publication_logs.json')
+import state_db
+
+# Логи хранятся в state_db (выгружаются в .publication_logs.json)
+PUBLICATION_LOG_FILE = state_db.PUBLICATION_LOG_FILE
 
 def логировать_публикацию(данные: Dict):
     """
@@ -36,23 +35,8 @@ def логировать_публикацию(данные: Dict):
             - url: URL статьи на сайте (если есть)
     """
     try:
-        # Загружаем существующие логи
-        логи = []
-        if PUBLICATION_LOG_FILE.exists():
-            with open(PUBLICATION_LOG_FILE, 'r', encoding='utf-8') as f:
-                логи = json.load(f)
-        
-        # Добавляем новую запись
-        логи.append(данные)
-        
-        # Ограничиваем размер (храним последние 1000 записей)
-        if len(логи) > 1000:
-            логи = логи[-1000:]
-        
-        # Сохраняем
-        PUBLICATION_LOG_FILE.parent.mkdir(parents=True, exist_ok=True)
-        with open(PUBLICATION_LOG_FILE, 'w', encoding='utf-8') as f:
-            json.dump(логи, f, ensure_ascii=False, indent=2)
+        # Добавляем новую запись (храним последние 1000 записей)
+        state_db.add_publication_log(данные, max_items=1000)
         
         print(f"📝 Публикация залогирована: {данные.get('title', '')[:50]}...")
     except Exception as e:
@@ -68,12 +52,10 @@ def получить_статистику_публикаций(дней: int = 7
     Returns:
         Словарь со статистикой
     """
-    if not PUBLICATION_LOG_FILE.exists():
-        return {}
-    
     try:
-        with open(PUBLICATION_LOG_FILE, 'r', encoding='utf-8') as f:
-            логи = json.load(f)
+        логи = state_db.publication_logs()
+        if not логи:
+            return {}
         
         # Фильтруем по дате
         сейчас = datetime.now()
@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+    Параллельная загрузка RSS фидов
+
+    Общий этап сбора статей для womenshealth_parser и menshealth_parser:
+    ограниченный пул потоков, лимит одновременных запросов к одному хосту
+    и общий дедлайн на весь сбор. Результаты возвращаются в порядке списка
+    фидов, независимо от того, какой фид ответил первым.
+
+    Автор: VR-Lounge
+"""
+
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import Callable, Dict, List, Optional, Tuple
+from urllib.parse import urlparse
+
+
+RSS_MAX_WORKERS = int(os.getenv('RSS_MAX_WORKERS', '12'))
+RSS_PER_HOST_LIMIT = int(os.getenv('RSS_PER_HOST_LIMIT', '2'))
+RSS_DEADLINE_SECONDS = float(os.getenv('RSS_DEADLINE_SECONDS', '90'))
+
+
+def looks_like_feed_url(url: str) -> bool:
+    """Проверяет различные форматы RSS/Atom фидов по URL."""
+    return (
+        url.endswith('.xml') or
+        url.endswith('.atom') or
+        url.endswith('/feed') or
+        url.endswith('/feed/') or
+        url.endswith('?format=feed') or
+        url.endswith('?format=rss') or
+        url.endswith('?format=RSS') or
+        '/feed' in url or
+        '/rss' in url or
+        '.xml' in url or
+        '.atom' in url or
+        'feedburner.com' in url or
+        'feeds/posts' in url
+    )
+
+
+def _host(url: str) -> str:
+    try:
+        return urlparse(url).netloc.lower()
+    except Exception:
+        return ''
+
+
+def fetch_feeds(
+    feed_urls: List[str],
+    parse_feed: Callable[[str], List[Dict]],
+    *,
+    max_workers: int = None,
+    per_host_limit: int = None,
+    deadline: float = None
+) -> List[Tuple[str, Optional[List[Dict]]]]:
+    """
+    Загружает фиды параллельно и возвращает [(rss_url, статьи)] в исходном порядке.
+
+    Args:
+        feed_urls: список URL фидов
+        parse_feed: функция парсинга одного фида (например, парсить_rss_feed)
+        max_workers: размер пула потоков
+        per_host_limit: максимум одновременных запросов к одному хосту
+        deadline: общий лимит времени на сбор (секунды)
+
+    Returns:
+        Список пар в порядке feed_urls; статьи = None, если фид упал
+        с исключением или не успел до дедлайна.
+    """
+    if not feed_urls:
+        return []
+
+    max_workers = max_workers or RSS_MAX_WORKERS
+    per_host_limit = per_host_limit or RSS_PER_HOST_LIMIT
+    deadline = deadline if deadline is not None else RSS_DEADLINE_SECONDS
+
+    started = time.monotonic()
+    stop_at = started + deadline
+    host_limits: Dict[str, threading.Semaphore] = {}
+    for url in feed_urls:
+        host_limits.setdefault(_host(url), threading.Semaphore(per_host_limit))
+
+    def _fetch_one(url: str) -> Optional[List[Dict]]:
+        limit = host_limits[_host(url)]
+        # Ждём свободный слот хоста, но не дольше общего дедлайна
+        if not limit.acquire(timeout=max(0.0, stop_at - time.monotonic())):
+            return None
+        try:
+            if time.monotonic() >= stop_at:
+                return None
+            return parse_feed(url)
+        finally:
+            limit.release()
+
+    executor = ThreadPoolExecutor(max_workers=min(max_workers, len(feed_urls)))
+    try:
+        futures = [executor.submit(_fetch_one, url) for url in feed_urls]
+        wait(futures, timeout=deadline)
+    finally:
+        # Не ждём зависшие запросы: по дедлайну оставшиеся фиды считаются пропущенными
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    results = []
+    timed_out = 0
+    for url, future in zip(feed_urls, futures):
+        if not future.done() or future.cancelled():
+            timed_out += 1
+            results.append((url, None))
+            continue
+        error = future.exception()
+        if error is not None:
+            print(f"❌ Ошибка запроса RSS {url}: {error}")
+            results.append((url, None))
+            continue
+        results.append((url, future.result()))
+
+    elapsed = time.monotonic() - started
+    print(f"⏱️ Сбор {len(feed_urls)} RSS фидов занял {elapsed:.1f} с (потоков: {max_workers}, на хост: {per_host_limit})")
+    if timed_out:
+        print(f"⚠️ Не уложились в дедлайн {deadline:g} с: {timed_out} фидов")
+    return results
@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+    Потоковый парсер RSS 2.0 / Atom / FeedBurner
+
+    Читает фид через iterparse и отдаёт нормализованные статьи по мере
+    поступления элементов, сразу удаляя разобранные элементы из дерева.
+    Фиды отсортированы от новых к старым, поэтому после N подряд уже
+    обработанных URL чтение прекращается: дальше идут только старые статьи.
+
+    Если XML битый, read_feed_articles повторяет разбор всего содержимого
+    после нестрогого декодирования UTF-8 (как прежний парсер); если и это
+    не помогло — FeedParseError, и частичный список в кэш фидов не попадает.
+
+    Автор: VR-Lounge
+"""
+
+import os
+import xml.etree.ElementTree as ET
+from typing import BinaryIO, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+
+RSS_EARLY_STOP_AFTER = int(os.getenv('RSS_EARLY_STOP_AFTER', '5'))
+
+_ITEM_TAGS = {'item', 'entry'}
+_DESCRIPTION_TAGS = ('description', 'summary', 'content')
+_PUB_DATE_TAGS = ('pubDate', 'published', 'updated')
+
+
+class FeedParseError(ValueError):
+    """XML фида не разобран до конца — список статей неполный."""
+
+
+class _RecordingReader:
+    """Файловый объект, запоминающий прочитанные байты (для повторного разбора)."""
+
+    def __init__(self, source: BinaryIO):
+        self.source = source
+        self.chunks: List[bytes] = []
+
+    def read(self, size: int = -1) -> bytes:
+        data = self.source.read(size)
+        if data:
+            self.chunks.append(data)
+        return data
+
+    def content(self) -> bytes:
+        """Всё содержимое: уже прочитанное и остаток источника."""
+        return b''.join(self.chunks) + (self.source.read() or b'')
+
+
+def _local_name(tag) -> str:
+    if not isinstance(tag, str):
+        return ''
+    return tag.rsplit('}', 1)[-1]
+
+
+def _text(elem) -> str:
+    return (elem.text or '').strip() if elem is not None else ''
+
+
+def _extract_article(item, rss_url: str) -> Optional[Dict]:
+    """Извлекает title/link/pub_date/description за один проход по дочерним элементам."""
+    title = ''
+    link = ''
+    guid = ''
+    children = {}
+    for child in item:
+        name = _local_name(child.tag)
+        if name == 'link':
+            # Atom: <link rel="alternate" href="..."/>, RSS 2.0: <link>url</link>
+            rel = child.get('rel')
+            if rel not in (None, 'alternate'):
+                continue
+            value = (child.get('href') or '').strip() or _text(child)
+            if value and (not link or rel == 'alternate'):
+                link = value
+        elif name == 'title' and not title:
+            title = _text(child)
+        elif name == 'guid' and not guid:
+            guid = _text(child)
+        elif name not in children and _text(child):
+            children[name] = child
+
+    if not link and guid.startswith(('http://', 'https://')):
+        link = guid
+
+    if not title or not link:
+        return None
+
+    pub_date = None
+    for tag in _PUB_DATE_TAGS:
+        value = _text(children.get(tag))
+        if value:
+            pub_date = value
+            break
+
+    description = ''
+    for tag in _DESCRIPTION_TAGS:
+        value = _text(children.get(tag))
+        if value:
+            description = value
+            break
+
+    return {
+        'title': title,
+        'link': link,
+        'pub_date': pub_date,
+        'description': description,
+        'rss_feed_url': rss_url  # Сохраняем URL RSS фида для ротации источников
+    }
+
+
+def _iter_event_articles(
+    events: Iterable[Tuple[str, ET.Element]],
+    rss_url: str,
+    is_processed: Optional[Callable[[str], bool]],
+    stop_after: int
+) -> Iterator[Dict]:
+    """Статьи из потока событий start/end (iterparse или XMLPullParser)."""
+    stack = []
+    processed_in_row = 0
+    for event, elem in events:
+        if event == 'start':
+            stack.append(elem)
+            continue
+
+        stack.pop()
+        if _local_name(elem.tag) not in _ITEM_TAGS:
+            continue
+
+        article = _extract_article(elem, rss_url)
+        # Разобранный элемент больше не нужен — держим в памяти только текущий
+        if stack:
+            stack[-1].remove(elem)
+        elem.clear()
+
+        if article is None:
+            continue
+        yield article
+
+        if is_processed and stop_after > 0:
+            if is_processed(article['link']):
+                processed_in_row += 1
+                if processed_in_row >= stop_after:
+                    print(f"⏹️ {stop_after} уже обработанных статей подряд, дальше не читаю: {rss_url[:60]}...")
+                    return
+            else:
+                processed_in_row = 0
+
+
+def iter_feed_articles(
+    source: BinaryIO,
+    rss_url: str,
+    *,
+    is_processed: Callable[[str], bool] = None,
+    stop_after: int = None
+) -> Iterator[Dict]:
+    """
+    Потоково разбирает фид и отдаёт статьи по одной.
+
+    Args:
+        source: файловый объект с XML (например, response.raw)
+        rss_url: URL фида (сохраняется в каждой статье)
+        is_processed: функция проверки «статья уже обработана»
+        stop_after: сколько уже обработанных URL подряд означает конец новых статей
+                    (0 — читать фид целиком)
+
+    Raises:
+        FeedParseError: XML оборвался или битый (уже отданные статьи — неполный список)
+    """
+    if stop_after is None:
+        stop_after = RSS_EARLY_STOP_AFTER
+    try:
+        yield from _iter_event_articles(
+            ET.iterparse(source, events=('start', 'end')), rss_url, is_processed, stop_after
+        )
+    except ET.ParseError as e:
+        print(f"⚠️ Ошибка разбора XML {rss_url[:60]}...: {e}")
+        raise FeedParseError(str(e)) from e
+
+
+def read_feed_articles(
+    source: BinaryIO,
+    rss_url: str,
+    *,
+    is_processed: Callable[[str], bool] = None,
+    stop_after: int = None
+) -> List[Dict]:
+    """
+    Список статей фида: потоковый разбор, а при битом XML — повтор по всему
+    содержимому, декодированному как UTF-8 с пропуском ошибочных байтов.
+
+    Raises:
+        FeedParseError: фид не удалось разобрать и после нестрогого декодирования
+    """
+    if stop_after is None:
+        stop_after = RSS_EARLY_STOP_AFTER
+    reader = _RecordingReader(source)
+    try:
+        return list(iter_feed_articles(reader, rss_url, is_processed=is_processed, stop_after=stop_after))
+    except FeedParseError:
+        pass
+
+    текст = reader.content().decode('utf-8', errors='ignore')
+    parser = ET.XMLPullParser(events=('start', 'end'))
+    try:
+        parser.feed(текст)
+        parser.close()
+    except ET.ParseError as e:
+        print(f"❌ Фид не разобран и после нестрогого декодирования {rss_url[:60]}...: {e}")
+        raise FeedParseError(str(e)) from e
+    articles = list(_iter_event_articles(parser.read_events(), rss_url, is_processed, stop_after))
+    print(f"♻️ Фид разобран после нестрогого декодирования: {len(articles)} статей из {rss_url[:60]}...")
+    return articles
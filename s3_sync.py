@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+    Дифференциальная синхронизация папки с S3 (Yandex Object Storage)
+
+    Вместо отдельного `aws s3 cp` на каждый файл использует один
+    S3-клиент с пулом соединений и ограниченный пул загрузок. Загружаются
+    только новые и изменённые файлы: локальный MD5 сравнивается с ETag
+    объекта в бакете (один постраничный листинг префикса). MD5 кэшируется
+    в манифесте загрузки по размеру и mtime файла, чтобы не пересчитывать
+    хеши неизменных файлов. С delete=True удаляются объекты под префиксом,
+    которых больше нет в папке (для каталогов, полностью пересоздаваемых
+    локально, например WebP-вариантов).
+
+    Клиент можно передать снаружи (например, для moto или MinIO),
+    адрес хранилища переопределяется через S3_ENDPOINT_URL.
+
+    Автор: VR-Lounge
+"""
+
+import fnmatch
+import hashlib
+import json
+import mimetypes
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Optional
+
+try:
+    import boto3
+    from botocore.config import Config
+except ImportError:
+    boto3 = None
+
+
+S3_ENDPOINT_URL = os.getenv('S3_ENDPOINT_URL', 'https://storage.yandexcloud.net')
+S3_REGION = os.getenv('S3_REGION', 'ru-central1')
+S3_UPLOAD_WORKERS = int(os.getenv('S3_UPLOAD_WORKERS', '8'))
+
+
+def доступен() -> bool:
+    """boto3 установлен и синхронизацию можно выполнить в процессе."""
+    return boto3 is not None
+
+
+def создать_клиент(access_key: str, secret_key: str, endpoint_url: str = None, workers: int = None):
+    """S3-клиент с пулом соединений на число потоков загрузки."""
+    workers = workers or S3_UPLOAD_WORKERS
+    return boto3.client(
+        's3',
+        endpoint_url=endpoint_url or S3_ENDPOINT_URL,
+        region_name=S3_REGION,
+        aws_access_key_id=access_key,
+        aws_secret_access_key=secret_key,
+        config=Config(max_pool_connections=workers, retries={'max_attempts': 3, 'mode': 'standard'})
+    )
+
+
+def _md5(path: Path) -> str:
+    digest = hashlib.md5()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _load_manifest(path: Optional[Path]) -> Dict:
+    if not path or not path.exists():
+        return {}
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f).get('files', {})
+    except Exception:
+        return {}
+
+
+def _save_manifest(path: Optional[Path], files: Dict) -> None:
+    if not path:
+        return
+    try:
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({'version': 1, 'updated_at': datetime.now().isoformat(), 'files': files}, f, ensure_ascii=False)
+    except Exception as e:
+        print(f"⚠️ Не удалось сохранить манифест загрузки: {e}")
+
+
+def _remote_etags(client, bucket: str, prefix: str) -> Optional[Dict[str, Dict]]:
+    """{ключ: {etag, size}} всех объектов под префиксом; None, если листинг недоступен."""
+    objects = {}
+    try:
+        paginator = client.get_paginator('list_objects_v2')
+        for page in paginator.paginate(Bucket=bucket, Prefix=prefix):
+            for obj in page.get('Contents', []):
+                objects[obj['Key']] = {'etag': obj.get('ETag', '').strip('"'), 'size': obj.get('Size')}
+    except Exception as e:
+        print(f"⚠️ Не удалось получить список объектов {bucket}/{prefix}: {e}")
+        return None
+    return objects
+
+
+def синхронизировать_папку(
+    local_dir: Path,
+    bucket: str,
+    prefix: str,
+    *,
+    client=None,
+    manifest_path: Path = None,
+    workers: int = None,
+    acl: str = 'public-read',
+    pattern: str = '*.*',
+    delete: bool = False
+) -> Dict[str, int]:
+    """
+    Загружает в s3://bucket/prefix новые и изменённые файлы из local_dir.
+
+    delete: удалить объекты прямо под префиксом (по pattern), которых нет
+    в local_dir; вложенные «папки» префикса не затрагиваются.
+
+    Returns:
+        {'uploaded': N, 'skipped': N, 'failed': N, 'deleted': N}
+    """
+    local_dir = Path(local_dir)
+    workers = workers or S3_UPLOAD_WORKERS
+    if client is None:
+        client = создать_клиент(os.getenv('YANDEX_ACCESS_KEY_ID'), os.getenv('YANDEX_SECRET_ACCESS_KEY'), workers=workers)
+    if prefix and not prefix.endswith('/'):
+        prefix += '/'
+
+    manifest = _load_manifest(manifest_path)
+    remote = _remote_etags(client, bucket, prefix)
+
+    files = {}
+    to_upload = []
+    skipped = 0
+    for path in sorted(p for p in local_dir.glob(pattern) if p.is_file()):
+        stat = path.stat()
+        entry = manifest.get(path.name, {})
+        if entry.get('size') == stat.st_size and entry.get('mtime') == stat.st_mtime and entry.get('md5'):
+            md5 = entry['md5']
+        else:
+            md5 = _md5(path)
+        files[path.name] = {'size': stat.st_size, 'mtime': stat.st_mtime, 'md5': md5, 'uploaded_md5': entry.get('uploaded_md5')}
+
+        key = prefix + path.name
+        if remote is not None:
+            obj = remote.get(key)
+            # ETag составной загрузки (с '-') не равен MD5 — сверяем размер и последнюю загрузку
+            if obj and (obj['etag'] == md5 or ('-' in obj['etag'] and obj['size'] == stat.st_size
+                                                and entry.get('uploaded_md5') == md5)):
+                files[path.name]['uploaded_md5'] = md5
+                skipped += 1
+                continue
+        elif entry.get('uploaded_md5') == md5:
+            skipped += 1
+            continue
+        to_upload.append((path, key, md5))
+
+    lock = threading.Lock()
+    uploaded = 0
+    failed = 0
+
+    def _upload(task):
+        nonlocal uploaded, failed
+        path, key, md5 = task
+        content_type = mimetypes.guess_type(path.name)[0] or 'application/octet-stream'
+        try:
+            with open(path, 'rb') as body:
+                client.put_object(Bucket=bucket, Key=key, Body=body, ACL=acl, ContentType=content_type)
+            with lock:
+                files[path.name]['uploaded_md5'] = md5
+                uploaded += 1
+        except Exception as e:
+            with lock:
+                failed += 1
+            print(f"❌ Ошибка загрузки {path.name}: {str(e)[:100]}")
+
+    if to_upload:
+        print(f"📤 Загружаю {len(to_upload)} новых/изменённых файлов в s3://{bucket}/{prefix} (без изменений: {skipped})")
+        with ThreadPoolExecutor(max_workers=min(workers, len(to_upload))) as executor:
+            list(executor.map(_upload, to_upload))
+
+    deleted = 0
+    if delete and remote is not None:
+        orphans = [
+            key for key in sorted(remote)
+            if '/' not in key[len(prefix):] and fnmatch.fnmatch(key[len(prefix):], pattern)
+            and key[len(prefix):] not in files
+        ]
+        for start in range(0, len(orphans), 1000):
+            batch = orphans[start:start + 1000]
+            try:
+                response = client.delete_objects(
+                    Bucket=bucket, Delete={'Objects': [{'Key': key} for key in batch], 'Quiet': True}
+                )
+                errors = response.get('Errors', [])
+                deleted += len(batch) - len(errors)
+                failed += len(errors)
+            except Exception as e:
+                failed += len(batch)
+                print(f"❌ Ошибка удаления устаревших объектов: {str(e)[:100]}")
+        if orphans:
+            print(f"🗑️ Удалено из s3://{bucket}/{prefix} устаревших объектов: {deleted}")
+
+    _save_manifest(manifest_path, files)
+    return {'uploaded': uploaded, 'skipped': skipped, 'failed': failed, 'deleted': deleted}
@@ -18,6 +18,7 @@ import requests
 from bs4 import BeautifulSoup
 
 from content_library import load_library, save_library, upsert_item, build_library_item, normalize_images
+from image_prefilter import BLOCKED_IMAGE_URLS, BLOCKED_IMAGE_KEYWORDS
 
 
 STATE_FILE = Path(".skinnyms_queue.json")
@@ -29,15 +30,6 @@ HEADERS = {
     "Referer": "https://skinnyms.com/"
 }
 
-BLOCKED_IMAGE_URLS = {
-    "https://skinnyms.com/wp-content/uploads/2024/11/Skinny-Ms-Graphics-Horizontal.png"
-}
-
-BLOCKED_IMAGE_KEYWORDS = [
-    "graphics", "horizontal", "banner", "bundle", "promo", "cta", "button",
-    "ad-", "advert", "logo", "skinny-ms-graphics", "skinnyms-graphics"
-]
-
 
 def load_state() -> Dict:
     if not STATE_FILE.exists():
@@ -0,0 +1,600 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+    Единое хранилище состояния (SQLite, WAL)
+
+    Заменяет набор dot-файлов JSON, которые перечитывались и целиком
+    перезаписывались при каждом изменении:
+    .content_hashes.json, .telegram_recent.json, .publication_logs.json,
+    .answered_messages.json, .auto_reply_state.json, content_library.json
+    и файлы обработанных статей парсеров. Здесь же хранятся перцептивные
+    хеши опубликованных изображений (.image_phashes.json).
+
+    Модули работают через небольшие функции-репозитории этого файла,
+    запись — одна вставка строки вместо перезаписи файла. При первом
+    подключении к новой базе данные один раз переносятся из JSON;
+    `python3 state_db.py export` выгружает состояние обратно в те же JSON
+    (для шага cache в GitHub Actions и коммита content_library.json).
+
+    Автор: VR-Lounge
+"""
+
+import json
+import os
+import sqlite3
+import sys
+import tempfile
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+
+# В Cloud Function код лежит в каталоге только для чтения — база уходит в /tmp
+STATE_DB_FILE = Path(os.getenv(
+    'STATE_DB_FILE',
+    '.autopost_state.db' if os.access('.', os.W_OK) else os.path.join(tempfile.gettempdir(), '.autopost_state.db')
+))
+
+# JSON файлы, из которых выполняется миграция и в которые выгружается состояние
+CONTENT_HASHES_FILE = Path('.content_hashes.json')
+TEXT_SIGNATURES_FILE = Path('.text_signatures.json')
+TELEGRAM_RECENT_FILE = Path('.telegram_recent.json')
+PUBLICATION_LOG_FILE = Path('.publication_logs.json')
+ANSWERED_MESSAGES_FILE = Path('.answered_messages.json')
+AUTO_REPLY_STATE_FILE = Path('.auto_reply_state.json')
+LIBRARY_FILE = Path(__file__).parent / 'content_library.json'
+IMAGE_PHASHES_FILE = Path('.image_phashes.json')
+PROCESSED_FILES = [Path('.womenshealth_processed.json'), Path('.menshealth_processed.json')]
+
+# Тип хеша -> ключ в .content_hashes.json
+CONTENT_HASH_KINDS = {
+    'text': 'text_hashes',
+    'image': 'image_hashes',
+    'pair': 'content_pairs',
+}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+CREATE TABLE IF NOT EXISTS processed_articles (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    store TEXT NOT NULL,
+    url_key TEXT NOT NULL,
+    url TEXT NOT NULL,
+    processed_at TEXT,
+    UNIQUE (store, url_key)
+);
+CREATE TABLE IF NOT EXISTS content_hashes (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    kind TEXT NOT NULL CHECK (kind IN ('text', 'image', 'pair')),
+    hash TEXT NOT NULL,
+    UNIQUE (kind, hash)
+);
+CREATE TABLE IF NOT EXISTS text_signatures (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    text_hash TEXT NOT NULL UNIQUE,
+    title TEXT,
+    signature TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS telegram_recent (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    text_hash TEXT NOT NULL,
+    image_url TEXT,
+    created_at TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_telegram_recent_text ON telegram_recent (text_hash);
+CREATE TABLE IF NOT EXISTS publication_logs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    date TEXT,
+    post_id TEXT,
+    image_url TEXT,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_publication_logs_date ON publication_logs (date);
+CREATE TABLE IF NOT EXISTS answered_messages (
+    message_id TEXT PRIMARY KEY,
+    answered_at TEXT
+);
+CREATE TABLE IF NOT EXISTS library_items (
+    url_key TEXT PRIMARY KEY,
+    position INTEGER NOT NULL,
+    source TEXT,
+    relevance_score INTEGER,
+    fetched_at TEXT,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_library_items_source ON library_items (source, relevance_score);
+CREATE INDEX IF NOT EXISTS idx_library_items_position ON library_items (position);
+CREATE TABLE IF NOT EXISTS image_phashes (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    source TEXT NOT NULL,
+    url_key TEXT NOT NULL,
+    phash INTEGER NOT NULL,
+    UNIQUE (source, url_key)
+);
+"""
+
+_lock = threading.RLock()
+_conn: Optional[sqlite3.Connection] = None
+
+
+def _now() -> str:
+    return datetime.now().isoformat()
+
+
+def _connect() -> sqlite3.Connection:
+    global _conn
+    if _conn is None:
+        conn = sqlite3.connect(str(STATE_DB_FILE), check_same_thread=False, timeout=30)
+        conn.row_factory = sqlite3.Row
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        conn.executescript(SCHEMA)
+        _conn = conn
+        if get_meta('json_migrated') is None:
+            migrate_from_json()
+    return _conn
+
+
+@contextmanager
+def transaction():
+    """Одна транзакция под общей блокировкой (соединение делится между потоками)."""
+    with _lock:
+        conn = _connect()
+        try:
+            yield conn
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+
+
+def _query(sql: str, params: Tuple = ()) -> List[sqlite3.Row]:
+    with _lock:
+        return _connect().execute(sql, params).fetchall()
+
+
+def data_version() -> int:
+    """Счётчик изменений базы другими соединениями (PRAGMA data_version)."""
+    return _query('PRAGMA data_version')[0][0]
+
+
+# ============= META / KEY-VALUE =============
+
+def get_meta(key: str, default: Any = None) -> Any:
+    with _lock:
+        row = _connect().execute('SELECT value FROM meta WHERE key = ?', (key,)).fetchone()
+    return json.loads(row['value']) if row else default
+
+
+def set_meta(key: str, value: Any) -> None:
+    with transaction() as conn:
+        conn.execute(
+            'INSERT INTO meta (key, value) VALUES (?, ?) ON CONFLICT(key) DO UPDATE SET value = excluded.value',
+            (key, json.dumps(value, ensure_ascii=False))
+        )
+
+
+# ============= ОБРАБОТАННЫЕ СТАТЬИ =============
+
+def processed_articles(store: str) -> List[sqlite3.Row]:
+    """Возвращает (url, url_key, processed_at) в порядке добавления."""
+    return _query('SELECT url, url_key, processed_at FROM processed_articles WHERE store = ? ORDER BY id', (store,))
+
+
+def add_processed_article(store: str, url: str, url_key: str, max_items: int = 1000) -> None:
+    with transaction() as conn:
+        conn.execute(
+            'INSERT OR IGNORE INTO processed_articles (store, url_key, url, processed_at) VALUES (?, ?, ?, ?)',
+            (store, url_key, url, _now())
+        )
+        _trim(conn, 'processed_articles', 'store = ?', (store,), max_items)
+
+
+def _trim(conn: sqlite3.Connection, table: str, where: str, params: Tuple, max_items: int) -> None:
+    """Оставляет последние max_items строк (по id) для условия where."""
+    conn.execute(
+        f'DELETE FROM {table} WHERE {where} AND id <= '
+        f'(SELECT id FROM {table} WHERE {where} ORDER BY id DESC LIMIT 1 OFFSET ?)',
+        params + params + (max_items,)
+    )
+
+
+# ============= ХЕШИ КОНТЕНТА =============
+
+def has_content_hash(kind: str, value: str) -> bool:
+    return bool(_query('SELECT 1 FROM content_hashes WHERE kind = ? AND hash = ?', (kind, value)))
+
+
+def content_hashes(kind: str) -> List[str]:
+    return [row['hash'] for row in _query('SELECT hash FROM content_hashes WHERE kind = ? ORDER BY id', (kind,))]
+
+
+def add_content_hashes(items: Iterable[Tuple[str, str]], max_items: int = 2000) -> None:
+    """Добавляет пары (kind, hash) одной транзакцией."""
+    with transaction() as conn:
+        kinds = set()
+        for kind, value in items:
+            conn.execute('INSERT OR IGNORE INTO content_hashes (kind, hash) VALUES (?, ?)', (kind, value))
+            kinds.add(kind)
+        for kind in kinds:
+            _trim(conn, 'content_hashes', 'kind = ?', (kind,), max_items)
+
+
+def load_content_hashes() -> Dict[str, List[str]]:
+    """Хеши в формате .content_hashes.json."""
+    return {key: content_hashes(kind) for kind, key in CONTENT_HASH_KINDS.items()}
+
+
+def replace_content_hashes(data: Dict[str, List[str]]) -> None:
+    with transaction() as conn:
+        conn.execute('DELETE FROM content_hashes')
+        for kind, key in CONTENT_HASH_KINDS.items():
+            conn.executemany(
+                'INSERT OR IGNORE INTO content_hashes (kind, hash) VALUES (?, ?)',
+                [(kind, value) for value in data.get(key, [])]
+            )
+
+
+# ============= MINHASH ПОДПИСИ ТЕКСТОВ =============
+
+def text_signatures() -> List[Dict]:
+    """Возвращает {text_hash, title, signature} в порядке добавления."""
+    rows = _query('SELECT text_hash, title, signature FROM text_signatures ORDER BY id')
+    return [
+        {'text_hash': row['text_hash'], 'title': row['title'] or '', 'signature': json.loads(row['signature'])}
+        for row in rows
+    ]
+
+
+def add_text_signatures(items: Iterable[Dict], max_items: int = 5000) -> None:
+    """Добавляет подписи {text_hash, title, signature} одной транзакцией."""
+    with transaction() as conn:
+        conn.executemany(
+            'INSERT OR IGNORE INTO text_signatures (text_hash, title, signature) VALUES (?, ?, ?)',
+            [(i['text_hash'], i.get('title', ''), json.dumps(i['signature'])) for i in items]
+        )
+        _trim(conn, 'text_signatures', '1 = ?', (1,), max_items)
+
+
+# ============= TELEGRAM АНТИ-ПОВТОР =============
+
+def recent_telegram_posts(limit: int) -> List[Dict]:
+    rows = _query(
+        'SELECT text_hash, image_url, created_at FROM telegram_recent ORDER BY id DESC LIMIT ?', (limit,)
+    )
+    return [dict(row) for row in reversed(rows)]
+
+
+def add_telegram_post(text_hash: str, image_url: str, max_items: int) -> None:
+    with transaction() as conn:
+        conn.execute(
+            'INSERT INTO telegram_recent (text_hash, image_url, created_at) VALUES (?, ?, ?)',
+            (text_hash, image_url, _now())
+        )
+        _trim(conn, 'telegram_recent', '1 = 1', (), max_items)
+
+
+# ============= ЛОГИ ПУБЛИКАЦИЙ =============
+
+def add_publication_log(data: Dict, max_items: int = 1000) -> None:
+    with transaction() as conn:
+        _insert_publication_log(conn, data)
+        _trim(conn, 'publication_logs', '1 = 1', (), max_items)
+
+
+def _insert_publication_log(conn: sqlite3.Connection, data: Dict) -> None:
+    conn.execute(
+        'INSERT INTO publication_logs (date, post_id, image_url, data) VALUES (?, ?, ?, ?)',
+        (data.get('date'), data.get('post_id'), data.get('image_url'), json.dumps(data, ensure_ascii=False))
+    )
+
+
+def publication_logs(limit: Optional[int] = None) -> List[Dict]:
+    """Последние limit записей (или все) в хронологическом порядке."""
+    if limit is None:
+        rows = _query('SELECT data FROM publication_logs ORDER BY id')
+    else:
+        rows = list(reversed(_query('SELECT data FROM publication_logs ORDER BY id DESC LIMIT ?', (limit,))))
+    return [json.loads(row['data']) for row in rows]
+
+
+def recent_publication_images(limit: int) -> List[str]:
+    rows = _query('SELECT image_url FROM publication_logs ORDER BY id DESC LIMIT ?', (limit,))
+    return [row['image_url'] for row in rows if row['image_url']]
+
+
+# ============= АВТООТВЕТЫ =============
+
+def is_message_answered(message_id: str) -> bool:
+    return bool(_query('SELECT 1 FROM answered_messages WHERE message_id = ?', (str(message_id),)))
+
+
+def answered_message_ids() -> List[str]:
+    return [row['message_id'] for row in _query('SELECT message_id FROM answered_messages')]
+
+
+def add_answered_message(message_id: str, max_items: int = 10000) -> None:
+    with transaction() as conn:
+        conn.execute(
+            'INSERT OR IGNORE INTO answered_messages (message_id, answered_at) VALUES (?, ?)',
+            (str(message_id), _now())
+        )
+        # Храним последние max_items сообщений (по номеру message_id)
+        conn.execute(
+            'DELETE FROM answered_messages WHERE message_id NOT IN '
+            '(SELECT message_id FROM answered_messages ORDER BY CAST(message_id AS INTEGER) DESC LIMIT ?)',
+            (max_items,)
+        )
+
+
+# ============= БИБЛИОТЕКА КОНТЕНТА =============
+
+def library_items(source: Optional[str] = None) -> List[Dict]:
+    if source is None:
+        rows = _query('SELECT data FROM library_items ORDER BY position')
+    else:
+        rows = _query('SELECT data FROM library_items WHERE source = ? ORDER BY position', (source,))
+    return [json.loads(row['data']) for row in rows]
+
+
+def _library_row(url_key: str, position: int, item: Dict) -> Tuple:
+    score = item.get('relevance_score')
+    return (
+        url_key, position, item.get('source'),
+        score if isinstance(score, int) else None,
+        item.get('fetched_at'), json.dumps(item, ensure_ascii=False)
+    )
+
+
+def upsert_library_item(url_key: str, item: Dict) -> None:
+    with transaction() as conn:
+        row = conn.execute('SELECT position FROM library_items WHERE url_key = ?', (url_key,)).fetchone()
+        if row:
+            position = row['position']
+        else:
+            position = conn.execute('SELECT COALESCE(MAX(position), -1) + 1 FROM library_items').fetchone()[0]
+        conn.execute(
+            'INSERT OR REPLACE INTO library_items (url_key, position, source, relevance_score, fetched_at, data) '
+            'VALUES (?, ?, ?, ?, ?, ?)',
+            _library_row(url_key, position, item)
+        )
+
+
+def replace_library_items(items: List[Tuple[str, Dict]], updated_at: str) -> None:
+    """Синхронизирует таблицу с библиотекой [(url_key, item)] одной транзакцией."""
+    with transaction() as conn:
+        conn.execute('DELETE FROM library_items')
+        conn.executemany(
+            'INSERT OR REPLACE INTO library_items (url_key, position, source, relevance_score, fetched_at, data) '
+            'VALUES (?, ?, ?, ?, ?, ?)',
+            [_library_row(url_key, position, item) for position, (url_key, item) in enumerate(items)]
+        )
+        conn.execute(
+            'INSERT INTO meta (key, value) VALUES (?, ?) ON CONFLICT(key) DO UPDATE SET value = excluded.value',
+            ('library_updated_at', json.dumps(updated_at))
+        )
+
+
+# ============= ПЕРЦЕПТИВНЫЕ ХЕШИ ИЗОБРАЖЕНИЙ =============
+
+def _signed64(value: int) -> int:
+    """64-битный хеш -> знаковое INTEGER SQLite."""
+    return value - (1 << 64) if value >= (1 << 63) else value
+
+
+def image_phashes() -> List[Dict]:
+    """Возвращает {source, url_key, phash} в порядке добавления (phash — беззнаковый)."""
+    rows = _query('SELECT source, url_key, phash FROM image_phashes ORDER BY id')
+    return [
+        {'source': row['source'], 'url_key': row['url_key'], 'phash': row['phash'] & 0xFFFFFFFFFFFFFFFF}
+        for row in rows
+    ]
+
+
+def add_image_phashes(items: Iterable[Dict], max_items: int = 20000) -> None:
+    """Добавляет хеши {source, url_key, phash} одной транзакцией."""
+    with transaction() as conn:
+        conn.executemany(
+            'INSERT OR IGNORE INTO image_phashes (source, url_key, phash) VALUES (?, ?, ?)',
+            [(i['source'], i['url_key'], _signed64(i['phash'])) for i in items]
+        )
+        _trim(conn, 'image_phashes', '1 = ?', (1,), max_items)
+
+
+# ============= МИГРАЦИЯ И ЭКСПОРТ =============
+
+def _read_json(path: Path) -> Any:
+    if not path.exists():
+        return None
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except Exception as e:
+        print(f"⚠️ Не удалось прочитать {path}: {e}")
+        return None
+
+
+def _write_json(path: Path, data: Any) -> None:
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+
+
+def _export(path: Path, data: Any, has_data: Any) -> None:
+    """Пишет JSON, если в базе есть данные или файл уже существовал (чтобы отразить очистку)."""
+    if has_data or path.exists():
+        _write_json(path, data)
+
+
+def migrate_from_json(force: bool = False) -> None:
+    """Однократно переносит существующие JSON файлы в базу."""
+    if not force and get_meta('json_migrated') is not None:
+        return
+
+    перенесено = []
+    with transaction() as conn:
+        for path in PROCESSED_FILES:
+            data = _read_json(path)
+            if not data:
+                continue
+            # Импорт по месту: в Cloud Function автоответов этих модулей нет
+            from processed_store import normalize_article_url
+            conn.execute('DELETE FROM processed_articles WHERE store = ?', (str(path),))
+            for url in data.get('articles', []):
+                key = normalize_article_url(url)
+                if key:
+                    conn.execute(
+                        'INSERT OR IGNORE INTO processed_articles (store, url_key, url, processed_at) VALUES (?, ?, ?, ?)',
+                        (str(path), key, url, data.get('last_update'))
+                    )
+            перенесено.append(path.name)
+
+        data = _read_json(CONTENT_HASHES_FILE)
+        if data:
+            conn.execute('DELETE FROM content_hashes')
+            for kind, key in CONTENT_HASH_KINDS.items():
+                conn.executemany(
+                    'INSERT OR IGNORE INTO content_hashes (kind, hash) VALUES (?, ?)',
+                    [(kind, value) for value in data.get(key, [])]
+                )
+            перенесено.append(CONTENT_HASHES_FILE.name)
+
+        data = _read_json(TEXT_SIGNATURES_FILE)
+        if data:
+            conn.execute('DELETE FROM text_signatures')
+            conn.executemany(
+                'INSERT OR IGNORE INTO text_signatures (text_hash, title, signature) VALUES (?, ?, ?)',
+                [(i['text_hash'], i.get('title', ''), json.dumps(i['signature'])) for i in data.get('items', [])]
+            )
+            перенесено.append(TEXT_SIGNATURES_FILE.name)
+
+        data = _read_json(TELEGRAM_RECENT_FILE)
+        if data:
+            conn.execute('DELETE FROM telegram_recent')
+            conn.executemany(
+                'INSERT INTO telegram_recent (text_hash, image_url, created_at) VALUES (?, ?, ?)',
+                [(i.get('text_hash', ''), i.get('image_url', ''), i.get('created_at')) for i in data.get('items', [])]
+            )
+            перенесено.append(TELEGRAM_RECENT_FILE.name)
+
+        data = _read_json(PUBLICATION_LOG_FILE)
+        if data:
+            conn.execute('DELETE FROM publication_logs')
+            for item in data:
+                _insert_publication_log(conn, item)
+            перенесено.append(PUBLICATION_LOG_FILE.name)
+
+        data = _read_json(ANSWERED_MESSAGES_FILE)
+        if data:
+            conn.execute('DELETE FROM answered_messages')
+            conn.executemany(
+                'INSERT OR IGNORE INTO answered_messages (message_id, answered_at) VALUES (?, NULL)',
+                [(str(mid),) for mid in data.get('answered_message_ids', [])]
+            )
+            перенесено.append(ANSWERED_MESSAGES_FILE.name)
+
+        data = _read_json(AUTO_REPLY_STATE_FILE)
+        if data:
+            conn.execute(
+                'INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)',
+                ('auto_reply_last_update_id', json.dumps(data.get('last_update_id', 0)))
+            )
+            перенесено.append(AUTO_REPLY_STATE_FILE.name)
+
+        data = _read_json(LIBRARY_FILE)
+        if data and 'items' in data:
+            from content_library import normalize_url
+            conn.execute('DELETE FROM library_items')
+            position = 0
+            for item in data['items']:
+                key = normalize_url(item.get('url', ''))
+                if not key:
+                    continue
+                conn.execute(
+                    'INSERT OR REPLACE INTO library_items (url_key, position, source, relevance_score, fetched_at, data) '
+                    'VALUES (?, ?, ?, ?, ?, ?)',
+                    _library_row(key, position, item)
+                )
+                position += 1
+            conn.execute(
+                'INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)',
+                ('library_updated_at', json.dumps(data.get('updated_at')))
+            )
+            перенесено.append(LIBRARY_FILE.name)
+
+        data = _read_json(IMAGE_PHASHES_FILE)
+        if data:
+            conn.execute('DELETE FROM image_phashes')
+            conn.executemany(
+                'INSERT OR IGNORE INTO image_phashes (source, url_key, phash) VALUES (?, ?, ?)',
+                [(i['source'], i['url_key'], _signed64(int(i['phash'], 16))) for i in data.get('items', [])]
+            )
+            перенесено.append(IMAGE_PHASHES_FILE.name)
+
+        conn.execute(
+            'INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)',
+            ('json_migrated', json.dumps(_now()))
+        )
+
+    if перенесено:
+        print(f"🗄️ Состояние перенесено из JSON в {STATE_DB_FILE}: {', '.join(перенесено)}")
+
+
+def export_json() -> None:
+    """Выгружает состояние в JSON файлы прежнего формата."""
+    stores = [row['store'] for row in _query('SELECT DISTINCT store FROM processed_articles')]
+    for store in stores:
+        rows = processed_articles(store)
+        _write_json(Path(store), {
+            'articles': [row['url'] for row in rows],
+            'last_update': rows[-1]['processed_at'] if rows else None
+        })
+
+    hashes = load_content_hashes()
+    _export(CONTENT_HASHES_FILE, hashes, any(hashes.values()))
+    signatures = text_signatures()
+    if signatures:
+        # Компактно: подписи занимают основной объём файла
+        with open(TEXT_SIGNATURES_FILE, 'w', encoding='utf-8') as f:
+            json.dump({'items': signatures}, f, ensure_ascii=False, separators=(',', ':'))
+    phashes = image_phashes()
+    if phashes:
+        # 64-битные хеши — 16 hex-символов
+        with open(IMAGE_PHASHES_FILE, 'w', encoding='utf-8') as f:
+            json.dump(
+                {'items': [dict(i, phash=f"{i['phash']:016x}") for i in phashes]},
+                f, ensure_ascii=False, separators=(',', ':')
+            )
+    recent = recent_telegram_posts(-1)
+    _export(TELEGRAM_RECENT_FILE, {'items': recent}, recent)
+    logs = publication_logs()
+    _export(PUBLICATION_LOG_FILE, logs, logs)
+    answered = answered_message_ids()
+    _export(ANSWERED_MESSAGES_FILE, {'answered_message_ids': answered}, answered)
+    last_update_id = get_meta('auto_reply_last_update_id')
+    _export(AUTO_REPLY_STATE_FILE, {'last_update_id': last_update_id or 0}, last_update_id is not None)
+
+    items = library_items()
+    if items:
+        _write_json(LIBRARY_FILE, {
+            'version': 1,
+            'updated_at': get_meta('library_updated_at') or _now(),
+            'items': items
+        })
+    print(f"📤 Состояние выгружено из {STATE_DB_FILE} в JSON файлы")
+
+
+if __name__ == '__main__':
+    команда = sys.argv[1] if len(sys.argv) > 1 else ''
+    if команда == 'export':
+        export_json()
+    elif команда == 'migrate':
+        _connect()
+        migrate_from_json(force='--force' in sys.argv)
+    else:
+        print("Использование: python3 state_db.py export | migrate [--force]")
+        sys.exit(1)
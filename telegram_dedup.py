@@ -2,18 +2,20 @@
 # -*- coding: utf-8 -*-
 """
 Жёсткая защита от повторов в Telegram (текст + изображение).
+Фото сравниваются и по URL, и по перцептивному хешу (image_phash).
 """
 
-import json
 import hashlib
-from datetime import datetime
-from pathlib import Path
-from typing import Dict, List, Set
+from typing import Dict, Set
 from urllib.parse import urlparse
 
+import state_db
+from image_phash import ИНДЕКС_ИЗОБРАЖЕНИЙ
 
-STATE_FILE = Path(".telegram_recent.json")
-PUBLICATION_LOG_FILE = Path(".publication_logs.json")
+
+# Состояние хранится в state_db (выгружается в .telegram_recent.json)
+STATE_FILE = state_db.TELEGRAM_RECENT_FILE
+PUBLICATION_LOG_FILE = state_db.PUBLICATION_LOG_FILE
 
 
 def _normalize_text(text: str) -> str:
@@ -33,61 +35,40 @@ def _hash_text(text: str) -> str:
     return hashlib.sha256(_normalize_text(text).encode("utf-8")).hexdigest()
 
 
-def load_recent() -> Dict:
-    if not STATE_FILE.exists():
-        return {"items": []}
+def load_recent(max_items: int = -1) -> Dict:
     try:
-        with open(STATE_FILE, "r", encoding="utf-8") as f:
-            return json.load(f)
+        return {"items": state_db.recent_telegram_posts(max_items)}
     except Exception:
         return {"items": []}
 
 
-def save_recent(data: Dict) -> None:
-    with open(STATE_FILE, "w", encoding="utf-8") as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
-
-
 def _load_recent_images_from_logs(max_items: int) -> Set[str]:
-    if not PUBLICATION_LOG_FILE.exists():
-        return set()
     try:
-        with open(PUBLICATION_LOG_FILE, "r", encoding="utf-8") as f:
-            logs = json.load(f)
-        images = []
-        for item in logs[-max_items:]:
-            url = _normalize_url(item.get("image_url", ""))
-            if url:
-                images.append(url)
-        return set(images)
+        return {_normalize_url(url) for url in state_db.recent_publication_images(max_items) if _normalize_url(url)}
     except Exception:
         return set()
 
 
 def is_duplicate(text: str, image_url: str, max_items: int = 30) -> bool:
-    recent = load_recent()
+    recent = load_recent(max_items)
     text_hash = _hash_text(text)
     image_norm = _normalize_url(image_url)
     log_images = _load_recent_images_from_logs(max_items)
-    for item in recent.get("items", [])[-max_items:]:
+    for item in recent.get("items", []):
         if item.get("text_hash") == text_hash:
             return True
         if image_norm and item.get("image_url") == image_norm:
             return True
     if image_norm and image_norm in log_images:
         return True
+    # То же фото под другим URL среди всех фото канала (перцептивный хеш)
+    if image_url and ИНДЕКС_ИЗОБРАЖЕНИЙ.find_duplicate_url(image_url, sources=("telegram",)):
+        return True
     return False
 
 
 def record_post(text: str, image_url: str, max_items: int = 30) -> None:
-    recent = load_recent()
-    text_hash = _hash_text(text)
-    image_norm = _normalize_url(image_url)
-    recent.setdefault("items", []).append({
-        "text_hash": text_hash,
-        "image_url": image_norm,
-        "created_at": datetime.now().isoformat()
-    })
-    if len(recent["items"]) > max_items:
-        recent["items"] = recent["items"][-max_items:]
-    save_recent(recent)
+    state_db.add_telegram_post(_hash_text(text), _normalize_url(image_url), max_items)
+    if image_url:
+        ИНДЕКС_ИЗОБРАЖЕНИЙ.add(image_url, "telegram")
+        ИНДЕКС_ИЗОБРАЖЕНИЙ.flush()
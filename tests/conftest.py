@@ -0,0 +1,11 @@
+# -*- coding: utf-8 -*-
+"""
+    Общие настройки тестов: модули проекта лежат в корне репозитория.
+
+    Автор: VR-Lounge
+"""
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
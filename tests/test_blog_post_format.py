@@ -0,0 +1,50 @@
+# -*- coding: utf-8 -*-
+"""
+    Эталонные HTML для форматирования текста постов (generate_blog_post_page)
+
+    tests/golden/posts.json — все посты public_html/blog-posts.json на момент
+    переписывания форматтера, tests/golden/<id>.html — их HTML, отрисованный
+    прежней версией. Суффикс «ID: …» в title ссылки
+    на таймер строится через hash(), поэтому отрисовка идёт в отдельном
+    процессе с PYTHONHASHSEED=0.
+
+    Автор: VR-Lounge
+"""
+
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+GOLDEN_DIR = Path(__file__).resolve().parent / 'golden'
+
+ОТРИСОВКА = '''
+import json, sys
+import generate_blog_post_page as g
+посты = json.load(open(sys.argv[1], encoding='utf-8'))
+json.dump({п['id']: g.форматировать_текст_для_html(п['text'], п['title'], п['tags']) for п in посты}, sys.stdout)
+'''
+
+
+@pytest.fixture(scope='module')
+def отрисованные():
+    env = dict(os.environ, PYTHONHASHSEED='0', PYTHONIOENCODING='utf-8')
+    результат = subprocess.run(
+        [sys.executable, '-c', ОТРИСОВКА, str(GOLDEN_DIR / 'posts.json')],
+        cwd=REPO_ROOT, env=env, capture_output=True, check=True
+    )
+    return json.loads(результат.stdout.decode('utf-8'))
+
+
+def _id_постов():
+    return [п['id'] for п in json.loads((GOLDEN_DIR / 'posts.json').read_text(encoding='utf-8'))]
+
+
+@pytest.mark.parametrize('post_id', _id_постов())
+def test_formatted_html_matches_golden(отрисованные, post_id):
+    ожидаемый = (GOLDEN_DIR / f'{post_id}.html').read_text(encoding='utf-8')
+    assert отрисованные[post_id] == ожидаемый
@@ -0,0 +1,86 @@
+# -*- coding: utf-8 -*-
+"""
+    Кэш ответов deepseek_client: в JSON-режиме кэшируется только разбираемый JSON
+
+    Автор: VR-Lounge
+"""
+
+import json
+
+import pytest
+
+pytest.importorskip('requests')
+
+import deepseek_client
+
+
+class _Ответ:
+    status_code = 200
+    headers = {}
+
+    def __init__(self, content):
+        self._content = content
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return {'choices': [{'message': {'content': self._content}}], 'usage': {}}
+
+
+class _Сессия:
+    """Отдаёт заранее заданные тексты ответов по порядку."""
+
+    def __init__(self, *contents):
+        self.contents = list(contents)
+        self.calls = 0
+
+    def post(self, url, **kwargs):
+        self.calls += 1
+        return _Ответ(self.contents.pop(0))
+
+
+@pytest.fixture
+def сессия(monkeypatch, tmp_path):
+    monkeypatch.setattr(deepseek_client, 'DEEPSEEK_CACHE_FILE', str(tmp_path / 'cache.db'))
+    monkeypatch.setattr(deepseek_client, '_cache_conn', None)
+    monkeypatch.setattr(deepseek_client, '_cache_failed', False)
+
+    def установить(*contents):
+        fake = _Сессия(*contents)
+        monkeypatch.setattr(deepseek_client, '_get_session', lambda: fake)
+        return fake
+
+    yield установить
+    if deepseek_client._cache_conn is not None:
+        deepseek_client._cache_conn.close()
+
+
+MESSAGES = [{'role': 'user', 'content': 'Верни JSON'}]
+
+
+def test_valid_json_is_cached(сессия):
+    fake = сессия(json.dumps({'score': 90}))
+    assert deepseek_client.chat_json(MESSAGES, temperature=0.2) == {'score': 90}
+    assert deepseek_client.chat_json(MESSAGES, temperature=0.2) == {'score': 90}
+    assert fake.calls == 1
+
+
+def test_malformed_json_is_not_cached(сессия):
+    fake = сессия('{"score": 9', json.dumps({'score': 90}))
+    with pytest.raises(ValueError):
+        deepseek_client.chat_json(MESSAGES, temperature=0.2)
+    assert deepseek_client.chat_json(MESSAGES, temperature=0.2) == {'score': 90}
+    assert fake.calls == 2
+
+
+def test_malformed_cached_entry_is_ignored(сессия):
+    fake = сессия(json.dumps({'score': 90}))
+    # Запись, закэшированная до проверки JSON-ответов
+    data = {
+        'model': deepseek_client.DEEPSEEK_MODEL, 'messages': MESSAGES,
+        'temperature': 0.2, 'max_tokens': 1000, 'response_format': {'type': 'json_object'}
+    }
+    deepseek_client._cache_put(deepseek_client._cache_key(data), 'test', _Ответ('не JSON').json())
+    assert deepseek_client.chat_json(MESSAGES, temperature=0.2) == {'score': 90}
+    assert fake.calls == 1
@@ -0,0 +1,112 @@
+# -*- coding: utf-8 -*-
+"""
+    Повторы и метрики deepseek_client против локального mock-сервера
+
+    Сервер на http.server отдаёт заранее заданную последовательность ответов;
+    клиент направляется на него через DEEPSEEK_API_URL.
+
+    Автор: VR-Lounge
+"""
+
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+requests = pytest.importorskip('requests')
+
+import deepseek_client
+
+MESSAGES = [{'role': 'user', 'content': 'Привет'}]
+ОТВЕТ = {'choices': [{'message': {'content': 'ok'}}], 'usage': {'prompt_tokens': 7, 'completion_tokens': 3}}
+ОБРЫВ = 'обрыв'
+
+
+class _Обработчик(BaseHTTPRequestHandler):
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get('Content-Length') or 0))
+        self.server.запросы += 1
+        шаг = self.server.сценарий.pop(0)
+        if шаг == ОБРЫВ:
+            # Закрываем соединение без ответа — у клиента ConnectionError
+            self.close_connection = True
+            self.connection.close()
+            return
+        status, headers = шаг
+        body = json.dumps(ОТВЕТ).encode('utf-8') if status == 200 else b'{"error": "x"}'
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def сервер(monkeypatch):
+    httpd = ThreadingHTTPServer(('127.0.0.1', 0), _Обработчик)
+    httpd.сценарий = []
+    httpd.запросы = 0
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+
+    monkeypatch.setattr(deepseek_client, 'DEEPSEEK_API_URL', f'http://127.0.0.1:{httpd.server_address[1]}/v1/chat/completions')
+    monkeypatch.setattr(deepseek_client, 'DEEPSEEK_BACKOFF_BASE', 0.001)
+    monkeypatch.setattr(deepseek_client, 'DEEPSEEK_MAX_RETRIES', 3)
+    monkeypatch.setattr(deepseek_client, 'DEEPSEEK_CACHE_FILE', '')
+    monkeypatch.setattr(deepseek_client, '_metrics', {})
+    monkeypatch.setattr(deepseek_client, '_session', None)
+    yield httpd
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def _chat(**kwargs):
+    return deepseek_client.chat(MESSAGES, api_key='test', purpose='test', **kwargs)
+
+
+def test_retries_429_and_5xx_then_succeeds(сервер):
+    сервер.сценарий = [(429, {}), (503, {}), (200, {})]
+    assert _chat() == ОТВЕТ
+    assert сервер.запросы == 3
+    метрики = deepseek_client.metrics()['test']
+    assert метрики['calls'] == 1 and метрики['retries'] == 2 and метрики['errors'] == 0
+    assert метрики['prompt_tokens'] == 7 and метрики['completion_tokens'] == 3
+
+
+def test_raises_http_error_when_retries_exhausted(сервер):
+    сервер.сценарий = [(500, {})] * 4
+    with pytest.raises(requests.HTTPError):
+        _chat()
+    assert сервер.запросы == 4
+    метрики = deepseek_client.metrics()['test']
+    assert метрики['errors'] == 1 and метрики['retries'] == 3
+
+
+def test_client_error_is_not_retried(сервер):
+    сервер.сценарий = [(400, {}), (200, {})]
+    with pytest.raises(requests.HTTPError):
+        _chat()
+    assert сервер.запросы == 1
+    assert deepseek_client.metrics()['test']['errors'] == 1
+
+
+def test_connection_error_is_retried(сервер):
+    сервер.сценарий = [ОБРЫВ, (200, {})]
+    assert _chat() == ОТВЕТ
+    assert сервер.запросы == 2
+    assert deepseek_client.metrics()['test']['retries'] == 1
+
+
+def test_retry_after_is_obeyed(сервер, monkeypatch):
+    паузы = []
+    monkeypatch.setattr(deepseek_client.time, 'sleep', паузы.append)
+    сервер.сценарий = [(429, {'Retry-After': '2'}), (503, {'Retry-After': '120'}), (200, {})]
+    assert _chat() == ОТВЕТ
+    # Retry-After учитывается, но не больше DEEPSEEK_BACKOFF_MAX
+    assert паузы == [2.0, deepseek_client.DEEPSEEK_BACKOFF_MAX]
@@ -0,0 +1,49 @@
+# -*- coding: utf-8 -*-
+"""
+    Локальный отсев изображений image_prefilter по URL и alt (без сети)
+
+    Автор: VR-Lounge
+"""
+
+import pytest
+
+from image_prefilter import причина_по_url
+
+ПРОХОДЯТ = [
+    'https://x.com/wp/button-mushroom-soup.jpg',
+    'https://x.com/wp/signature-chicken-salad.jpg',
+    'https://x.com/wp/pixel-perfect-pancakes.jpg',
+    'https://x.com/wp/qr-code-free-meal-prep.jpg',
+    'https://x.com/wp/ads-free-workout.jpg',
+    'https://x.com/wp/iconic-squat.jpg',
+    'https://x.com/wp/wp-content/uploads/2024/05/squat-1200x800.jpg',
+    'https://skinnyms.com/wp-content/uploads/2024/05/greek-salad-recipe.jpg',
+    'https://skinnyms.com/wp-content/uploads/2024/05/avocado-salad-dressing.jpg',
+]
+
+ОТКЛОНЯЮТСЯ = [
+    'https://x.com/wp/site-logo.png',
+    'https://x.com/wp/favicon-32.png',
+    'https://x.com/wp/social-icons-sprite.png',
+    'https://x.com/wp/author-avatar.jpg',
+    'https://x.com/wp/lazy-placeholder.gif',
+    'https://x.com/wp/diagram.svg',
+    'https://x.com/wp/uploads/squat-150x150.jpg',
+    'https://skinnyms.com/wp-content/uploads/2024/11/Skinny-Ms-Graphics-Horizontal.png',
+    'https://skinnyms.com/wp-content/uploads/2024/05/meal-plan-bundle.jpg',
+    'https://skinnyms.com/wp-content/uploads/2024/05/ad-summer-sale.jpg',
+]
+
+
+@pytest.mark.parametrize('url', ПРОХОДЯТ)
+def test_photo_urls_pass(url):
+    assert причина_по_url(url) is None
+
+
+@pytest.mark.parametrize('url', ОТКЛОНЯЮТСЯ)
+def test_service_urls_rejected(url):
+    assert причина_по_url(url) is not None
+
+
+def test_logo_alt_rejected():
+    assert причина_по_url('https://x.com/wp/photo.jpg', alt='Логотип сайта') is not None
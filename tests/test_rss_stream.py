@@ -0,0 +1,55 @@
+# -*- coding: utf-8 -*-
+"""
+    Потоковый разбор фидов rss_stream: ранняя остановка и битый XML
+
+    Автор: VR-Lounge
+"""
+
+import io
+
+import pytest
+
+from rss_stream import FeedParseError, iter_feed_articles, read_feed_articles
+
+URL = 'https://example.com/rss'
+
+
+def _rss(*items: bytes) -> bytes:
+    return b'<?xml version="1.0" encoding="utf-8"?><rss><channel><title>t</title>' + b''.join(items) + b'</channel></rss>'
+
+
+def _item(n: int, title: bytes = None) -> bytes:
+    title = title or f'Статья {n}'.encode('utf-8')
+    return (b'<item><title>' + title + b'</title><link>https://example.com/a' + str(n).encode()
+            + b'</link><description>d</description></item>')
+
+
+def test_reads_whole_feed():
+    articles = read_feed_articles(io.BytesIO(_rss(_item(1), _item(2))), URL)
+    assert [a['link'] for a in articles] == ['https://example.com/a1', 'https://example.com/a2']
+    assert articles[0]['title'] == 'Статья 1'
+    assert articles[0]['rss_feed_url'] == URL
+
+
+def test_stops_after_processed_in_row():
+    feed = _rss(*(_item(n) for n in range(10)))
+    processed = {f'https://example.com/a{n}' for n in range(2, 10)}
+    articles = read_feed_articles(io.BytesIO(feed), URL, is_processed=processed.__contains__, stop_after=3)
+    assert len(articles) == 5
+
+
+def test_truncated_feed_raises_instead_of_partial_list():
+    feed = _rss(_item(1), _item(2))[:-40]
+    with pytest.raises(FeedParseError):
+        list(iter_feed_articles(io.BytesIO(feed), URL))
+    with pytest.raises(FeedParseError):
+        read_feed_articles(io.BytesIO(feed), URL)
+
+
+def test_invalid_utf8_falls_back_to_lenient_decode():
+    feed = _rss(_item(1), _item(2, title=b'Bad \xff\xfe title'), _item(3))
+    articles = read_feed_articles(io.BytesIO(feed), URL)
+    assert [a['link'] for a in articles] == [
+        'https://example.com/a1', 'https://example.com/a2', 'https://example.com/a3'
+    ]
+    assert articles[1]['title'] == 'Bad  title'
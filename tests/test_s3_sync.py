@@ -0,0 +1,102 @@
+# -*- coding: utf-8 -*-
+"""
+    Дифференциальная синхронизация s3_sync против локального S3 (moto)
+
+    Автор: VR-Lounge
+"""
+
+import importlib
+
+import pytest
+
+boto3 = pytest.importorskip('boto3')
+moto = pytest.importorskip('moto')
+
+import s3_sync
+
+BUCKET = 'www.tabatatimer.ru'
+PREFIX = 'images/blog/derived/'
+
+
+@pytest.fixture
+def s3(monkeypatch):
+    for name in ('AWS_ACCESS_KEY_ID', 'AWS_SECRET_ACCESS_KEY', 'AWS_SESSION_TOKEN'):
+        monkeypatch.setenv(name, 'testing')
+    with moto.mock_aws():
+        client = boto3.client('s3', region_name='us-east-1')
+        client.create_bucket(Bucket=BUCKET)
+        yield client
+
+
+def _keys(client, prefix=''):
+    response = client.list_objects_v2(Bucket=BUCKET, Prefix=prefix)
+    return sorted(obj['Key'] for obj in response.get('Contents', []))
+
+
+def _sync(client, local_dir, manifest, **kwargs):
+    return s3_sync.синхронизировать_папку(
+        local_dir, BUCKET, PREFIX, client=client, manifest_path=manifest, workers=2, pattern='*.webp', **kwargs
+    )
+
+
+def test_uploads_new_and_skips_unchanged(s3, tmp_path):
+    local_dir = tmp_path / 'derived'
+    local_dir.mkdir()
+    (local_dir / 'a-240.webp').write_bytes(b'a' * 100)
+    (local_dir / 'b-240.webp').write_bytes(b'b' * 200)
+    (local_dir / 'notes.txt').write_text('не по шаблону')
+    manifest = tmp_path / 'manifest.json'
+
+    итог = _sync(s3, local_dir, manifest)
+    assert итог == {'uploaded': 2, 'skipped': 0, 'failed': 0, 'deleted': 0}
+    assert _keys(s3) == [PREFIX + 'a-240.webp', PREFIX + 'b-240.webp']
+    head = s3.head_object(Bucket=BUCKET, Key=PREFIX + 'a-240.webp')
+    assert head['ContentType'] == 'image/webp'
+
+    итог = _sync(s3, local_dir, manifest)
+    assert итог == {'uploaded': 0, 'skipped': 2, 'failed': 0, 'deleted': 0}
+
+
+def test_uploads_changed_file_only(s3, tmp_path):
+    local_dir = tmp_path / 'derived'
+    local_dir.mkdir()
+    (local_dir / 'a-240.webp').write_bytes(b'a' * 100)
+    (local_dir / 'b-240.webp').write_bytes(b'b' * 200)
+    manifest = tmp_path / 'manifest.json'
+    _sync(s3, local_dir, manifest)
+
+    (local_dir / 'b-240.webp').write_bytes(b'B' * 300)
+    итог = _sync(s3, local_dir, manifest)
+    assert итог['uploaded'] == 1 and итог['skipped'] == 1
+    body = s3.get_object(Bucket=BUCKET, Key=PREFIX + 'b-240.webp')['Body'].read()
+    assert body == b'B' * 300
+
+
+def test_deletes_orphans_only_when_asked(s3, tmp_path):
+    local_dir = tmp_path / 'derived'
+    local_dir.mkdir()
+    (local_dir / 'a-240.webp').write_bytes(b'a' * 100)
+    manifest = tmp_path / 'manifest.json'
+    s3.put_object(Bucket=BUCKET, Key=PREFIX + 'old-240.webp', Body=b'old')
+    s3.put_object(Bucket=BUCKET, Key=PREFIX + 'keep.json', Body=b'{}')
+    s3.put_object(Bucket=BUCKET, Key=PREFIX + 'nested/x.webp', Body=b'x')
+
+    итог = _sync(s3, local_dir, manifest)
+    assert итог['deleted'] == 0
+    assert PREFIX + 'old-240.webp' in _keys(s3)
+
+    итог = _sync(s3, local_dir, manifest, delete=True)
+    assert итог['deleted'] == 1
+    # Удаляется только устаревший объект по шаблону прямо под префиксом
+    assert _keys(s3) == [PREFIX + 'a-240.webp', PREFIX + 'keep.json', PREFIX + 'nested/x.webp']
+
+
+def test_endpoint_from_environment(monkeypatch):
+    monkeypatch.setenv('S3_ENDPOINT_URL', 'http://127.0.0.1:9000')
+    модуль = importlib.reload(s3_sync)
+    try:
+        client = модуль.создать_клиент('key', 'secret')
+        assert client.meta.endpoint_url == 'http://127.0.0.1:9000'
+    finally:
+        monkeypatch.delenv('S3_ENDPOINT_URL')
+        importlib.reload(s3_sync)
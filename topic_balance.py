@@ -9,14 +9,17 @@
     Автор: VR-Lounge
 """
 
-import json
 from pathlib import Path
 from typing import List, Dict, Tuple, Optional
 from collections import Counter
 from datetime import datetime, timedelta
 
+from blog_feed import BlogFeed
+
 # Путь к blog-posts.json
 BLOG_POSTS_FILE = Path('public_html/blog-posts.json')
+# Для тем и дат хватает компактного индекса — полные тексты не загружаем
+ЛЕНТА_БЛОГА = BlogFeed(BLOG_POSTS_FILE)
 
 # Целевое распределение тематик (в процентах)
 TARGET_TOPIC_DISTRIBUTION = {
@@ -46,15 +49,9 @@ def получить_последние_публикации(n: int = 10) -> Lis
     Returns:
         Список последних постов с их тегами
     """
-    if not BLOG_POSTS_FILE.exists():
-        return []
-    
     try:
-        with open(BLOG_POSTS_FILE, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-            posts = data.get('posts', [])
-            # Возвращаем последние N постов (они в начале списка)
-            return posts[:n]
+        # Возвращаем последние N постов (они в начале списка)
+        return ЛЕНТА_БЛОГА.recent(n)
     except Exception as e:
         print(f"⚠️ Ошибка чтения blog-posts.json: {e}")
         return []
@@ -244,9 +241,7 @@ def получить_статистику_баланса_за_период(дн
         return {}
     
     try:
-        with open(BLOG_POSTS_FILE, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-            posts = data.get('posts', [])
+        posts = ЛЕНТА_БЛОГА.index()
         
         # Фильтруем посты за последние N дней
         сейчас = datetime.now()
@@ -63,6 +63,41 @@ if [ -f "blog-posts.json" ]; then
     echo "✅ blog-posts.json загружен"
 fi
 
+# Лента для сайта (blog_feed): шарды blog-feed/ и компактный blog-index.json.
+# Сначала новые шарды, затем индекс, который на них ссылается, и только потом
+# удаление шардов, которых больше нет локально.
+JSON_CONTENT_TYPE="application/json; charset=utf-8"
+FEED_CACHE_CONTROL="public, max-age=300"
+if [ -d "blog-feed" ]; then
+    aws s3 sync blog-feed/ "s3://$BUCKET_NAME/blog-feed/" \
+        --endpoint-url="$ENDPOINT_URL" \
+        --acl public-read \
+        --exclude "*.DS_Store" \
+        --content-type "$JSON_CONTENT_TYPE" \
+        --cache-control "$FEED_CACHE_CONTROL"
+    echo "✅ Шарды ленты blog-feed/ загружены"
+fi
+
+if [ -f "blog-index.json" ]; then
+    aws s3 cp blog-index.json "s3://$BUCKET_NAME/blog-index.json" \
+        --endpoint-url="$ENDPOINT_URL" \
+        --acl public-read \
+        --content-type "$JSON_CONTENT_TYPE" \
+        --cache-control "$FEED_CACHE_CONTROL"
+    echo "✅ blog-index.json загружен"
+fi
+
+if [ -d "blog-feed" ]; then
+    aws s3 sync blog-feed/ "s3://$BUCKET_NAME/blog-feed/" \
+        --endpoint-url="$ENDPOINT_URL" \
+        --acl public-read \
+        --exclude "*.DS_Store" \
+        --content-type "$JSON_CONTENT_TYPE" \
+        --cache-control "$FEED_CACHE_CONTROL" \
+        --delete
+    echo "✅ Устаревшие шарды ленты удалены из бакета"
+fi
+
 # Загружаем blog.html
 if [ -f "blog.html" ]; then
     aws s3 cp blog.html "s3://$BUCKET_NAME/blog.html" \
@@ -89,12 +124,41 @@ if [ -d "blog" ]; then
     fi
 fi
 
+# Загружаем части sitemap-N.xml (есть, когда sitemap.xml стал индексом) — до самого индекса,
+# чтобы он ни в какой момент не ссылался на отсутствующие части
+for part in sitemap-*.xml; do
+    [ -f "$part" ] || continue
+    aws s3 cp "$part" "s3://$BUCKET_NAME/$part" \
+        --endpoint-url="$ENDPOINT_URL" \
+        --acl public-read \
+        --content-type "application/xml"
+    echo "✅ $part загружен"
+done
+
 # Загружаем обновлённый sitemap.xml
 if [ -f "sitemap.xml" ]; then
     aws s3 cp sitemap.xml "s3://$BUCKET_NAME/sitemap.xml" \
         --endpoint-url="$ENDPOINT_URL" \
-        --acl public-read
+        --acl public-read \
+        --content-type "application/xml"
     echo "✅ sitemap.xml загружен"
+
+    # Удаляем из бакета части sitemap-N.xml, которых больше нет локально
+    aws s3api list-objects-v2 \
+        --bucket "$BUCKET_NAME" \
+        --prefix "sitemap-" \
+        --endpoint-url="$ENDPOINT_URL" \
+        --query 'Contents[].Key' \
+        --output text 2>/dev/null | tr '\t' '\n' | while read -r key; do
+        case "$key" in
+            sitemap-*.xml)
+                if [ ! -f "$key" ]; then
+                    aws s3 rm "s3://$BUCKET_NAME/$key" --endpoint-url="$ENDPOINT_URL"
+                    echo "🗑️ Устаревшая часть $key удалена из бакета"
+                fi
+                ;;
+        esac
+    done
 fi
 
 # Загружаем обновлённый robots.txt
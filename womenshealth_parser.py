@@ -15,7 +15,6 @@ import os
 import requests
 import json
 import re
-import xml.etree.ElementTree as ET
 from datetime import datetime
 from pathlib import Path
 from urllib.parse import urlparse, urljoin
@@ -48,6 +47,14 @@ from topic_balance import выбрать_статью_для_баланса
 from content_library import load_library, save_library, upsert_item, build_library_item, prune_library, normalize_images
 from telegram_dedup import is_duplicate as telegram_is_duplicate, record_post as telegram_record_post
 from publication_logger import логировать_публикацию
+from rss_fetcher import fetch_feeds, looks_like_feed_url
+import feed_cache
+from rss_stream import FeedParseError, read_feed_articles
+from processed_store import ProcessedArticlesStore
+from keyword_matcher import KeywordMatcher
+from blog_feed import BlogFeed
+from work_pipeline import Stage, run_pipeline
+import deepseek_client
 
 
 def _без_упоминания_источника(текст):
@@ -84,6 +91,11 @@ LIBRARY_MIN_KEYWORDS = int(os.getenv('LIBRARY_MIN_KEYWORDS', '1'))
 LIBRARY_MIN_SCORE = int(os.getenv('LIBRARY_MIN_SCORE', '70'))
 LIBRARY_MIN_IMAGES = int(os.getenv('LIBRARY_MIN_IMAGES', '1'))
 LIBRARY_USE_DEEPSEEK = os.getenv('LIBRARY_USE_DEEPSEEK', 'true').lower() == 'true'
+# Потоки этапов конвейера пополнения библиотеки и размер очередей между ними
+LIBRARY_FETCH_WORKERS = int(os.getenv('LIBRARY_FETCH_WORKERS', '8'))
+LIBRARY_PARSE_WORKERS = int(os.getenv('LIBRARY_PARSE_WORKERS', '2'))
+LIBRARY_SCORE_WORKERS = int(os.getenv('LIBRARY_SCORE_WORKERS', '8'))
+LIBRARY_PIPELINE_QUEUE = int(os.getenv('LIBRARY_PIPELINE_QUEUE', '8'))
 INLINE_HTML_GENERATION = os.getenv('INLINE_HTML_GENERATION', 'false').lower() == 'true'
 SKINNYMS_ONLY = os.getenv('SKINNYMS_ONLY', 'false').lower() == 'true'
 # Только рецепты и питание из библиотеки (workflow «Рецепты и питание», source=skinnyms_recipes)
@@ -194,9 +206,12 @@ RELEVANT_KEYWORDS = [
     'quick workout', 'home workout', 'bodyweight', 'no equipment',
     'short workout', 'efficient workout', 'effective training', 'yoga', 'pilates'
 ]
+МАТЧЕР_РЕЛЕВАНТНОСТИ = KeywordMatcher({'relevant': RELEVANT_KEYWORDS})
 
 # Файл для хранения обработанных статей (чтобы не дублировать)
 PROCESSED_ARTICLES_FILE = Path('.womenshealth_processed.json')
+# Индекс загружается один раз за процесс, проверки — O(1) без чтения файла
+ОБРАБОТАННЫЕ_СТАТЬИ = ProcessedArticlesStore(PROCESSED_ARTICLES_FILE)
 
 # Ограничение частоты публикации для источников (в днях)
 # Источники, которые публикуются слишком часто, будут ограничены
@@ -416,35 +431,22 @@ else:
             REPO_ROOT = Path.cwd()
 
 BLOG_POSTS_FILE = REPO_ROOT / 'public_html' / 'blog-posts.json'
+# Индекс ленты без полных текстов — для проверок источников и дат
+ЛЕНТА_БЛОГА = BlogFeed(BLOG_POSTS_FILE)
 
 # ============= ФУНКЦИИ ПАРСИНГА =============
 
 def загрузить_обработанные_статьи():
     """Загружает список уже обработанных статей"""
-    if PROCESSED_ARTICLES_FILE.exists():
-        try:
-            with open(PROCESSED_ARTICLES_FILE, 'r', encoding='utf-8') as f:
-                return json.load(f)
-        except Exception:
-            return {'articles': [], 'last_update': None}
-    return {'articles': [], 'last_update': None}
+    return {'articles': ОБРАБОТАННЫЕ_СТАТЬИ.urls(), 'last_update': ОБРАБОТАННЫЕ_СТАТЬИ.last_update}
 
 def сохранить_обработанную_статью(article_url):
     """Сохраняет URL обработанной статьи"""
-    data = загрузить_обработанные_статьи()
-    if article_url not in data['articles']:
-        data['articles'].append(article_url)
-        data['last_update'] = datetime.now().isoformat()
-        # Ограничиваем размер (храним последние 1000 статей)
-        if len(data['articles']) > 1000:
-            data['articles'] = data['articles'][-1000:]
-        with open(PROCESSED_ARTICLES_FILE, 'w', encoding='utf-8') as f:
-            json.dump(data, f, ensure_ascii=False, indent=2)
+    ОБРАБОТАННЫЕ_СТАТЬИ.add(article_url)
 
 def уже_обработана(article_url):
     """Проверяет, была ли статья уже обработана"""
-    data = загрузить_обработанные_статьи()
-    return article_url in data['articles']
+    return article_url in ОБРАБОТАННЫЕ_СТАТЬИ
 
 def парсить_rss_feed(rss_url):
     """Парсит RSS фид и возвращает список статей (поддерживает RSS 2.0, Atom, FeedBurner)"""
@@ -452,127 +454,35 @@ def парсить_rss_feed(rss_url):
         headers = {
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
         }
-        response = requests.get(rss_url, headers=headers, timeout=30)
-        response.raise_for_status()
+        # Условный запрос: если фид не менялся, сервер ответит 304 без тела
+        headers.update(feed_cache.conditional_headers(rss_url))
+        response = requests.get(rss_url, headers=headers, timeout=30, stream=True)
+        with response:
+            if response.status_code == 304:
+                articles = feed_cache.cached_articles(rss_url)
+                print(f"♻️ Фид не изменился (304), из кэша {len(articles)} статей: {rss_url[:60]}...")
+                return articles
+            response.raise_for_status()
+            
+            # Потоковый разбор: читаем фид до N уже обработанных статей подряд
+            response.raw.decode_content = True
+            articles = read_feed_articles(response.raw, rss_url, is_processed=уже_обработана)
         
-        # Парсим XML
-        try:
-            root = ET.fromstring(response.content)
-        except ET.ParseError:
-            # Пробуем исправить возможные проблемы с кодировкой
-            content = response.content.decode('utf-8', errors='ignore')
-            root = ET.fromstring(content)
-        
-        articles = []
-        
-        # Поддерживаем разные форматы RSS (RSS 2.0, Atom, FeedBurner)
-        # Пробуем разные селекторы для поиска элементов
-        items = []
-        if root.tag == 'rss' or root.tag.endswith('rss'):
-            # RSS 2.0
-            channel = root.find('channel')
-            if channel is not None:
-                items = channel.findall('item')
-        elif root.tag.endswith('feed') or '{http://www.w3.org/2005/Atom}feed' in root.tag:
-            # Atom
-            items = root.findall('{http://www.w3.org/2005/Atom}entry')
-        
-        # Если не нашли, пробуем универсальный поиск
-        if not items:
-            items = root.findall('.//item') or root.findall('.//entry') or root.findall('.//{http://www.w3.org/2005/Atom}entry')
-        
-        for item in items:
-            try:
-                title = ''
-                link = ''
-                
-                # RSS 2.0 формат - ищем прямые дочерние элементы
-                title_elem = None
-                link_elem = None
-                
-                # Пробуем разные варианты поиска title
-                for child in item:
-                    if child.tag == 'title' or child.tag.endswith('}title'):
-                        title_elem = child
-                        break
-                
-                # Если не нашли, пробуем через find
-                if title_elem is None:
-                    title_elem = item.find('title') or item.find('.//title') or item.find('{http://www.w3.org/2005/Atom}title')
-                
-                # Пробуем разные варианты поиска link
-                for child in item:
-                    if child.tag == 'link' or child.tag.endswith('}link'):
-                        link_elem = child
-                        break
-                
-                # Если не нашли, пробуем через find
-                if link_elem is None:
-                    link_elem = item.find('link') or item.find('.//link') or item.find('{http://www.w3.org/2005/Atom}link')
-                
-                # Извлекаем title
-                if title_elem is not None:
-                    if hasattr(title_elem, 'text') and title_elem.text:
-                        title = title_elem.text.strip()
-                    elif hasattr(title_elem, 'tail') and title_elem.tail:
-                        title = title_elem.tail.strip()
-                
-                # Извлекаем link (для Atom может быть в атрибуте href, для RSS в text)
-                if link_elem is not None:
-                    # Сначала пробуем атрибут href (Atom формат)
-                    if hasattr(link_elem, 'get') and link_elem.get('href'):
-                        link = link_elem.get('href').strip()
-                    # Затем пробуем text (RSS 2.0 формат)
-                    elif hasattr(link_elem, 'text') and link_elem.text:
-                        link = link_elem.text.strip()
-                    # Если все еще нет, пробуем найти через guid (RSS 2.0)
-                    if not link:
-                        guid_elem = item.find('guid')
-                        if guid_elem is not None:
-                            if hasattr(guid_elem, 'text') and guid_elem.text:
-                                link = guid_elem.text.strip()
-                            elif hasattr(guid_elem, 'get') and guid_elem.get('isPermaLink') == 'true':
-                                link = guid_elem.text.strip() if guid_elem.text else ''
-                
-                # Публикация дата
-                pub_date = None
-                for pub_tag in ['pubDate', 'published', '{http://www.w3.org/2005/Atom}published']:
-                    pub_elem = item.find(pub_tag)
-                    if pub_elem is not None and hasattr(pub_elem, 'text') and pub_elem.text:
-                        pub_date = pub_elem.text
-                        break
-                
-                # Описание
-                description = ''
-                for desc_tag in ['description', '{http://www.w3.org/2005/Atom}summary', 'content', '{http://www.w3.org/2005/Atom}content']:
-                    desc_elem = item.find(desc_tag)
-                    if desc_elem is not None:
-                        if hasattr(desc_elem, 'text') and desc_elem.text:
-                            description = desc_elem.text.strip()
-                            break
-                
-                # Добавляем статью только если есть и title и link
-                if link and title:
-                    articles.append({
-                        'title': title,
-                        'link': link,
-                        'pub_date': pub_date,
-                        'description': description,
-                        'rss_feed_url': rss_url  # Сохраняем URL RSS фида для ротации источников
-                    })
-            except Exception as e:
-                # Тихо пропускаем ошибки парсинга отдельных элементов
-                continue
+        feed_cache.store(rss_url, response.headers.get('ETag'), response.headers.get('Last-Modified'), articles)
         
         if articles:
             print(f"✅ Получено {len(articles)} статей из {rss_url[:60]}...")
-        elif len(items) > 0:
-            print(f"⚠️ Найдено {len(items)} элементов, но не удалось извлечь статьи из {rss_url[:60]}...")
+        else:
+            print(f"⚠️ Не удалось извлечь статьи из {rss_url[:60]}...")
         return articles
     
     except requests.exceptions.RequestException as e:
         print(f"❌ Ошибка запроса RSS {rss_url}: {e}")
         return []
+    except FeedParseError as e:
+        # Фид разобран не до конца — неполный список в кэш фидов не сохраняем
+        print(f"❌ Фид {rss_url} не разобран, кэш не обновлён: {e}")
+        return []
     except Exception as e:
         print(f"❌ Ошибка парсинга RSS {rss_url}: {e}")
         return []
@@ -581,10 +491,7 @@ def проверить_релевантность(статья):
     """Проверяет, релевантна ли статья по ключевым словам"""
     текст_для_проверки = (статья.get('title', '') + ' ' + статья.get('description', '')).lower()
     
-    найденные_ключевые_слова = []
-    for ключевое_слово in RELEVANT_KEYWORDS:
-        if ключевое_слово.lower() in текст_для_проверки:
-            найденные_ключевые_слова.append(ключевое_слово)
+    найденные_ключевые_слова = МАТЧЕР_РЕЛЕВАНТНОСТИ.find(текст_для_проверки).get('relevant', [])
     
     # Считаем релевантной, если найдено хотя бы одно ключевое слово
     релевантна = len(найденные_ключевые_слова) > 0
@@ -610,12 +517,8 @@ def получить_последние_использованные_источ
         return {'rss_feeds': последние_rss_фиды, 'domains': последние_домены}
     
     try:
-        with open(BLOG_POSTS_FILE, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-            посты = data.get('posts', [])
-        
-        # Получаем RSS фиды и домены из последних n постов
-        for пост in посты[:n]:
+        # Получаем RSS фиды и домены из последних n постов (компактный индекс, без текстов)
+        for пост in ЛЕНТА_БЛОГА.recent(n):
             # Проверяем RSS фид (если сохранён)
             rss_feed_url = пост.get('rss_feed_url') or ''
             if rss_feed_url and rss_feed_url not in последние_rss_фиды:
@@ -665,9 +568,7 @@ def проверить_ограничение_частоты_публикаци
         return True, None
     
     try:
-        with open(BLOG_POSTS_FILE, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-            посты = data.get('posts', [])
+        посты = ЛЕНТА_БЛОГА.index()
         
         # Проверяем последние публикации из этого источника
         текущая_дата = datetime.now()
@@ -723,12 +624,6 @@ def оценить_релевантность_для_библиотеки(заг
         return None
     
     try:
-        url = "https://api.deepseek.com/v1/chat/completions"
-        headers = {
-            "Content-Type": "application/json",
-            "Authorization": f"Bearer {DEEPSEEK_API_KEY}"
-        }
-        
         system_prompt = (
             "Ты эксперт по фитнес-контенту. Оцени релевантность статьи для сайта о "
             "HIIT/TABATA/EMOM/AMRAP тренировках и мотивации. "
@@ -752,30 +647,24 @@ def оценить_релевантность_для_библиотеки(заг
             "}"
         )
         
-        data = {
-            "model": "deepseek-chat",
-            "messages": [
+        content = deepseek_client.chat_text(
+            [
                 {"role": "system", "content": system_prompt},
                 {"role": "user", "content": user_prompt}
             ],
-            "temperature": 0.2,
-            "max_tokens": 300,
-            "top_p": 0.9
-        }
-        
-        response = requests.post(url, headers=headers, json=data, timeout=45)
-        response.raise_for_status()
-        result = response.json()
-        content = result['choices'][0]['message']['content']
+            temperature=0.2,
+            max_tokens=300,
+            timeout=45,
+            json_mode=True,
+            purpose='library_relevance',
+            top_p=0.9
+        )
         
         # Пытаемся распарсить JSON
         try:
-            return json.loads(content)
-        except json.JSONDecodeError:
-            match = re.search(r'\{.*\}', content, re.DOTALL)
-            if match:
-                return json.loads(match.group(0))
-        return None
+            return deepseek_client.parse_json(content)
+        except ValueError:
+            return None
     except Exception as e:
         print(f"⚠️ Ошибка оценки релевантности через DeepSeek: {e}")
         return None
@@ -826,17 +715,26 @@ def пополнить_библиотеку_релевантными(релев
     library = заполнить_alt_title_в_библиотеке(library)
     if удалено > 0:
         print(f"🧹 Библиотека очищена: удалено {удалено} нерелевантных записей")
-    добавлено = 0
     
-    for статья in релевантные[:лимит]:
-        ключевые_слова = статья.get('keywords', [])
-        if len(ключевые_слова) < LIBRARY_MIN_KEYWORDS:
-            continue
-        
-        parsed = парсить_статью(статья.get('link', ''))
+    def скачать(статья):
+        if len(статья.get('keywords', [])) < LIBRARY_MIN_KEYWORDS:
+            return None
+        try:
+            return статья, скачать_статью(статья.get('link', ''))
+        except Exception as e:
+            print(f"❌ Ошибка парсинга статьи {статья.get('link', '')}: {e}")
+            return None
+    
+    def разобрать(задача):
+        статья, html = задача
+        parsed = разобрать_статью(html, статья.get('link', ''))
         if not parsed or not parsed.get('content'):
-            continue
-        
+            return None
+        return статья, parsed
+    
+    def оценить(задача):
+        статья, parsed = задача
+        ключевые_слова = статья.get('keywords', [])
         изображения = [img.get('url', '') for img in parsed.get('images', []) if isinstance(img, dict)]
         оценка = оценить_релевантность_для_библиотеки(
             статья.get('title', ''),
@@ -848,7 +746,7 @@ def пополнить_библиотеку_релевантными(релев
         summary_ru = оценка.get('summary_ru') if оценка else ''
         relevance_score = оценка.get('score') if оценка else None
         if relevance_score is not None and relevance_score < LIBRARY_MIN_SCORE:
-            continue
+            return None
         
         # Формируем русские alt/title для изображений
         заголовок_русский = адаптировать_заголовок_для_русской_аудитории(
@@ -868,9 +766,9 @@ def пополнить_библиотеку_релевантными(релев
             })
         images = normalize_images(images)
         if len(images) < LIBRARY_MIN_IMAGES:
-            continue
+            return None
         
-        item = build_library_item(
+        return build_library_item(
             title=статья.get('title', ''),
             url=статья.get('link', ''),
             rss_feed_url=статья.get('rss_feed_url', ''),
@@ -881,7 +779,16 @@ def пополнить_библиотеку_релевантными(релев
             content_excerpt=parsed.get('content', '')[:500],
             images=images
         )
-        
+    
+    # Загрузка, разбор и оценка идут параллельно; библиотека пишется один раз в конце
+    новые_записи = run_pipeline(релевантные[:лимит], [
+        Stage('загрузка', скачать, LIBRARY_FETCH_WORKERS),
+        Stage('разбор', разобрать, LIBRARY_PARSE_WORKERS),
+        Stage('оценка', оценить, LIBRARY_SCORE_WORKERS),
+    ], queue_size=LIBRARY_PIPELINE_QUEUE)
+    
+    добавлено = 0
+    for item in новые_записи:
         if upsert_item(library, item):
             добавлено += 1
     
@@ -948,16 +855,28 @@ def получить_кандидаты_из_библиотеки(лимит=20,
         print(f"   ⏭️ Пропуски: обработано={пропущено_обработано}, опубликовано={пропущено_публиковано}, без_фото={пропущено_без_фото}")
     return кандидаты
 
+def скачать_статью(url):
+    """Скачивает HTML статьи"""
+    headers = {
+        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
+    }
+    response = requests.get(url, headers=headers, timeout=30)
+    response.raise_for_status()
+    return response.content
+
 def парсить_статью(url):
     """Парсит полный текст статьи и изображения с сайта"""
     try:
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-        }
-        response = requests.get(url, headers=headers, timeout=30)
-        response.raise_for_status()
-        
-        soup = BeautifulSoup(response.content, 'html.parser')
+        html = скачать_статью(url)
+    except Exception as e:
+        print(f"❌ Ошибка парсинга статьи {url}: {e}")
+        return None
+    return разобрать_статью(html, url)
+
+def разобрать_статью(html, url):
+    """Извлекает текст статьи и изображения из скачанного HTML"""
+    try:
+        soup = BeautifulSoup(html, 'html.parser')
         
         # Извлекаем основной текст статьи
         # Ищем основной контент (обычно в <article> или <div class="article-content">)
@@ -1202,13 +1121,6 @@ def расширить_контент_для_статьи(оригинальны
         return None
     
     try:
-        url = "https://api.deepseek.com/v1/chat/completions"
-        
-        headers = {
-            "Content-Type": "application/json",
-            "Authorization": f"Bearer {DEEPSEEK_API_KEY}"
-        }
-        
         if RECIPES_ONLY:
             system_prompt = SYSTEM_PROMPT_RECIPES_ARTICLE
             user_prompt = USER_TEMPLATE_RECIPES_ARTICLE.format(
@@ -1222,23 +1134,19 @@ def расширить_контент_для_статьи(оригинальны
                 текст=оригинальный_текст[:5000]
             )
         
-        data = {
-            "model": "deepseek-chat",
-            "messages": [
+        result = deepseek_client.chat(
+            [
                 {"role": "system", "content": system_prompt},
                 {"role": "user", "content": user_prompt}
             ],
-            "temperature": 0.8,
-            "max_tokens": 3000,  # Больше токенов для расширенного контента
-            "top_p": 0.9,
-            "frequency_penalty": 0.3,
-            "presence_penalty": 0.3
-        }
-        
-        response = requests.post(url, headers=headers, json=data, timeout=90)
-        response.raise_for_status()
-        
-        result = response.json()
+            temperature=0.8,
+            max_tokens=3000,  # Больше токенов для расширенного контента
+            timeout=90,
+            purpose='article_expand',
+            top_p=0.9,
+            frequency_penalty=0.3,
+            presence_penalty=0.3
+        )
         расширенный_текст = result['choices'][0]['message']['content']
         
         # Очищаем текст от AI-маркеров
@@ -1273,13 +1181,6 @@ def рерайтить_через_deepseek(оригинальный_текст,
         return None
     
     try:
-        url = "https://api.deepseek.com/v1/chat/completions"
-        
-        headers = {
-            "Content-Type": "application/json",
-            "Authorization": f"Bearer {DEEPSEEK_API_KEY}"
-        }
-        
         if RECIPES_ONLY:
             system_prompt = SYSTEM_PROMPT_RECIPES_TELEGRAM
             user_prompt = USER_TEMPLATE_RECIPES_TELEGRAM.format(
@@ -1295,23 +1196,19 @@ def рерайтить_через_deepseek(оригинальный_текст,
             )
             max_tokens_telegram = 1000
         
-        data = {
-            "model": "deepseek-chat",
-            "messages": [
+        result = deepseek_client.chat(
+            [
                 {"role": "system", "content": system_prompt},
                 {"role": "user", "content": user_prompt}
             ],
-            "temperature": 0.8,  # Больше креативности для разговорного стиля
-            "max_tokens": max_tokens_telegram,
-            "top_p": 0.9,
-            "frequency_penalty": 0.3,
-            "presence_penalty": 0.3
-        }
-        
-        response = requests.post(url, headers=headers, json=data, timeout=60)
-        response.raise_for_status()
-        
-        result = response.json()
+            temperature=0.8,  # Больше креативности для разговорного стиля
+            max_tokens=max_tokens_telegram,
+            timeout=60,
+            purpose='telegram_rewrite',
+            top_p=0.9,
+            frequency_penalty=0.3,
+            presence_penalty=0.3
+        )
         рерайт = result['choices'][0]['message']['content']
         
         # Очищаем текст от AI-маркеров
@@ -1459,25 +1356,12 @@ def форматировать_пост(рерайт, оригинальный_
     
     return пост
 
-def определить_теги(текст, заголовок, источник='womenshealth'):
-    """Улучшенная функция определения тегов на основе контента и источника"""
-    теги = []
-    текст_нижний = (текст + ' ' + заголовок).lower()
-    заголовок_нижний = заголовок.lower()
-    
-    # ============= АУДИТОРИЯ (Мужчинам/Девушкам) =============
-    мужская_аудитория = False
-    женская_аудитория = False
-    
-    # Прямые указания
-    if any(word in текст_нижний for word in ['мужчин', 'мужской', 'для парней', 'мужчинам', 'мужское', 'парням']):
-        мужская_аудитория = True
-    
-    if any(word in текст_нижний for word in ['девушк', 'женщин', 'для девочек', 'девушкам', 'женский', 'для женщин', 'девушкам']):
-        женская_аудитория = True
-    
-    # Контекстные признаки мужской аудитории
-    мужские_маркеры = [
+# Маркеры тегов: тег -> подстроки в тексте поста (аудитория + темы, порядок = порядок тегов)
+МАРКЕРЫ_ТЕГОВ = {
+    'Мужчинам': [
+        # Прямые указания
+        'мужчин', 'мужской', 'для парней', 'мужчинам', 'мужское', 'парням',
+        # Контекстные признаки
         'братан', 'брат',  # Обращение
         'твой кишечник', 'твой жкт', 'твой пресс',  # Мужское обращение
         'набор массы', 'набираем массу', 'набрать массу', 'набор мышечной',  # Мужские цели
@@ -1485,46 +1369,19 @@ def определить_теги(текст, заголовок, источни
         'простата', 'мужское здоровье', 'мужской жкт',  # Мужское здоровье
         'тестостерон',  # Мужские гормоны
         'для мужчин', 'мужчина',  # Явные указания
-    ]
-    
-    if any(маркер in текст_нижний for маркер in мужские_маркеры):
-        мужская_аудитория = True
-    
-    # Контекстные признаки женской аудитории
-    женские_маркеры = [
+    ],
+    'Девушкам': [
+        # Прямые указания
+        'девушк', 'женщин', 'для девочек', 'девушкам', 'женский', 'для женщин', 'девушкам',
+        # Контекстные признаки
         'подруга', 'девочки', 'дорогие девушки',  # Обращение
         'стройное тело', 'похудеть', 'для девушек', 'для женщин',  # Женские цели
         'женское здоровье', 'женский', 'для девушек',  # Женское здоровье
         'девушкам', 'девушка', 'женщин',  # Явные указания
         '30 дней', 'стройность', 'подтянут', 'тонкое',  # Женские цели
-    ]
-    
-    if any(маркер in текст_нижний for маркер in женские_маркеры):
-        женская_аудитория = True
-    
-    # Если источник menshealth - по умолчанию для мужчин (если нет явных указаний на женскую аудиторию)
-    if источник == 'menshealth' and not женская_аудитория:
-        мужская_аудитория = True
-    
-    # Если источник womenshealth - по умолчанию для женщин (если нет явных указаний на мужскую аудиторию)
-    if источник == 'womenshealth' and not мужская_аудитория:
-        женская_аудитория = True
-    
-    # Проверка заголовка
-    if any(word in заголовок_нижний for word in ['мужской', 'мужчин', 'мужск', 'для мужчин']):
-        мужская_аудитория = True
-    
-    if any(word in заголовок_нижний for word in ['девушк', 'женщин', 'для девушек', 'женск', 'женщин']):
-        женская_аудитория = True
-    
-    if мужская_аудитория:
-        теги.append('Мужчинам')
-    
-    if женская_аудитория:
-        теги.append('Девушкам')
-    
-    # ============= ПИТАНИЕ =============
-    питание_маркеры = [
+    ],
+    # ПИТАНИЕ
+    'Питание': [
         'рецепт', 'питани', 'еда', 'блюд', 'продукт', 'ингредиент',
         'жкт', 'кишечник', 'желудок', 'пищеварен', 'желудочно-кишечн',
         'белок', 'углевод', 'жир', 'клетчатка', 'воды', 'водой',
@@ -1533,26 +1390,18 @@ def определить_теги(текст, заголовок, источни
         'овощ', 'фрукт', 'мясо', 'рыба', 'яйцо', 'молочн',
         'питание девушкам', 'для девушек питание', 'женское питание',
         'до тренировки', 'после тренировки', 'правильное питание'
-    ]
-    
-    if any(маркер in текст_нижний for маркер in питание_маркеры):
-        теги.append('Питание')
-    
-    # ============= ДИЕТЫ =============
-    диеты_маркеры = [
+    ],
+    # ДИЕТЫ
+    'Диеты': [
         'диет', 'похуден', 'калори', 'дефицит калори', 'профицит',
         'кето', 'палео', 'вегетариан', 'веган', 'средиземноморск',
         'потеря веса', 'сброс веса', 'снижение веса',
         'бжу', 'баланс', 'макрос', 'микрос',
         'диета девушкам', 'для девушек диета', 'женская диета',
         'похудение', 'стройность', 'здоровое питание'
-    ]
-    
-    if any(маркер in текст_нижний for маркер in диеты_маркеры):
-        теги.append('Диеты')
-    
-    # ============= МОТИВАЦИЯ =============
-    мотивация_маркеры = [
+    ],
+    # МОТИВАЦИЯ
+    'Мотивация': [
         'мотивац', 'вдохнов', 'мотивир', 'результат', 'цель', 'успех',
         'философия', 'система', 'принцип', 'лайфхак', 'совет',
         'начни', 'начинай', 'не откладывай', 'сегодня',
@@ -1560,13 +1409,9 @@ def определить_теги(текст, заголовок, источни
         'психологи', 'ментальн', 'настрой', 'мышление',
         'мотивация девушкам', 'для девушек мотивация', 'женская мотивация',
         'вдохновение', 'сила воли', 'преодоление'
-    ]
-    
-    if any(маркер in текст_нижний for маркер in мотивация_маркеры):
-        теги.append('Мотивация')
-    
-    # ============= ТРЕНИРОВКА =============
-    тренировка_маркеры = [
+    ],
+    # ТРЕНИРОВКА
+    'Тренировка': [
         'тренировк', 'упражнен', 'программа тренировок', 'программа',
         'подход', 'повторен', 'раунд', 'серия', 'цикл',
         'бурпи', 'приседан', 'отжиман', 'планка', 'выпад',
@@ -1577,13 +1422,9 @@ def определить_теги(текст, заголовок, источни
         'разминка', 'заминка', 'растяжка',
         'упражнения девушкам', 'тренировки девушкам', 'для девушек тренировка',
         'стройное тело', 'похудение', '30 дней', 'вызов'
-    ]
-    
-    if any(маркер in текст_нижний for маркер in тренировка_маркеры):
-        теги.append('Тренировка')
-    
-    # ============= СИЛОВЫЕ ТРЕНИРОВКИ =============
-    силовые_маркеры = [
+    ],
+    # СИЛОВЫЕ ТРЕНИРОВКИ
+    'Силовые': [
         'силовые тренировки', 'силовой тренинг', 'силовая подготовка',
         'weight training', 'strength training', 'силовые',
         'жим лёжа', 'присед со штангой', 'становая тяга',
@@ -1591,23 +1432,67 @@ def определить_теги(текст, заголовок, источни
         'силовой тренинг', 'силовая работа', 'работа с весом',
         'силовые для девушек', 'силовая тренировка для женщин',
         'weight training для девушек', 'сила для девушек'
-    ]
-    
-    if any(маркер in текст_нижний for маркер in силовые_маркеры):
-        теги.append('Силовые')
-    
-    # ============= ФУНКЦИОНАЛЬНЫЙ ТРЕНИНГ =============
-    функциональный_маркеры = [
+    ],
+    # ФУНКЦИОНАЛЬНЫЙ ТРЕНИНГ
+    'Функциональный тренинг': [
         'функциональный тренинг', 'functional training',
         'функциональные движения', 'functional movement',
         'функционалка', 'functional', 'двигательные паттерны',
         'movement patterns', 'функциональная подготовка',
         'functional fitness', 'функциональный фитнес',
         'функциональный тренинг для девушек', 'functional для женщин'
-    ]
+    ],
+}
+
+# Маркеры аудитории, которые проверяются только в заголовке
+МАРКЕРЫ_АУДИТОРИИ_В_ЗАГОЛОВКЕ = {
+    'Мужчинам': [
+        'мужской', 'мужчин', 'мужск', 'для мужчин'
+    ],
+    'Девушкам': [
+        'девушк', 'женщин', 'для девушек', 'женск', 'женщин'
+    ],
+}
+
+# Автоматы Ахо-Корасик строятся один раз; текст просматривается за один проход
+МАТЧЕР_ТЕГОВ = KeywordMatcher(МАРКЕРЫ_ТЕГОВ)
+МАТЧЕР_АУДИТОРИИ_В_ЗАГОЛОВКЕ = KeywordMatcher(МАРКЕРЫ_АУДИТОРИИ_В_ЗАГОЛОВКЕ)
+
+def определить_теги(текст, заголовок, источник='womenshealth'):
+    """Улучшенная функция определения тегов на основе контента и источника"""
+    теги = []
+    найдено = МАТЧЕР_ТЕГОВ.categories((текст + ' ' + заголовок).lower())
+    в_заголовке = МАТЧЕР_АУДИТОРИИ_В_ЗАГОЛОВКЕ.categories(заголовок.lower())
+    
+    # ============= АУДИТОРИЯ (Мужчинам/Девушкам) =============
+    мужская_аудитория = 'Мужчинам' in найдено
+    женская_аудитория = 'Девушкам' in найдено
+    
+    # Если источник menshealth - по умолчанию для мужчин (если нет явных указаний на женскую аудиторию)
+    if источник == 'menshealth' and not женская_аудитория:
+        мужская_аудитория = True
+    
+    # Если источник womenshealth - по умолчанию для женщин (если нет явных указаний на мужскую аудиторию)
+    if источник == 'womenshealth' and not мужская_аудитория:
+        женская_аудитория = True
+    
+    # Проверка заголовка
+    if 'Мужчинам' in в_заголовке:
+        мужская_аудитория = True
+    
+    if 'Девушкам' in в_заголовке:
+        женская_аудитория = True
     
-    if any(маркер in текст_нижний for маркер in функциональный_маркеры):
-        теги.append('Функциональный тренинг')
+    if мужская_аудитория:
+        теги.append('Мужчинам')
+    
+    if женская_аудитория:
+        теги.append('Девушкам')
+    
+    # ============= ТЕМЫ =============
+    for тег in МАРКЕРЫ_ТЕГОВ:
+        if тег not in ('Мужчинам', 'Девушкам') and тег in найдено:
+            теги.append(тег)
     
     # Если тегов нет, добавляем по умолчанию
     if not теги:
@@ -2065,8 +1950,7 @@ def главная():
         return
     
     # Загружаем список обработанных статей
-    processed = загрузить_обработанные_статьи()
-    print(f"📋 Уже обработано статей: {len(processed['articles'])}")
+    print(f"📋 Уже обработано статей: {len(ОБРАБОТАННЫЕ_СТАТЬИ)}")
     
     # Парсим RSS фиды (можно отключить)
     все_статьи = []
@@ -2074,47 +1958,39 @@ def главная():
     ошибок_фидов = 0
     
     if not SKINNYMS_ONLY and not RECIPES_ONLY:
+        rss_фиды = []
         for rss_url in WOMENSHEALTH_RSS_FEEDS:
             # Пропускаем закомментированные фиды
             if rss_url.strip().startswith('#'):
                 continue
             
             # Проверяем различные форматы RSS/Atom фидов
-            if (rss_url.endswith('.xml') or 
-                rss_url.endswith('.atom') or 
-                rss_url.endswith('/feed') or 
-                rss_url.endswith('/feed/') or
-                rss_url.endswith('?format=feed') or
-                rss_url.endswith('?format=rss') or
-                rss_url.endswith('?format=RSS') or
-                '/feed' in rss_url or
-                '/rss' in rss_url or
-                '.xml' in rss_url or
-                '.atom' in rss_url or
-                'feedburner.com' in rss_url or
-                'feeds/posts' in rss_url):
-                try:
-                    статьи = парсить_rss_feed(rss_url)
-                    все_статьи.extend(статьи)
-                    успешно_обработанных_фидов += 1
-                    if len(статьи) > 0:
-                        print(f"✅ {rss_url[:60]}... - получено {len(статьи)} статей")
-                        # ДЕТАЛЬНОЕ ЛОГИРОВАНИЕ: Выводим ссылки на все статьи из этого RSS фида
-                        for idx, статья in enumerate(статьи, 1):
-                            заголовок = статья.get('title', 'Без заголовка')[:50]
-                            ссылка = статья.get('link', '')
-                            изображение = статья.get('image', '')
-                            print(f"     {idx}. {заголовок}...")
-                            print(f"        🔗 {ссылка}")
-                            if изображение:
-                                print(f"        🖼️  {изображение}")
-                except Exception as e:
-                    ошибок_фидов += 1
-                    print(f"❌ Ошибка запроса RSS {rss_url}: {e}")
-                    continue
+            if looks_like_feed_url(rss_url):
+                rss_фиды.append(rss_url)
             else:
                 print(f"⏭️ Пропускаем (не RSS формат): {rss_url}")
         
+        # Фиды загружаются параллельно, результаты приходят в порядке списка
+        результаты_фидов = fetch_feeds(rss_фиды, парсить_rss_feed)
+        feed_cache.save_feed_cache()
+        for rss_url, статьи in результаты_фидов:
+            if статьи is None:
+                ошибок_фидов += 1
+                continue
+            все_статьи.extend(статьи)
+            успешно_обработанных_фидов += 1
+            if len(статьи) > 0:
+                print(f"✅ {rss_url[:60]}... - получено {len(статьи)} статей")
+                # ДЕТАЛЬНОЕ ЛОГИРОВАНИЕ: Выводим ссылки на все статьи из этого RSS фида
+                for idx, статья in enumerate(статьи, 1):
+                    заголовок = статья.get('title', 'Без заголовка')[:50]
+                    ссылка = статья.get('link', '')
+                    изображение = статья.get('image', '')
+                    print(f"     {idx}. {заголовок}...")
+                    print(f"        🔗 {ссылка}")
+                    if изображение:
+                        print(f"        🖼️  {изображение}")
+        
         print(f"\n📊 Статистика парсинга RSS фидов:")
         print(f"   ✅ Успешно обработано фидов: {успешно_обработанных_фидов}")
         print(f"   ❌ Ошибок при парсинге: {ошибок_фидов}")
@@ -2475,3 +2351,4 @@ def главная():
 
 if __name__ == '__main__':
     главная()
+    deepseek_client.напечатать_метрики()